@@ -0,0 +1,142 @@
+#!/usr/bin/env python
+import argparse
+import csv
+import hashlib
+import os.path
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import metrics_preview as mp
+import shared_cache as sc
+
+result_fields = ["project", "mi", "loc", "c", "red", "dep", "cov", "seconds", "error"]
+
+
+def setup_arguments():
+    parser = argparse.ArgumentParser(description="Calculate maintainability score for many projects at once")
+    parser.add_argument(
+        "manifest", help="File with paths to the source roots of analyzed projects, one per line"
+    )
+    parser.add_argument(
+        "-o",
+        "--output-folder",
+        required=False,
+        help='Folder to save results, one subfolder per project, default "./"',
+    )
+    parser.add_argument(
+        "-r",
+        "--results",
+        required=False,
+        help='CSV file with one row per project, default "output_folder/mi_scores.csv"',
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=os.cpu_count(),
+        help="Number of projects analyzed in parallel",
+    )
+    parser.add_argument(
+        "-c",
+        "--use-cache",
+        action="store_true",
+        help='If given, not start analysis, use results from "output_folder/<project>" folders',
+    )
+    parser.add_argument(
+        "-e",
+        "--exclude",
+        required=False,
+        nargs="+",
+        help="Exclude files with path pattern from analysis",
+        default=[],
+    )
+    parser.add_argument(
+        "-t", "--threshold", type=float, required=False, help="Minimum allowed mi_score to fail under"
+    )
+    parser.add_argument(
+        "--shared-cache",
+        required=False,
+        help="Folder of results cache by file content, tool version and options, shared between projects",
+    )
+    parser.add_argument(
+        "--shared-cache-size",
+        type=int,
+        default=sc.DEFAULT_SIZE_MB,
+        help="Maximum size of the shared cache in MB, the least recently used results are evicted",
+    )
+
+    p_args = parser.parse_args()
+
+    current_path = os.path.abspath(os.getcwd())
+    p_args.output_folder = os.path.abspath(p_args.output_folder) if p_args.output_folder else current_path
+    if not p_args.results:
+        p_args.results = os.path.join(p_args.output_folder, "mi_scores.csv")
+    return p_args
+
+
+def read_manifest(file: str):
+    with open(file, "r") as f:
+        lines = [line.strip() for line in f]
+    return [line for line in lines if line and not line.startswith("#")]
+
+
+def project_folder(path: str, output_folder: str):
+    # named by the project path, so "-c" finds the results of a project wherever it is in the manifest
+    path = os.path.abspath(path)
+    digest = hashlib.sha256(path.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(output_folder, f"{os.path.basename(path)}_{digest}")
+
+
+def score_project(path: str, output_folder: str, exclude: list, use_cache: bool):
+    start = time.perf_counter()
+    row = dict(project=path)
+    try:
+        if not os.path.exists(output_folder):
+            os.makedirs(output_folder)
+        row.update(vars(mp.get_mi_stats(path, output_folder, exclude, use_cache)))
+    except Exception as e:
+        row["error"] = repr(e)
+    row["seconds"] = round(time.perf_counter() - start, 2)
+    return row
+
+
+def open_shared_cache(folder: str, max_bytes: int):
+    mp.shared_cache = sc.SharedCache(folder, max_bytes)
+
+
+def score_projects(
+    paths: list, output_folder: str, exclude: list, use_cache: bool, jobs: int, cache_args: tuple = None
+):
+    # every worker process opens the shared cache, its entries are written atomically
+    initializer = open_shared_cache if cache_args else None
+    initargs = cache_args or ()
+    with ProcessPoolExecutor(max_workers=jobs, initializer=initializer, initargs=initargs) as executor:
+        futures = [
+            executor.submit(score_project, path, project_folder(path, output_folder), exclude, use_cache)
+            for path in paths
+        ]
+        for future in as_completed(futures):
+            yield future.result()
+
+
+if __name__ == "__main__":
+    args = setup_arguments()
+    projects = read_manifest(args.manifest)
+    failed = 0
+    cache_args = (args.shared_cache, args.shared_cache_size * 1024 * 1024) if args.shared_cache else None
+    with open(args.results, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=result_fields)
+        writer.writeheader()
+        for row in score_projects(
+            projects, args.output_folder, args.exclude, args.use_cache, args.jobs, cache_args
+        ):
+            writer.writerow(row)
+            f.flush()
+            below = args.threshold is not None and row.get("mi", 0.0) < args.threshold
+            failed += bool(row.get("error")) or below
+            print(f"{row['project']}: {row.get('mi', row.get('error'))} ({row['seconds']}s)")
+    print(f"Projects scored: {len(projects)}, failed: {failed}, results: {args.results}")
+    if cache_args:
+        print(f"shared cache: {sc.SharedCache(*cache_args).evict()} evicted")
+    sys.exit(failed != 0)
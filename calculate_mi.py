@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+import run_stats
+
 
 class Stats:
     def __init__(self, good: int = 0, tolerant: int = 0, bad: int = 0, dead: int = 0):
@@ -14,6 +17,14 @@ class Stats:
     def all(self):
         return self.good + self.tolerant + self.bad + self.dead
 
+    def __add__(self, other):
+        return Stats(
+            self.good + other.good,
+            self.tolerant + other.tolerant,
+            self.bad + other.bad,
+            self.dead + other.dead,
+        )
+
 
 def evaluate(stats: Stats, bad_penalty=0.1, tolerant_penalty=0.02) -> float:
     if stats.is_empty():
@@ -25,6 +36,29 @@ def evaluate(stats: Stats, bad_penalty=0.1, tolerant_penalty=0.02) -> float:
     )
 
 
+def evaluate_upper_bound(stats: Stats, bad_penalty=0.1, tolerant_penalty=0.02) -> float:
+    # evaluate can't exceed this whatever entries are added: the good ratio stays under 1, penalties only grow
+    if stats.dead:
+        return 0.0
+    return max(0.0, 1.0 - stats.bad * bad_penalty - stats.tolerant * tolerant_penalty)
+
+
+def evaluate_counts(counts: np.ndarray, bad_penalty=0.1, tolerant_penalty=0.02) -> np.ndarray:
+    # vectorized evaluate over rows of (good, tolerant, bad, dead) counts
+    good, tolerant, bad, dead = counts.T
+    total = counts.sum(axis=1)
+    score = np.maximum(0.0, good / np.maximum(total, 1) - bad * bad_penalty - tolerant * tolerant_penalty)
+    score[dead > 0] = 0.0
+    score[total == 0] = 1.0
+    return score
+
+
+def in_interval(interval: pd.Interval, values: np.ndarray) -> np.ndarray:
+    left = values >= interval.left if interval.closed_left else values > interval.left
+    right = values <= interval.right if interval.closed_right else values < interval.right
+    return left & right
+
+
 class Limits:
     def __init__(
         self, good: pd.Interval, tolerant: pd.Interval, bad: pd.Interval, evaluate: callable = evaluate
@@ -47,9 +81,40 @@ class Limits:
                 stats.dead += 1
         return stats
 
+    def classify(self, data: np.ndarray) -> np.ndarray:
+        # 0 - good, 1 - tolerant, 2 - bad, 3 - dead; the narrowest matching interval wins as in get_stats
+        data = np.asarray(data, dtype=float)
+        categories = np.full(data.shape, 3)
+        for category, interval in reversed(list(enumerate((self.good, self.tolerant, self.bad)))):
+            categories[in_interval(interval, data)] = category
+        return categories
+
+    def get_stats_by_id(self, ids: np.ndarray, data: np.ndarray, n: int) -> np.ndarray:
+        return np.bincount(ids * 4 + self.classify(data), minlength=n * 4).reshape(n, 4)
+
+    def evaluate_by_id(self, counts: np.ndarray) -> np.ndarray:
+        if self._evaluate is evaluate:
+            return evaluate_counts(counts)
+        return np.array([self._evaluate(Stats(*c)) for c in counts.tolist()], dtype=float)
+
+    def score_by_id(self, ids: np.ndarray, data: np.ndarray, n: int) -> np.ndarray:
+        return self.evaluate_by_id(self.get_stats_by_id(ids, data, n))
+
+    def evaluate_bounds(self, stats: Stats, unknown: bool) -> tuple:
+        # lower and upper score of stats extended by any number of unknown entries, a dead one drops it to 0
+        if not unknown:
+            score = self._evaluate(stats)
+            return score, score
+        if self._evaluate is evaluate:
+            return 0.0, evaluate_upper_bound(stats)
+        return 0.0, 1.0
+
     def set_evaluate(self, evaluate: callable):
         self._evaluate = evaluate
 
+    def evaluate(self, stats: Stats):
+        return self._evaluate(stats)
+
     def score(self, data: list):
         stats = self.get_stats(data)
         return self._evaluate(stats)
@@ -120,20 +185,32 @@ duplicate_limits = Limits(
 )
 
 
+# fan-out of a file: the number of project modules it imports
+coupling_limits = Limits(
+    good=pd.Interval(0, 10, closed="both"),
+    tolerant=pd.Interval(0, 20, closed="both"),
+    bad=pd.Interval(0, np.inf, closed="both"),
+)
+
+
 def redundancy_complex(dup_lines: list) -> float:
     return duplicate_limits.score(dup_lines)
 
 
-def dependence_complex(cohesion: list) -> float:
-    return cohesion_limits.score(cohesion)
+def dependence_complex(cohesion: list, coupling: list = ()) -> float:
+    return min(cohesion_limits.score(cohesion), coupling_limits.score(coupling))
 
 
 def coverage(total: float) -> float:
     return total / 100
 
 
-def mi_file(loc, func_loc, file_cc, file_cognitive, file_cohesion, file_coverage):
-    return mi_file_stats(loc, func_loc, file_cc, file_cognitive, file_cohesion, file_coverage).mi
+def mi_file(
+    loc, func_loc, file_cc, file_cognitive, file_cohesion, file_coverage, file_dup=None, file_coupling=None
+):
+    return mi_file_stats(
+        loc, func_loc, file_cc, file_cognitive, file_cohesion, file_coverage, file_dup, file_coupling
+    ).mi
 
 
 class MIStats:
@@ -149,34 +226,221 @@ class MIStats:
         return ", ".join(f"{k}: {v}" for k, v in vars(self).items())
 
 
-def mi_file_stats(loc, func_loc, file_cc, file_cognitive, file_cohesion, file_coverage):
+def mi_file_stats(
+    loc, func_loc, file_cc, file_cognitive, file_cohesion, file_coverage, file_dup=None, file_coupling=None
+):
     loc_score = loc_file_complex(loc, func_loc)
     c_score = c_complex(file_cc, file_cognitive)
-    red_score = duplicate_limits.score([])
-    dep_score = cohesion_limits.score(file_cohesion)
+    red_score = redundancy_complex([] if file_dup is None else [file_dup])
+    dep_score = dependence_complex(file_cohesion, [] if file_coupling is None else [file_coupling])
     cov_score = coverage(file_coverage)
-    mi = 0.15 * loc_score + 0.5 * c_score + 0.15 * dep_score + 0.2 * cov_score
+    if file_dup is not None:
+        mi = 0.15 * loc_score + 0.5 * c_score + 0.07 * red_score + 0.08 * dep_score + 0.2 * cov_score
+    else:
+        mi = 0.15 * loc_score + 0.5 * c_score + 0.15 * dep_score + 0.2 * cov_score
     return MIStats(*(q.__round__(2) for q in [mi, loc_score, c_score, red_score, dep_score, cov_score]))
 
 
+@run_stats.timed("scoring", "files")
+def mi_files_stats(
+    n: int,
+    loc,
+    func_loc,
+    files_cc,
+    files_cognitive,
+    files_cohesion,
+    files_coverage,
+    files_dup,
+    files_coupling,
+):
+    # every metric except coverage is a pair of (file id, value) arrays, coverage is a value per file id
+    file_loc_score = loc_file_limits.score_by_id(*loc, n)
+    func_loc_counts = loc_func_limits.get_stats_by_id(*func_loc, n)
+    func_loc_score = loc_func_limits.evaluate_by_id(func_loc_counts)
+    loc_score = np.where(
+        func_loc_counts.sum(axis=1) == 0, file_loc_score, 0.5 * file_loc_score + 0.5 * func_loc_score
+    )
+    c_score = np.minimum(
+        cc_limits.score_by_id(*files_cc, n), cognitive_limits.score_by_id(*files_cognitive, n)
+    )
+    red_score = duplicate_limits.score_by_id(*files_dup, n)
+    dep_score = np.minimum(
+        cohesion_limits.score_by_id(*files_cohesion, n), coupling_limits.score_by_id(*files_coupling, n)
+    )
+    cov_score = coverage(np.asarray(files_coverage, dtype=float))
+    mi = np.where(
+        np.bincount(files_dup[0], minlength=n) > 0,
+        0.15 * loc_score + 0.5 * c_score + 0.07 * red_score + 0.08 * dep_score + 0.2 * cov_score,
+        0.15 * loc_score + 0.5 * c_score + 0.15 * dep_score + 0.2 * cov_score,
+    )
+    columns = np.column_stack([mi, loc_score, c_score, red_score, dep_score, cov_score]).tolist()
+    return [MIStats(*(q.__round__(2) for q in row)) for row in columns]
+
+
+@run_stats.timed("scoring", "functions")
+def mi_functions_scores(loc, cc, cognitive, cohesion) -> np.ndarray:
+    # rows of (mi, loc, c, dep) of functions, nan cognitive or cohesion are unknown and score as good;
+    # functions out of classes have no dependence part, the weights of the file score are scaled to the rest
+    n = len(loc)
+    ids = np.arange(n)
+    known = ~np.isnan(cognitive)
+    in_class = ~np.isnan(cohesion)
+    loc_score = loc_func_limits.score_by_id(ids, loc, n)
+    c_score = np.minimum(
+        cc_limits.score_by_id(ids, cc, n), cognitive_limits.score_by_id(ids[known], cognitive[known], n)
+    )
+    dep_score = cohesion_limits.score_by_id(ids[in_class], cohesion[in_class], n)
+    mi = np.where(
+        in_class,
+        (0.15 * loc_score + 0.5 * c_score + 0.15 * dep_score) / 0.8,
+        (0.15 * loc_score + 0.5 * c_score) / 0.65,
+    )
+    return np.column_stack([mi, loc_score, c_score, dep_score]).round(2)
+
+
 def mi_package(
-    loc, func_loc, file_loc, package_cc, package_cognitive, dup_lines, package_cohesion, package_coverage
+    loc,
+    func_loc,
+    file_loc,
+    package_cc,
+    package_cognitive,
+    dup_lines,
+    package_cohesion,
+    package_coverage,
+    package_coupling=(),
 ):
     return mi_package_stats(
-        loc, func_loc, file_loc, package_cc, package_cognitive, dup_lines, package_cohesion, package_coverage
+        loc,
+        func_loc,
+        file_loc,
+        package_cc,
+        package_cognitive,
+        dup_lines,
+        package_cohesion,
+        package_coverage,
+        package_coupling,
     ).mi
 
 
+@run_stats.timed("scoring", "package")
 def mi_package_stats(
-    loc, func_loc, file_loc, package_cc, package_cognitive, dup_lines, package_cohesion, package_coverage
+    loc,
+    func_loc,
+    file_loc,
+    package_cc,
+    package_cognitive,
+    dup_lines,
+    package_cohesion,
+    package_coverage,
+    package_coupling=(),
 ):
-    loc_score = loc_package_complex(loc, func_data=func_loc, file_data=file_loc)
-    c_score = c_complex(package_cc, package_cognitive)
-    red_score = redundancy_complex(dup_lines)
-    dep_score = dependence_complex(package_cohesion)
-    cov_score = coverage(package_coverage)
-    if dup_lines:
+    counts = MICounts(
+        loc=loc,
+        file_loc=loc_file_limits.get_stats(file_loc),
+        func_loc=loc_func_limits.get_stats(func_loc),
+        cc=cc_limits.get_stats(package_cc),
+        cognitive=cognitive_limits.get_stats(package_cognitive),
+        dup=duplicate_limits.get_stats(dup_lines),
+        cohesion=cohesion_limits.get_stats(package_cohesion),
+        coupling=coupling_limits.get_stats(package_coupling),
+    )
+    return mi_counts_stats(counts, package_coverage)
+
+
+class MICounts:
+    def __init__(
+        self,
+        loc=0,
+        file_loc: Stats = None,
+        func_loc: Stats = None,
+        cc: Stats = None,
+        cognitive: Stats = None,
+        dup: Stats = None,
+        cohesion: Stats = None,
+        docstrings_needed=0,
+        docstrings_found=0,
+        coupling: Stats = None,
+    ):
+        self.loc = loc
+        self.file_loc = file_loc or Stats()
+        self.func_loc = func_loc or Stats()
+        self.cc = cc or Stats()
+        self.cognitive = cognitive or Stats()
+        self.dup = dup or Stats()
+        self.cohesion = cohesion or Stats()
+        self.docstrings_needed = docstrings_needed
+        self.docstrings_found = docstrings_found
+        self.coupling = coupling or Stats()
+
+    def __add__(self, other):
+        return MICounts(**{k: getattr(self, k) + getattr(other, k, 0) for k in vars(self)})
+
+    def to_row(self) -> list:
+        # loc, (good, tolerant, bad, dead) of every stats, docstrings needed and found, coupling stats
+        stats = [self.file_loc, self.func_loc, self.cc, self.cognitive, self.dup, self.cohesion]
+        counts = [v for s in stats for v in vars(s).values()]
+        coupling = list(vars(self.coupling).values())
+        return [self.loc, *counts, self.docstrings_needed, self.docstrings_found, *coupling]
+
+    @classmethod
+    def from_row(cls, row: list):
+        # rows saved before coupling was counted end with the docstrings
+        stats = [Stats(*row[1 + 4 * i : 5 + 4 * i]) for i in range(6)]
+        coupling = Stats(*row[27:31]) if len(row) > 27 else None
+        return cls(row[0], *stats, docstrings_needed=row[25], docstrings_found=row[26], coupling=coupling)
+
+    def coverage(self) -> float:
+        if self.docstrings_needed == 0:
+            return 100.0
+        return 100.0 * self.docstrings_found / self.docstrings_needed
+
+
+@run_stats.timed("scoring", "package")
+def mi_counts_stats(counts: MICounts, package_coverage=None):
+    loc_score = 0.5 * loc_package(counts.loc) + 0.5 * min(
+        loc_file_limits.evaluate(counts.file_loc), loc_func_limits.evaluate(counts.func_loc)
+    )
+    c_score = min(cc_limits.evaluate(counts.cc), cognitive_limits.evaluate(counts.cognitive))
+    red_score = duplicate_limits.evaluate(counts.dup)
+    dep_score = min(cohesion_limits.evaluate(counts.cohesion), coupling_limits.evaluate(counts.coupling))
+    cov_score = coverage(counts.coverage() if package_coverage is None else package_coverage)
+    if not counts.dup.is_empty():
         mi = 0.15 * loc_score + 0.5 * c_score + 0.07 * red_score + 0.08 * dep_score + 0.2 * cov_score
     else:
         mi = 0.15 * loc_score + 0.5 * c_score + 0.15 * dep_score + 0.2 * cov_score
     return MIStats(*(q.__round__(2) for q in [mi, loc_score, c_score, red_score, dep_score, cov_score]))
+
+
+def mi_counts_bounds(counts: MICounts, remaining_loc=0, remaining=False, dup_known=True):
+    # lower and upper MIStats for any content of the files not analyzed yet,
+    # remaining_loc is the upper bound of their lines count
+    def bounds(limits: Limits, stats: Stats, unknown=remaining):
+        return limits.evaluate_bounds(stats, unknown)
+
+    package_loc = (loc_package(counts.loc + remaining_loc), loc_package(counts.loc))
+    file_loc = bounds(loc_file_limits, counts.file_loc)
+    func_loc = bounds(loc_func_limits, counts.func_loc)
+    cc = bounds(cc_limits, counts.cc)
+    cognitive = bounds(cognitive_limits, counts.cognitive)
+    red_score = bounds(duplicate_limits, counts.dup, not dup_known)
+    cohesion = bounds(cohesion_limits, counts.cohesion)
+    coupling = bounds(coupling_limits, counts.coupling)
+    cov_score = (0.0, 1.0) if remaining else (coverage(counts.coverage()),) * 2
+    loc_score = [0.5 * package_loc[i] + 0.5 * min(file_loc[i], func_loc[i]) for i in range(2)]
+    c_score = [min(cc[i], cognitive[i]) for i in range(2)]
+    dep_score = [min(cohesion[i], coupling[i]) for i in range(2)]
+    # weights depend on whether duplicates are known, so unknown duplicates allow both weightings
+    with_dup = [not counts.dup.is_empty()] if dup_known else [True, False]
+    bounds_stats = []
+    for i, pick in enumerate([min, max]):
+        loc_s, c_s, red_s, dep_s, cov_s = loc_score[i], c_score[i], red_score[i], dep_score[i], cov_score[i]
+        mi = pick(
+            (
+                0.15 * loc_s + 0.5 * c_s + 0.07 * red_s + 0.08 * dep_s + 0.2 * cov_s
+                if dup
+                else 0.15 * loc_s + 0.5 * c_s + 0.15 * dep_s + 0.2 * cov_s
+            )
+            for dup in with_dup
+        )
+        bounds_stats.append(MIStats(*(q.__round__(2) for q in [mi, loc_s, c_s, red_s, dep_s, cov_s])))
+    return tuple(bounds_stats)
@@ -0,0 +1,140 @@
+import re
+import subprocess
+
+# Change frequency of every line of the current files, from one streamed "git log -p -U0" pass over the
+# first-parent history: hunks are applied to per-line counters, so lines keep their counts when they move.
+_COMMIT_MARK = "\0"
+_HUNK = re.compile(r"@@ -(\d+)(?:,(\d+))? \+(\d+)(?:,(\d+))? @@")
+
+
+def apply_hunks(lines: list, hunks: list) -> list:
+    # hunks (old start, old count, new count) in the order of the diff, a changed line counts one more change
+    # than the most changed line it replaces, an added line has one change
+    result = []
+    position = 0
+    for start, removed, added in hunks:
+        start = start - 1 if removed else start
+        result.extend(lines[position:start])
+        changed = max(lines[start : start + removed], default=0) + 1
+        result.extend([changed] * added)
+        position = start + removed
+    result.extend(lines[position:])
+    return result
+
+
+class ChurnIndex:
+    def __init__(self, head: str = None, files: dict = None):
+        self.head = head
+        # path -> {"commits": number of commits changing the file, "lines": changes of every line}
+        self.files = files or dict()
+
+    def to_dict(self) -> dict:
+        return {"head": self.head, "files": self.files}
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(data["head"], data["files"])
+
+    def _apply(self, old: str, new: str, hunks: list):
+        entry = self.files.pop(old, None) if old else None
+        if new is None:
+            return
+        entry = entry or {"commits": 0, "lines": []}
+        if hunks or old is None:
+            entry["commits"] += 1
+            entry["lines"] = apply_hunks(entry["lines"], hunks)
+        self.files[new] = entry
+
+    def update(self, repo: str, rev: str = "HEAD", include: callable = None) -> int:
+        # scans only the commits after the last seen head, if it's still in the history, returns their number
+        commits = 0
+        head = _rev_parse(repo, rev)
+        if self.head == head:
+            return commits
+        if self.head and not _is_ancestor(repo, self.head, head):
+            self.head, self.files = None, dict()
+        args = ["git", "-c", "core.quotePath=off", "log", "--first-parent", "--diff-merges=first-parent"]
+        args += ["--reverse", "-p", "-U0", "-M", "--relative", "--no-color", "--no-ext-diff"]
+        args += ["--format=%x00%H", head if self.head is None else f"{self.head}..{head}"]
+        process = subprocess.Popen(
+            args, cwd=repo, stdout=subprocess.PIPE, text=True, encoding="utf-8", errors="surrogateescape"
+        )
+        with process:
+            for diff in _file_diffs(process.stdout):
+                if diff is None:
+                    commits += 1
+                    continue
+                old, new, hunks = diff
+                if include is None or any(p is not None and include(p) for p in (old, new)):
+                    self._apply(old, new, hunks)
+        if process.returncode:
+            raise subprocess.CalledProcessError(process.returncode, args)
+        self.head = head
+        return commits
+
+    def line_changes(self, path: str, first: int, last: int) -> list:
+        return self.files.get(path, {"lines": []})["lines"][first - 1 : last]
+
+    def commits(self, path: str) -> int:
+        return self.files.get(path, {"commits": 0})["commits"]
+
+
+def _rev_parse(repo: str, rev: str) -> str:
+    args = ["git", "rev-parse", "--verify", f"{rev}^{{commit}}"]
+    return subprocess.run(args, cwd=repo, capture_output=True, text=True, check=True).stdout.strip()
+
+
+def _is_ancestor(repo: str, commit: str, rev: str) -> bool:
+    return subprocess.run(["git", "merge-base", "--is-ancestor", commit, rev], cwd=repo).returncode == 0
+
+
+def _path(line: str, prefix: str) -> str:
+    # "--- a/path", "+++ b/path" or "/dev/null" of an added or deleted file,
+    # git ends the line with a tab when the path has a space
+    path = line[4:].rstrip("\n").removesuffix("\t")
+    return None if path == "/dev/null" else path.removeprefix(prefix)
+
+
+def _header_path(line: str) -> str:
+    # "diff --git a/path b/path" of a file with the same path on both sides, files without hunks
+    # (empty added or deleted files, mode changes) have no other path lines
+    paths = line[len("diff --git a/") :].rstrip("\n")
+    return paths[: (len(paths) - len(" b/")) // 2]
+
+
+def _file_diffs(stream):
+    # yields None for every commit and (old path, new path, hunks) for every changed file of it
+    diff = None
+    line = next(stream, None)
+    while line is not None:
+        if line.startswith(_COMMIT_MARK) or line.startswith("diff --git "):
+            if diff:
+                yield diff
+            diff = [_header_path(line)] * 2 + [[]] if line.startswith("diff --git ") else None
+            if diff is None:
+                yield None
+        elif diff is not None and line.startswith("new file mode "):
+            diff[0] = None
+        elif diff is not None and line.startswith("deleted file mode "):
+            diff[1] = None
+        elif diff is not None and line.startswith("rename from "):
+            diff[0] = line[len("rename from ") :].rstrip("\n")
+        elif diff is not None and line.startswith("rename to "):
+            diff[1] = line[len("rename to ") :].rstrip("\n")
+        elif diff is not None and line.startswith("--- ") and not diff[2]:
+            diff[0] = _path(line, "a/")
+        elif diff is not None and line.startswith("+++ ") and not diff[2]:
+            diff[1] = _path(line, "b/")
+        elif diff is not None and line.startswith("@@ "):
+            start, removed, _, added = _HUNK.match(line).groups()
+            removed = 1 if removed is None else int(removed)
+            added = 1 if added is None else int(added)
+            diff[2].append((int(start), removed, added))
+            # hunk lines are skipped by their counts, they may look like headers
+            for _ in range(removed + added):
+                line = next(stream)
+                while line.startswith("\\"):  # "\ No newline at end of file"
+                    line = next(stream)
+        line = next(stream, None)
+    if diff:
+        yield diff
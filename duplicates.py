@@ -0,0 +1,252 @@
+import fnmatch
+import io
+import itertools
+import keyword
+import operator
+import os.path
+import sqlite3
+import tokenize
+import zlib
+from collections import Counter, deque
+
+# k-gram length in normalized tokens and winnowing window size:
+# every clone at least K + W - 1 tokens long is guaranteed to share a fingerprint
+K = 25
+W = 10
+
+_BASE = 257
+_MOD = (1 << 61) - 1
+
+_SKIPPED_TOKENS = {
+    tokenize.COMMENT,
+    tokenize.NL,
+    tokenize.NEWLINE,
+    tokenize.INDENT,
+    tokenize.DEDENT,
+    tokenize.ENCODING,
+    tokenize.ENDMARKER,
+}
+
+
+def normalize(token: tokenize.TokenInfo) -> str:
+    # rename identifiers and literals, so clones with renamed variables still match
+    if token.type == tokenize.NAME:
+        return token.string if keyword.iskeyword(token.string) else "N"
+    if token.type == tokenize.STRING:
+        return "S"
+    if token.type == tokenize.NUMBER:
+        return "0"
+    return token.string
+
+
+def tokens(source: str) -> list:
+    result = []
+    try:
+        for token in tokenize.generate_tokens(io.StringIO(source).readline):
+            if token.type in _SKIPPED_TOKENS:
+                continue
+            result.append((normalize(token), token.start[0]))
+    except (tokenize.TokenError, IndentationError, SyntaxError):
+        pass
+    return result
+
+
+def kgram_hashes(token_ids: list, k: int = K) -> list:
+    if len(token_ids) < k:
+        return []
+    high = pow(_BASE, k - 1, _MOD)
+    h = 0
+    for t in token_ids[:k]:
+        h = (h * _BASE + t) % _MOD
+    hashes = [h]
+    for i in range(k, len(token_ids)):
+        h = ((h - token_ids[i - k] * high) * _BASE + token_ids[i]) % _MOD
+        hashes.append(h)
+    return hashes
+
+
+def winnow(hashes: list, w: int = W) -> list:
+    # robust winnowing: minimum hash of every window (rightmost on ties), each position recorded once
+    fingerprints = []
+    window = deque()
+    last = -1
+    for i, h in enumerate(hashes):
+        while window and hashes[window[-1]] >= h:
+            window.pop()
+        window.append(i)
+        if window[0] <= i - w:
+            window.popleft()
+        if i >= w - 1 or i == len(hashes) - 1:
+            position = window[0]
+            if position != last:
+                fingerprints.append((hashes[position], position))
+                last = position
+    return fingerprints
+
+
+def token_id(token: str) -> int:
+    # stable between runs, so fingerprints of a file can be stored and reused
+    return zlib.crc32(token.encode("utf-8")) + 1
+
+
+def file_fingerprints(source: str, k: int = K, w: int = W) -> tuple:
+    # (hash, first line, last line) of every fingerprint and the set of lines with code
+    file_tokens = tokens(source)
+    fingerprints = [
+        (h, file_tokens[position][1], file_tokens[position + k - 1][1])
+        for h, position in winnow(kgram_hashes([token_id(t) for t, _ in file_tokens], k), w)
+    ]
+    return fingerprints, {line for _, line in file_tokens}
+
+
+class DuplicatesIndex:
+    # duplicated lines are kept by file and updated lazily: adding or removing a file marks as changed
+    # only itself and the files sharing a fingerprint whose count crossed two
+    def __init__(self, k: int = K, w: int = W):
+        self._k = k
+        self._w = w
+        self._counts = dict()
+        self._holders = dict()
+        self._files = dict()
+        self._duplicated = dict()
+        self._changed = set()
+
+    def add(self, filename: str, source: str):
+        self.add_fingerprints(filename, *file_fingerprints(source, self._k, self._w))
+
+    def add_fingerprints(self, filename: str, fingerprints: list, code_lines: set):
+        if filename in self._files:
+            self.remove(filename)
+        self._files[filename] = (fingerprints, set(code_lines))
+        self._changed |= self._count(filename, fingerprints, 1)
+        self._changed.add(filename)
+
+    def remove(self, filename: str):
+        fingerprints, _ = self._files.pop(filename)
+        self._duplicated.pop(filename, None)
+        self._changed.discard(filename)
+        self._changed |= self._count(filename, fingerprints, -1)
+
+    def _count(self, filename: str, fingerprints: list, step: int) -> set:
+        # files holding a fingerprint which became or stopped being repeated
+        crossed = set()
+        for h, n in Counter(h for h, _, _ in fingerprints).items():
+            before = self._counts.get(h, 0)
+            after = before + step * n
+            holders = self._holders.setdefault(h, set())
+            if step > 0:
+                holders.add(filename)
+            else:
+                holders.discard(filename)
+            if (before >= 2) != (after >= 2):
+                crossed |= holders
+            if after:
+                self._counts[h] = after
+            else:
+                del self._counts[h], self._holders[h]
+        return crossed
+
+    def _update(self):
+        for filename in self._changed:
+            fingerprints, code_lines = self._files[filename]
+            duplicated = set()
+            for h, first_line, last_line in fingerprints:
+                if self._counts[h] >= 2:
+                    duplicated.update(range(first_line, last_line + 1))
+            self._duplicated[filename] = duplicated & code_lines
+        self._changed = set()
+
+    def duplicated_lines(self) -> list:
+        self._update()
+        return [self._duplicated[f] for f in self._files]
+
+    def percentages(self) -> dict:
+        return {
+            f: round(100.0 * len(d) / len(c), 2) if c else 0.0
+            for f, d, (_, c) in zip(self._files, self.duplicated_lines(), self._files.values())
+        }
+
+
+class SpilledDuplicatesIndex:
+    # the same percentages as DuplicatesIndex with the fingerprints in an sqlite file instead of memory:
+    # the database finds the repeated hashes, and only the lines of one file at a time are kept in memory
+    def __init__(self, database: str, k: int = K, w: int = W):
+        self._k = k
+        self._w = w
+        if os.path.exists(database):
+            os.remove(database)
+        self._db = sqlite3.connect(database)
+        # a scratch database, rebuilt by every run
+        self._db.execute("PRAGMA journal_mode = OFF")
+        self._db.execute("PRAGMA synchronous = OFF")
+        self._db.execute("CREATE TABLE files (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+        self._db.execute(
+            "CREATE TABLE fingerprints (hash INTEGER, file INTEGER, first INTEGER, last INTEGER)"
+        )
+        self._db.execute("CREATE TABLE code_lines (file INTEGER, line INTEGER)")
+        self._db.execute("CREATE TABLE percentages (file INTEGER PRIMARY KEY, value REAL)")
+        self._finished = False
+
+    def add(self, filename: str, source: str):
+        fingerprints, code_lines = file_fingerprints(source, self._k, self._w)
+        file_id = self._db.execute("INSERT INTO files (name) VALUES (?)", (filename,)).lastrowid
+        self._db.executemany(
+            "INSERT INTO fingerprints VALUES (?, ?, ?, ?)", ((h, file_id, f, l) for h, f, l in fingerprints)
+        )
+        self._db.executemany("INSERT INTO code_lines VALUES (?, ?)", ((file_id, line) for line in code_lines))
+
+    def _finish(self):
+        self._db.execute("CREATE INDEX fingerprints_hash ON fingerprints (hash)")
+        self._db.execute("CREATE INDEX code_lines_file ON code_lines (file, line)")
+        ranges = self._db.execute(
+            "SELECT file, first, last FROM fingerprints WHERE hash IN "
+            "(SELECT hash FROM fingerprints GROUP BY hash HAVING COUNT(*) > 1) ORDER BY file"
+        )
+        pending = next(ranges, None)
+        # duplicated ranges and code lines are both ordered by file, so they are merged file by file
+        code_lines = self._db.execute("SELECT file, line FROM code_lines ORDER BY file")
+        for file_id, lines in itertools.groupby(code_lines, key=operator.itemgetter(0)):
+            code = {line for _, line in lines}
+            duplicated = set()
+            while pending is not None and pending[0] <= file_id:
+                if pending[0] == file_id:
+                    duplicated.update(range(pending[1], pending[2] + 1))
+                pending = next(ranges, None)
+            percentage = round(100.0 * len(duplicated & code) / len(code), 2)
+            self._db.execute("INSERT INTO percentages VALUES (?, ?)", (file_id, percentage))
+        self._db.commit()
+        self._finished = True
+
+    def percentages(self, files: list) -> dict:
+        if not self._finished:
+            self._finish()
+        query = "SELECT COALESCE(value, 0.0) FROM files LEFT JOIN percentages ON id = file WHERE name = ?"
+        return {f: row[0] for f in files for row in self._db.execute(query, (f,))}
+
+    def close(self):
+        self._db.close()
+
+
+def is_excluded(filename: str, exclude: list) -> bool:
+    return any(
+        fnmatch.fnmatch(filename, pattern) or fnmatch.fnmatch("./" + filename, pattern) for pattern in exclude
+    )
+
+
+def source_files(project_path: str, exclude: list):
+    for root, dirs, files in os.walk(project_path):
+        dirs[:] = sorted(d for d in dirs if not d.startswith("."))
+        for file in sorted(files):
+            if not file.endswith(".py"):
+                continue
+            filename = os.path.relpath(os.path.join(root, file), project_path)
+            if not is_excluded(filename, exclude):
+                yield filename
+
+
+def find_duplicates(project_path: str, exclude: list, files=None) -> dict:
+    index = DuplicatesIndex()
+    for filename in source_files(project_path, exclude) if files is None else files:
+        with open(os.path.join(project_path, filename), "r", errors="replace") as f:
+            index.add(filename, f.read())
+    return index.percentages()
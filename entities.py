@@ -0,0 +1,220 @@
+import re
+
+import numpy as np
+
+
+class Entities:
+    # numeric values of analyzed entities and a lazy row of their details, shared by tables and reports
+    def __init__(self, title: str, header: list, values: np.ndarray, row: callable, reverse=True):
+        self.title = title
+        self.header = header
+        self.values = values
+        self.row = row
+        self.reverse = reverse
+
+    def __len__(self):
+        return len(self.values)
+
+    def worst_first(self) -> np.ndarray:
+        keys = -self.values if self.reverse else self.values
+        return np.argsort(keys, kind="stable")
+
+
+def radon_cc_entities(data: dict):
+    entities = [(f, e) for f, es in data.items() for e in es]
+    values = np.fromiter((e["complexity"] for _, e in entities), dtype=float, count=len(entities))
+
+    def row(i):
+        f, e = entities[i]
+        name = f'{e["classname"]}.{e["name"]}' if "classname" in e else e["name"]
+        return e["complexity"], e["rank"], e["type"], name, f'{f}:{e["lineno"]}'
+
+    return Entities(
+        "Radon cyclomatic complexity", ["complexity", "rank", "type", "name", "location"], values, row
+    )
+
+
+def radon_raw_entities(data: dict):
+    files = list(data.keys())
+    values = np.fromiter((data[f]["loc"] for f in files), dtype=float, count=len(files))
+
+    def row(i):
+        e = data[files[i]]
+        return e["loc"], e["sloc"], e["lloc"], e["comments"], e["blank"], files[i]
+
+    return Entities("Radon lines of code", ["loc", "sloc", "lloc", "comments", "blank", "file"], values, row)
+
+
+def radon_hal_entities(data: dict):
+    functions = [(f, name, entry) for f, es in data.items() for name, entry in es["functions"].items()]
+    values = np.fromiter((e["difficulty"] for _, _, e in functions), dtype=float, count=len(functions))
+
+    def row(i):
+        f, name, e = functions[i]
+        return round(e["difficulty"], 2), round(e["effort"], 2), round(e["volume"], 2), name, f
+
+    return Entities(
+        "Radon Halstead difficulty", ["difficulty", "effort", "volume", "function", "file"], values, row
+    )
+
+
+def radon_mi_entities(data: dict):
+    files = list(data.keys())
+    values = np.fromiter((data[f]["mi"] for f in files), dtype=float, count=len(files))
+
+    def row(i):
+        return round(data[files[i]]["mi"], 2), data[files[i]]["rank"], files[i]
+
+    return Entities("Radon maintainability index", ["mi", "rank", "file"], values, row, reverse=False)
+
+
+def flake8_code_entities(data: dict, code: str, pattern: str, group: int, title: str, reverse=True):
+    entries = [(f.removeprefix("./"), e) for f, es in data.items() for e in es if e["code"] == code]
+    compiled = re.compile(pattern)
+    values = np.fromiter(
+        (float(compiled.fullmatch(e["text"]).group(group)) for _, e in entries),
+        dtype=float,
+        count=len(entries),
+    )
+
+    def row(i):
+        f, e = entries[i]
+        physical_line = e["physical_line"].strip()
+        match = re.search(r"(?:def|class) (\w*)", physical_line)
+        return f"{values[i]:g}", match.group(1) if match else physical_line, f'{f}:{e["line_number"]}'
+
+    return Entities(title, ["value", "name", "location"], values, row, reverse)
+
+
+def flake8_radon_entities(data: dict):
+    return flake8_code_entities(data, "R701", r"'(.*)' is too complex \((.*)\)", 2, "Flake8 radon complexity")
+
+
+def flake8_mccabe_entities(data: dict):
+    return flake8_code_entities(
+        data, "C901", r"'(.*)' is too complex \((.*)\)", 2, "Flake8 mccabe complexity"
+    )
+
+
+def flake8_cognitive_entities(data: dict):
+    return flake8_code_entities(
+        data, "CCR001", r"Cognitive complexity is too high \((.*) > (.*)\)", 1, "Cognitive complexity"
+    )
+
+
+def flake8_cohesion_entities(data: dict):
+    return flake8_code_entities(
+        data, "H601", r"class has low \((.*)\%\) cohesion", 1, "Cohesion", reverse=False
+    )
+
+
+def docstr_entities(text: str, path: str):
+    pattern = r'File: "(.*)"\n Needed: (.*); Found: (.*); Missing: (.*); Coverage: (.*)%'
+    matches = re.findall(pattern, text)
+    values = np.fromiter((float(m[4]) for m in matches), dtype=float, count=len(matches))
+
+    def row(i):
+        m = matches[i]
+        return m[4], m[1], m[2], m[3], m[0].removeprefix(path).removeprefix("/")
+
+    header = ["coverage", "needed", "found", "missing", "file"]
+    return Entities("Docstring coverage", header, values, row, reverse=False)
+
+
+def duplicates_entities(data: dict):
+    files = list(data.keys())
+    values = np.fromiter(data.values(), dtype=float, count=len(files))
+    return Entities(
+        "Duplicated lines", ["percentage", "file"], values, lambda i: (f"{values[i]:g}", files[i])
+    )
+
+
+def imports_entities(data: dict):
+    files = list(data["files"].keys())
+    values = np.fromiter((e["fan_out"] for e in data["files"].values()), dtype=float, count=len(files))
+    in_cycles = {f for cycle in data["cycles"] for f in cycle}
+
+    def row(i):
+        entry = data["files"][files[i]]
+        return entry["fan_out"], entry["fan_in"], "yes" if files[i] in in_cycles else "", files[i]
+
+    return Entities("Imports of project modules", ["fan-out", "fan-in", "cycle", "file"], values, row)
+
+
+def mi_entities(files_stats: list):
+    values = np.fromiter((s.mi for _, s in files_stats), dtype=float, count=len(files_stats))
+
+    def row(i):
+        f, s = files_stats[i]
+        return s.mi, s.loc, s.c, s.red, s.dep, s.cov, f
+
+    header = ["MI", "loc", "c", "red", "dep", "cov", "file"]
+    return Entities("Maintainability score", header, values, row, reverse=False)
+
+
+radon_entities = {
+    "cc": radon_cc_entities,
+    "raw": radon_raw_entities,
+    "hal": radon_hal_entities,
+    "mi": radon_mi_entities,
+}
+
+flake8_entities = {
+    "radon": flake8_radon_entities,
+    "mccabe": flake8_mccabe_entities,
+    "cognitive": flake8_cognitive_entities,
+    "cohesion": flake8_cohesion_entities,
+}
+
+
+def _value(value: float):
+    # integer values of the records are stored as floats, unknown ones as nan
+    return "" if np.isnan(value) else f"{value:g}"
+
+
+def function_entities(records: dict):
+    values = records["mi"]
+
+    def row(i):
+        return (
+            values[i],
+            records["loc_score"][i],
+            records["c_score"][i],
+            records["dep_score"][i] if not np.isnan(records["cohesion"][i]) else "",
+            _value(records["loc"][i]),
+            _value(records["cc"][i]),
+            _value(records["cognitive"][i]),
+            _value(records["cohesion"][i]),
+            _value(round(records["difficulty"][i], 2)),
+            records["names"][i],
+            f'{records["files"][i]}:{int(records["lineno"][i])}',
+        )
+
+    header = ["MI", "loc", "c", "dep", "lines", "cc", "cognitive", "cohesion", "difficulty", "name"]
+    header.append("location")
+    return Entities("Functions maintainability", header, values, row, reverse=False)
+
+
+def hotspot_entities(records: dict, index):
+    # functions by line churn times complexity, the churn is the sum of changes of the function lines
+    spans = [
+        index.line_changes(f, int(first), int(last))
+        for f, first, last in zip(records["files"], records["lineno"], records["endline"])
+    ]
+    churn = np.array([sum(changes) for changes in spans], dtype=float)
+    values = churn * records["cc"]
+
+    def row(i):
+        return (
+            f"{values[i]:g}",
+            int(churn[i]),
+            max(spans[i], default=0),
+            index.commits(records["files"][i]),
+            _value(records["cc"][i]),
+            _value(records["cognitive"][i]),
+            records["names"][i],
+            f'{records["files"][i]}:{int(records["lineno"][i])}',
+        )
+
+    header = ["score", "churn", "changes", "file commits", "cc", "cognitive", "name", "location"]
+    return Entities("Hotspots: line churn x cyclomatic complexity", header, values, row)
@@ -0,0 +1,64 @@
+import re
+from collections import Counter
+
+import numpy as np
+
+import calculate_mi as cm
+
+# One record per function and method of radon cc results, joined with the other tools by hash lookups:
+# flake8 entries by their (file, line) and class cohesion by (file, class name), radon hal functions,
+# which are keyed by name only, by a function name unique in its file.
+_COGNITIVE = re.compile(r"Cognitive complexity is too high \((\d+)")
+_COHESION = re.compile(r"class has low \((.*)%\) cohesion")
+HAL_FIELDS = ["volume", "difficulty", "effort"]
+
+
+def flake8_index(flake8_data: dict, code: str, pattern: re.Pattern) -> dict:
+    # (file, line) -> value of the entries of one code, the text is matched once per entry
+    return {
+        (f.removeprefix("./"), e["line_number"]): float(pattern.match(e["text"]).group(1))
+        for f, es in flake8_data.items()
+        for e in es
+        if e["code"] == code
+    }
+
+
+def function_records(cc_data: dict, flake8_data: dict, hal_data: dict = None) -> dict:
+    # columns of the records, nan where a tool has no value: cognitive of functions skipped with noqa,
+    # cohesion of functions out of classes, hal of functions with a name repeated in the file
+    cognitive = flake8_index(flake8_data, "CCR001", _COGNITIVE)
+    cohesion = flake8_index(flake8_data, "H601", _COHESION)
+    hal_data = hal_data or dict()
+    files, names, rows = [], [], []
+    for file, blocks in cc_data.items():
+        if not isinstance(blocks, list):
+            continue
+        file = file.removeprefix("./")
+        classes = {b["name"]: b["lineno"] for b in blocks if b["type"] == "class"}
+        functions = [b for b in blocks if b["type"] != "class"]
+        repeated = {name for name, n in Counter(b["name"] for b in functions).items() if n > 1}
+        hal = hal_data.get(file, hal_data.get(f"./{file}", dict())).get("functions", dict())
+        for b in sorted(functions, key=lambda b: b["lineno"]):
+            class_line = classes.get(b.get("classname"))
+            hal_entry = hal.get(b["name"]) if b["name"] not in repeated else None
+            files.append(file)
+            names.append(f'{b["classname"]}.{b["name"]}' if "classname" in b else b["name"])
+            rows.append(
+                [
+                    b["lineno"],
+                    b["endline"],
+                    b["complexity"],
+                    cognitive.get((file, b["lineno"]), np.nan),
+                    np.nan if class_line is None else cohesion.get((file, class_line), 100.0),
+                    *(np.nan if hal_entry is None else hal_entry[field] for field in HAL_FIELDS),
+                ]
+            )
+    table = np.array(rows, dtype=float).reshape(-1, 5 + len(HAL_FIELDS))
+    records = {"files": files, "names": names}
+    for i, column in enumerate(["lineno", "endline", "cc", "cognitive", "cohesion", *HAL_FIELDS]):
+        records[column] = table[:, i]
+    records["loc"] = records["endline"] - records["lineno"] + 1
+    scores = cm.mi_functions_scores(records["loc"], records["cc"], records["cognitive"], records["cohesion"])
+    for i, column in enumerate(["mi", "loc_score", "c_score", "dep_score"]):
+        records[column] = scores[:, i]
+    return records
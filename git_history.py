@@ -0,0 +1,95 @@
+import subprocess
+
+_TREE_MODE = b"40000"
+_BLOB_MODES = {b"100644", b"100755"}
+
+
+def rev_list(repo: str, rev: str = "HEAD", since: str = None, max_count: int = None) -> list:
+    # (commit, commit unix time) pairs, the oldest first
+    args = ["git", "rev-list", "--timestamp", "--reverse", "--first-parent"]
+    if since:
+        args.append(f"--since={since}")
+    if max_count:
+        args.append(f"--max-count={max_count}")
+    output = subprocess.run(args + [rev], cwd=repo, capture_output=True, text=True, check=True).stdout
+    return [(commit, int(timestamp)) for timestamp, commit in (line.split() for line in output.splitlines())]
+
+
+def index_files(repo: str) -> dict:
+    # path -> blob sha of the staged version of every regular file, paths are relative to repo
+    output = subprocess.run(
+        ["git", "ls-files", "-s", "-z"], cwd=repo, capture_output=True, check=True
+    ).stdout.decode("utf-8", "surrogateescape")
+    files = dict()
+    for entry in output.split("\0"):
+        if not entry:
+            continue
+        info, path = entry.split("\t", 1)
+        mode, sha, stage = info.split()
+        if mode.encode("ascii") in _BLOB_MODES and stage == "0":
+            files[path] = sha
+    return files
+
+
+class GitObjects:
+    # objects are read from one "git cat-file --batch" process, every tree is parsed once,
+    # so subtrees unchanged between commits are reused
+    def __init__(self, repo: str):
+        self._process = subprocess.Popen(
+            ["git", "cat-file", "--batch"], cwd=repo, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        self._trees = dict()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        self._process.stdin.close()
+        self._process.wait()
+
+    def read(self, sha: str) -> tuple:
+        self._process.stdin.write(sha.encode("ascii") + b"\n")
+        self._process.stdin.flush()
+        header = self._process.stdout.readline().split()
+        if len(header) != 3:
+            raise KeyError(f"git object {sha} is missing")
+        data = self._process.stdout.read(int(header[2]))
+        self._process.stdout.read(1)  # the newline after the object
+        return header[1].decode("ascii"), data
+
+    def commit_tree(self, commit: str) -> str:
+        _, data = self.read(commit)
+        return data.split(b"\n", 1)[0].removeprefix(b"tree ").decode("ascii")
+
+    def _tree_entries(self, tree: str) -> tuple:
+        # (name, sha) of subtrees and of regular files
+        if tree not in self._trees:
+            _, data = self.read(tree)
+            subtrees, blobs = [], []
+            position = 0
+            while position < len(data):
+                space = data.index(b" ", position)
+                nul = data.index(b"\0", space)
+                mode = data[position:space]
+                entry = (
+                    data[space + 1 : nul].decode("utf-8", "surrogateescape"),
+                    data[nul + 1 : nul + 21].hex(),
+                )
+                position = nul + 21
+                if mode == _TREE_MODE:
+                    subtrees.append(entry)
+                elif mode in _BLOB_MODES:
+                    blobs.append(entry)
+            self._trees[tree] = subtrees, blobs
+        return self._trees[tree]
+
+    def tree_blobs(self, tree: str, prefix: str = ""):
+        # (path, blob sha) of every regular file in the tree
+        subtrees, blobs = self._tree_entries(tree)
+        for name, sha in blobs:
+            yield prefix + name, sha
+        for name, sha in subtrees:
+            yield from self.tree_blobs(sha, f"{prefix}{name}/")
@@ -0,0 +1,176 @@
+import html
+import json
+import math
+import os.path
+
+# rows of details are split into chunks, every chunk is a separate json block parsed only when shown
+CHUNK_SIZE = 2000
+
+_STYLE = """
+body { font-family: sans-serif; margin: 20px; }
+section { margin-bottom: 40px; }
+canvas { border: 1px solid #ccc; cursor: crosshair; width: 100%; height: 160px; }
+.table { height: 320px; overflow-y: auto; position: relative; border: 1px solid #ccc; font-size: 12px; }
+.row { position: absolute; left: 0; right: 0; height: 20px; line-height: 20px; white-space: nowrap;
+       cursor: pointer; display: grid; }
+.row:nth-child(even) { background: #f4f4f4; }
+.row.selected { background: #ffe0a0; }
+.row span { overflow: hidden; text-overflow: ellipsis; padding: 0 6px; }
+.header { font-weight: bold; position: sticky; top: 0; background: #ddd; z-index: 1; }
+pre.details { background: #fff3e0; padding: 8px; min-height: 1em; }
+"""
+
+_SCRIPT = """
+const ROW = 20;
+const meta = JSON.parse(document.getElementById("meta").textContent);
+const chunks = new Map();
+
+function row(c, i) {
+  const chart = meta.charts[c];
+  const key = `c${c}-${Math.floor(i / chart.chunk)}`;
+  if (!chunks.has(key)) {
+    chunks.set(key, JSON.parse(document.getElementById(key).textContent));
+  }
+  return chunks.get(key)[i % chart.chunk];
+}
+
+function drawChart(canvas, values) {
+  const width = canvas.width = canvas.clientWidth;
+  const height = canvas.height = canvas.clientHeight;
+  const ctx = canvas.getContext("2d");
+  let min = 0, max = 0;
+  for (const v of values) { if (v < min) min = v; if (v > max) max = v; }
+  const scale = max === min ? 1 : height / (max - min);
+  const zero = height + min * scale;
+  ctx.fillStyle = "#1f77b4";
+  const columns = Math.min(width, values.length);
+  for (let x = 0; x < columns; x++) {
+    // every pixel column shows the envelope of the values falling into it
+    const start = Math.floor(x * values.length / columns);
+    const end = Math.max(start + 1, Math.floor((x + 1) * values.length / columns));
+    let top = values[start], bottom = values[start];
+    for (let i = start + 1; i < end; i++) {
+      top = Math.max(top, values[i]);
+      bottom = Math.min(bottom, values[i]);
+    }
+    const y1 = Math.min(zero, height - (top - min) * scale);
+    const y2 = Math.max(zero, height - (bottom - min) * scale);
+    const barX = x * width / columns;
+    ctx.fillRect(barX, y1, Math.max(1, width / columns - (columns < width ? 1 : 0)), Math.max(1, y2 - y1));
+  }
+}
+
+function makeChart(c) {
+  const chart = meta.charts[c];
+  const section = document.getElementById(`chart-${c}`);
+  const canvas = section.querySelector("canvas");
+  const details = section.querySelector("pre.details");
+  const table = section.querySelector(".table");
+  const body = table.querySelector(".body");
+  const columns = `repeat(${chart.header.length - 1}, 120px) 1fr`;
+  table.querySelector(".header").style.gridTemplateColumns = columns;
+  body.style.height = `${chart.values.length * ROW}px`;
+  let selected = -1;
+
+  function select(i) {
+    selected = i;
+    details.textContent = chart.header.map((h, j) => `${h}: ${row(c, i)[j]}`).join("\\n");
+    render();
+  }
+
+  function render() {
+    const first = Math.max(0, Math.floor(table.scrollTop / ROW) - 1);
+    const last = Math.min(chart.values.length, first + Math.ceil(table.clientHeight / ROW) + 2);
+    const fragment = document.createDocumentFragment();
+    for (let i = first; i < last; i++) {
+      const div = document.createElement("div");
+      div.className = i === selected ? "row selected" : "row";
+      div.style.top = `${(i + 1) * ROW}px`;
+      div.style.gridTemplateColumns = columns;
+      for (const cell of row(c, i)) {
+        const span = document.createElement("span");
+        span.textContent = cell;
+        div.appendChild(span);
+      }
+      div.onclick = () => select(i);
+      fragment.appendChild(div);
+    }
+    body.replaceChildren(fragment);
+  }
+
+  canvas.onclick = (event) => {
+    if (chart.values.length === 0) return;
+    const i = Math.floor(event.offsetX / canvas.clientWidth * chart.values.length);
+    table.scrollTop = i * ROW;
+    select(Math.min(i, chart.values.length - 1));
+  };
+  table.onscroll = render;
+  drawChart(canvas, chart.values);
+  render();
+}
+
+meta.charts.forEach((_, c) => makeChart(c));
+"""
+
+
+def _json_block(block_id: str, data) -> str:
+    text = json.dumps(data, separators=(",", ":"), allow_nan=False).replace("</", "<\\/")
+    return f'<script type="application/json" id="{block_id}">{text}</script>'
+
+
+def _finite(values: list) -> list:
+    # nan is not valid json, values missing a measure are drawn as 0
+    return [v if math.isfinite(v) else None for v in values]
+
+
+class Report:
+    def __init__(self, title: str, top: int = None):
+        self._title = title
+        self._top = top
+        self._charts = []
+
+    def add(self, entities):
+        self._charts.append(entities)
+
+    def render(self) -> str:
+        charts_meta = []
+        blocks = []
+        sections = []
+        for c, entities in enumerate(self._charts):
+            order = entities.worst_first()[: self._top]
+            rows = [[str(cell) for cell in entities.row(i)] for i in order.tolist()]
+            charts_meta.append(
+                {
+                    "title": entities.title,
+                    "header": entities.header,
+                    "values": _finite(entities.values[order].tolist()),
+                    "chunk": CHUNK_SIZE,
+                }
+            )
+            for start in range(0, len(rows), CHUNK_SIZE):
+                blocks.append(_json_block(f"c{c}-{start // CHUNK_SIZE}", rows[start : start + CHUNK_SIZE]))
+            header = "".join(f"<span>{html.escape(h)}</span>" for h in entities.header)
+            sections.append(
+                f'<section id="chart-{c}"><h2>{html.escape(entities.title)}</h2>'
+                + f"<p>Total count: {len(entities)}, shown: {len(rows)}, the worst first. "
+                + "Click a bar or a row to see details.</p>"
+                + '<canvas></canvas><pre class="details"></pre>'
+                + f'<div class="table"><div class="row header">{header}</div><div class="body"></div></div>'
+                + "</section>"
+            )
+        return (
+            "<!DOCTYPE html>\n"
+            + f'<html><head><meta charset="utf-8"><title>{html.escape(self._title)}</title>'
+            + f"<style>{_STYLE}</style></head><body>"
+            + f"<h1>{html.escape(self._title)}</h1>"
+            + "".join(sections)
+            + _json_block("meta", {"charts": charts_meta})
+            + "".join(blocks)
+            + f"<script>{_SCRIPT}</script></body></html>"
+        )
+
+    def save(self, output_folder: str, filename: str = "report.html"):
+        out = os.path.join(output_folder, filename)
+        with open(out, "w") as f:
+            f.write(self.render())
+        return out
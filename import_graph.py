@@ -0,0 +1,218 @@
+import ast
+import os.path
+from collections import defaultdict
+
+import duplicates
+
+# Imports between the files of a project. Every file keeps its import statements, resolved to project
+# modules by the longest existing dotted name, so changing a file updates only its own edges, and adding
+# or removing a module resolves again only the files naming it.
+
+
+def module_name(file: str) -> str:
+    # "pkg/sub/mod.py" -> "pkg.sub.mod", "pkg/__init__.py" -> "pkg", the root "__init__.py" -> ""
+    parts = file.replace(os.sep, "/").removesuffix(".py").split("/")
+    if parts[-1] == "__init__":
+        parts.pop()
+    return ".".join(parts)
+
+
+def root_package(path: str):
+    # a project path which is a package itself is imported by its folder name
+    if os.path.exists(os.path.join(path, "__init__.py")):
+        return os.path.basename(os.path.abspath(path))
+    return None
+
+
+def source_imports(tree: ast.AST) -> list:
+    # [level, module, names] of every import, names are given for "from" imports only
+    imports = []
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            imports.extend([0, alias.name, []] for alias in node.names)
+        elif isinstance(node, ast.ImportFrom):
+            imports.append([node.level, node.module or "", [alias.name for alias in node.names]])
+    return imports
+
+
+def parse_imports(source) -> list:
+    # of a source text or bytes, a file python can't parse imports nothing
+    try:
+        return source_imports(ast.parse(source))
+    except (SyntaxError, ValueError):
+        return []
+
+
+def _parents(name: str) -> list:
+    # the name and its parent packages, the longest first
+    parts = name.split(".")
+    return [".".join(parts[:i]) for i in range(len(parts), 0, -1)]
+
+
+def _join(package: str, name: str) -> str:
+    # "from . import name" has no module after the package
+    return f"{package}.{name}" if package and name else package or name
+
+
+class ImportGraph:
+    def __init__(self, files=(), root: str = None):
+        self.root = root
+        self._modules = dict()
+        self._chains = dict()
+        self._naming = defaultdict(set)
+        self._out = dict()
+        self._in = defaultdict(set)
+        self._cycles = None
+        for file in files:
+            self.add_file(file)
+
+    def files(self) -> list:
+        return list(self._modules.values())
+
+    def _absolute(self, file: str, level: int, module: str):
+        if not level:
+            if self.root and (module == self.root or module.startswith(self.root + ".")):
+                return module[len(self.root) + 1 :]
+            return module
+        # a package imports relatively to itself, a module to its package
+        package = [p for p in module_name(file).split(".") if p]
+        if not file.endswith("__init__.py"):
+            package.pop()
+        if level - 1 > len(package):
+            return None
+        return _join(".".join(package[: len(package) - level + 1]), module)
+
+    def _import_chains(self, file: str, imports: list) -> list:
+        # candidates of every imported module, the first existing one is the dependency
+        chains = []
+        for level, module, names in imports:
+            base = self._absolute(file, level, module)
+            if base is None:
+                continue
+            tail = _parents(base) if base else [""]
+            if not names:
+                chains.append(tail)
+            for name in names:
+                chains.append(_parents(_join(base, name)) + tail if name != "*" else tail)
+        return chains
+
+    def add_file(self, file: str):
+        name = module_name(file)
+        if self._modules.get(name) == file:
+            return
+        self._modules[name] = file
+        self._out.setdefault(file, set())
+        for other in list(self._naming[name]):
+            self._resolve(other)
+
+    def set_imports(self, file: str, imports: list):
+        self.add_file(file)
+        for name in {n for chain in self._chains.get(file, []) for n in chain}:
+            self._naming[name].discard(file)
+        self._chains[file] = self._import_chains(file, imports)
+        for name in {n for chain in self._chains[file] for n in chain}:
+            self._naming[name].add(file)
+        self._resolve(file)
+
+    def remove_file(self, file: str):
+        self.set_imports(file, [])
+        del self._chains[file]
+        del self._out[file]
+        name = module_name(file)
+        if self._modules.get(name) == file:
+            del self._modules[name]
+        for other in list(self._in.pop(file, ())):
+            self._resolve(other)
+
+    def _resolve(self, file: str):
+        imported = set()
+        for chain in self._chains.get(file, []):
+            found = next((self._modules[n] for n in chain if n in self._modules), None)
+            if found is not None and found != file:
+                imported.add(found)
+        for old in self._out[file] - imported:
+            self._in[old].discard(file)
+        for new in imported - self._out[file]:
+            self._in[new].add(file)
+        self._out[file] = imported
+        self._cycles = None
+
+    def imports(self, file: str) -> list:
+        return sorted(self._out.get(file, ()))
+
+    def fan_out(self, file: str) -> int:
+        return len(self._out.get(file, ()))
+
+    def fan_in(self, file: str) -> int:
+        return len(self._in.get(file, ()))
+
+    def cycles(self) -> list:
+        # strongly connected components of more than one file, by iterative Tarjan's algorithm
+        if self._cycles is not None:
+            return self._cycles
+        index, low, on_stack, stack, cycles = dict(), dict(), set(), [], []
+        for start in sorted(self._out):
+            if start in index:
+                continue
+            work = [(start, iter(sorted(self._out[start])))]
+            index[start] = low[start] = len(index)
+            stack.append(start)
+            on_stack.add(start)
+            while work:
+                node, children = work[-1]
+                child = next(children, None)
+                if child is None:
+                    work.pop()
+                    if work:
+                        low[work[-1][0]] = min(low[work[-1][0]], low[node])
+                    if low[node] == index[node]:
+                        component = []
+                        while not component or component[-1] != node:
+                            component.append(stack.pop())
+                            on_stack.discard(component[-1])
+                        if len(component) > 1:
+                            cycles.append(sorted(component))
+                elif child not in index:
+                    index[child] = low[child] = len(index)
+                    stack.append(child)
+                    on_stack.add(child)
+                    work.append((child, iter(sorted(self._out[child]))))
+                elif child in on_stack:
+                    low[node] = min(low[node], index[child])
+        self._cycles = sorted(cycles, key=len, reverse=True)
+        return self._cycles
+
+    def to_dict(self) -> dict:
+        files = {
+            f: {"imports": self.imports(f), "fan_in": self.fan_in(f), "fan_out": self.fan_out(f)}
+            for f in sorted(self._out)
+        }
+        return {"files": files, "cycles": self.cycles()}
+
+
+def file_imports(path: str, file: str) -> list:
+    with open(os.path.join(path, file), "rb") as f:
+        return parse_imports(f.read())
+
+
+def find_imports(project_path: str, exclude: list) -> ImportGraph:
+    files = list(duplicates.source_files(project_path, exclude))
+    graph = ImportGraph(files, root_package(project_path))
+    for file in files:
+        graph.set_imports(file, file_imports(project_path, file))
+    return graph
+
+
+def project_modules(project_path: str, exclude: list) -> ImportGraph:
+    # the modules of the project without imports, the files of batches add their imports to it
+    return ImportGraph(duplicates.source_files(project_path, exclude), root_package(project_path))
+
+
+def files_coupling(project_path: str, files: list, exclude: list, graph: ImportGraph = None) -> dict:
+    # fan-out of some files, it depends only on their imports and on the modules of the project,
+    # so one graph of the modules is shared by all the batches of a run
+    if graph is None:
+        graph = project_modules(project_path, exclude)
+    for file in files:
+        graph.set_imports(file, file_imports(project_path, file))
+    return {file: graph.fan_out(file) for file in files}
@@ -0,0 +1,72 @@
+import json
+import mmap
+
+# Decoders of json bytes, the fastest installed one is used by default:
+# orjson and simdjson parse bytes directly, stdlib json is the fallback.
+AUTO = "auto"
+
+
+def _orjson_loads():
+    import orjson
+
+    return orjson.loads
+
+
+def _simdjson_loads():
+    import simdjson
+
+    parser = simdjson.Parser()
+
+    def loads(data):
+        # the parser reuses its buffers, so the document is converted to python objects at once
+        return parser.parse(data).as_dict()
+
+    return loads
+
+
+def _json_loads():
+    def loads(data):
+        return json.loads(bytes(data))
+
+    return loads
+
+
+backends = {"orjson": _orjson_loads, "simdjson": _simdjson_loads, "json": _json_loads}
+
+_loads = None
+
+
+def available() -> list:
+    names = []
+    for name, make in backends.items():
+        try:
+            make()
+        except ImportError:
+            continue
+        names.append(name)
+    return names
+
+
+def set_backend(name: str = AUTO):
+    global _loads
+    if name != AUTO:
+        _loads = backends[name]()
+        return
+    _loads = backends[available()[0]]()
+
+
+def loads(data):
+    if _loads is None:
+        set_backend()
+    return _loads(data)
+
+
+def load_file(file: str):
+    with open(file, "rb") as f:
+        try:
+            data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:  # empty files can't be mapped
+            return loads(f.read())
+        with data:
+            with memoryview(data) as view:
+                return loads(view)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+import argparse
+import json
+import os.path
+import random
+import time
+
+import json_backend
+
+
+def setup_arguments():
+    parser = argparse.ArgumentParser(
+        description="Compare json decoders on a generated flake8-like results file"
+    )
+    parser.add_argument("-s", "--size", type=int, default=100, help="Size of the generated file in MB")
+    parser.add_argument(
+        "-r", "--repeat", type=int, default=3, help="Number of loads per decoder, the best is shown"
+    )
+    parser.add_argument(
+        "-o", "--output-folder", required=False, help='Folder to write "json_benchmark.json", default "./"'
+    )
+    return parser.parse_args()
+
+
+def flake8_entries(filename: str, count: int, rng: random.Random):
+    for _ in range(count):
+        complexity = rng.randint(1, 60)
+        yield {
+            "code": "CCR001",
+            "filename": filename,
+            "line_number": rng.randint(1, 2000),
+            "column_number": 1,
+            "text": f"Cognitive complexity is too high ({complexity} > 7)",
+            "physical_line": f"def function_{complexity}(argument, *args, **kwargs):\n",
+        }
+
+
+def generate(file: str, size: int, seed=0):
+    rng = random.Random(seed)
+    with open(file, "w") as f:
+        f.write("{")
+        index = 0
+        while f.tell() < size:
+            filename = f"./package_{index // 100}/module_{index}.py"
+            entries = list(flake8_entries(filename, rng.randint(0, 40), rng))
+            f.write(("," if index else "") + json.dumps(filename) + ": " + json.dumps(entries, indent=2))
+            index += 1
+        f.write("}")
+
+
+def best_time(load: callable, repeat: int):
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        data = load()
+        times.append(time.perf_counter() - start)
+        del data
+    return min(times)
+
+
+def read_dict_text(file: str):
+    with open(file, "r") as f:
+        return json.loads(f.read())
+
+
+def load_with(backend: str, file: str):
+    json_backend.set_backend(backend)
+    return json_backend.load_file(file)
+
+
+if __name__ == "__main__":
+    args = setup_arguments()
+    folder = os.path.abspath(args.output_folder) if args.output_folder else os.path.abspath(os.getcwd())
+    file = os.path.join(folder, "json_benchmark.json")
+    generate(file, args.size * 1024 * 1024)
+    size_mb = os.path.getsize(file) / 1024 / 1024
+    expected = read_dict_text(file)
+    baseline = best_time(lambda: read_dict_text(file), args.repeat)
+    print(f"{size_mb:.1f} MB, {len(expected)} files")
+    print(f"{'decoder':<24}{'seconds':>10}{'MB/s':>10}{'speedup':>10}")
+    print(f"{'json.loads(f.read())':<24}{baseline:>10.3f}{size_mb / baseline:>10.1f}{1.0:>10.2f}")
+    for backend in json_backend.available():
+        assert load_with(backend, file) == expected, backend
+        seconds = best_time(lambda: load_with(backend, file), args.repeat)
+        print(
+            f"{backend + ' (mmap)':<24}{seconds:>10.3f}{size_mb / seconds:>10.1f}{baseline / seconds:>10.2f}"
+        )
+    os.remove(file)
@@ -1,16 +1,61 @@
 #!/usr/bin/env python
 import argparse
+import atexit
+import csv
+import datetime
+import functools
+import importlib.metadata
+import math
 import os.path
 import subprocess
 import sys
+import tempfile
+import time
 
 import json
+import json_backend
+import duplicates
+import stream_json
 import results_parser as rp
 import mi_preview as mi_p
+import calculate_mi as cm
+import churn
+import git_history
+import import_graph
+import mi_tree
+import sampling
+import source_metrics
+import shared_cache as sc
+import results_store
+import run_stats
+import entities
+import function_records
+import html_report
+import top_k
+
+# separates tools given in one invocation, their results are fetched in one deduplicated run
+TOOLS_SEPARATOR = "+"
+
+
+def split_tools(argv: list) -> list:
+    chunks = [[]]
+    for arg in argv:
+        if arg == TOOLS_SEPARATOR:
+            chunks.append([])
+        else:
+            chunks[-1].append(arg)
+    return chunks
 
 
-def setup_arguments():
-    parser = argparse.ArgumentParser()
+def sample_fraction(text: str) -> float:
+    value = float(text)
+    if not 0 < value <= 1:
+        raise argparse.ArgumentTypeError(f"{text} is not in (0, 1]")
+    return value
+
+
+def global_parser(**kwargs) -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(**kwargs)
     parser.add_argument("path", help="Path to the source root of analyzed project")
     parser.add_argument(
         "-p",
@@ -44,6 +89,71 @@ def setup_arguments():
         help="Exclude files with path pattern from analysis",
         default=[],
     )
+    parser.add_argument(
+        "-k",
+        "--top",
+        type=int,
+        required=False,
+        help="If given, print tables of K worst entities instead of charts, with '--html' report K worst",
+    )
+    parser.add_argument(
+        "--html",
+        action="store_true",
+        help='If given, write all charts data to the "output_folder/report.html" instead of charts',
+    )
+    parser.add_argument(
+        "--shared-cache",
+        required=False,
+        help="Folder of results cache by file content, tool version and options, shared between projects",
+    )
+    parser.add_argument(
+        "--shared-cache-size",
+        type=int,
+        default=sc.DEFAULT_SIZE_MB,
+        help="Maximum size of the shared cache in MB, the least recently used results are evicted",
+    )
+    parser.add_argument(
+        "--json-backend",
+        choices=[json_backend.AUTO, *json_backend.backends],
+        default=json_backend.AUTO,
+        help="Decoder of json results files, by default the fastest installed of orjson, simdjson and json",
+    )
+    parser.add_argument(
+        "--max-memory",
+        type=int,
+        help="For 'final' and 'mi_score', analyze files in batches fitting MB and spill files scores to disk",
+    )
+    parser.add_argument(
+        "--stats-file",
+        help='File to write the run counters and durations to, default "output_folder/run_stats.json"',
+    )
+    parser.add_argument(
+        "--stats-format",
+        choices=["json", "prometheus"],
+        default="json",
+        help="Format of the stats file, json or prometheus textfile",
+    )
+    parser.add_argument(
+        "--pipe",
+        action="store_true",
+        help="If given, parse tools output while they run, without saving results to the output folder",
+    )
+    return parser
+
+
+def global_arguments(argv: list) -> list:
+    # the arguments before the tool name, as argparse splits them, given again to the next tools
+    parser = global_parser(add_help=False)
+    parser.add_argument("tool")
+    parser.add_argument("tool_args", nargs=argparse.REMAINDER)
+    return argv[: len(argv) - len(parser.parse_args(argv).tool_args) - 1]
+
+
+def setup_arguments():
+    parser = global_parser(
+        epilog=f'Several tools can be given separated by "{TOOLS_SEPARATOR}", '
+        + 'e.g. "path radon -c cc hal + final"'
+    )
     subparsers = parser.add_subparsers(dest="tool", required=True, help="tool to inspect")
     radon_name = "radon"
     radon_parser = subparsers.add_parser(radon_name)
@@ -67,14 +177,76 @@ def setup_arguments():
 
     final_name = "final"
     final_parser = subparsers.add_parser(final_name)
-    final_commands = {"mi", "loc", "cc", "cog", "coh", "doc"}
-    final_parser.add_argument("--commands", "-c", choices=final_commands, nargs="+", default=final_commands)
+    final_commands = {"mi", "loc", "cc", "cog", "coh", "doc", "dup", "imp", "tree"}
+    final_parser.add_argument("--commands", "-c", choices=final_commands, nargs="+")
+    final_parser.add_argument(
+        "--worst", "-w", type=int, default=10, help="Number of the worst directories to show for 'tree'"
+    )
 
     score_name = "mi_score"
     mi_score_parser = subparsers.add_parser(score_name)
     mi_score_parser.add_argument("threshold", type=float, help="Minimum allowed mi_score to fail under")
+    mi_score_parser.add_argument(
+        "--fail-fast",
+        action="store_true",
+        help="Analyze files in batches and exit as soon as the score bounds decide the threshold check",
+    )
+    mi_score_parser.add_argument(
+        "--batch-size",
+        "-b",
+        type=int,
+        default=20,
+        help="Number of files analyzed per batch for '--fail-fast', '--sample' and '--time-budget'",
+    )
+    mi_score_parser.add_argument(
+        "--sample",
+        type=sample_fraction,
+        help="Estimate the score from a stratified random FRACTION of files, by directory and size",
+    )
+    mi_score_parser.add_argument(
+        "--time-budget",
+        type=float,
+        help="Estimate the score from a stratified random sample of files analyzed in SECONDS",
+    )
+    mi_score_parser.add_argument(
+        "--seed", type=int, default=0, help="Random seed for '--sample' and '--time-budget'"
+    )
+    mi_score_parser.add_argument(
+        "--staged",
+        action="store_true",
+        help="Score the staged versions of files from the git index, reuse metrics of unchanged files",
+    )
 
-    p_args = parser.parse_args()
+    history_name = "history"
+    history_parser = subparsers.add_parser(history_name)
+    history_parser.add_argument("--rev", default="HEAD", help="Last commit of the history, default HEAD")
+    history_parser.add_argument("--since", help="Only commits more recent than a date, e.g. '2 years ago'")
+    history_parser.add_argument("--max-count", type=int, help="Maximum number of commits")
+    history_parser.add_argument(
+        "--batch-size", "-b", type=int, default=50, help="Number of new files versions analyzed per batch"
+    )
+
+    hotspots_name = "hotspots"
+    hotspots_parser = subparsers.add_parser(hotspots_name)
+    hotspots_parser.add_argument(
+        "--rev", default="HEAD", help="Last commit of the scanned history, default HEAD"
+    )
+
+    functions_name = "functions"
+    subparsers.add_parser(functions_name)
+
+    serve_name = "serve"
+    serve_parser = subparsers.add_parser(serve_name)
+    serve_parser.add_argument("--host", default="127.0.0.1", help="Address to listen on, default 127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8765, help="Port to listen on, default 8765")
+
+    chunks = split_tools(sys.argv[1:])
+    p_args = parser.parse_args(chunks[0])
+    if p_args.pipe and p_args.use_cache:
+        parser.error("argument --pipe: not allowed with argument -c/--use-cache, piped results aren't saved")
+    # the next tools get the global options of the first one
+    global_args = global_arguments(chunks[0])
+    tools = [p_args] + [parser.parse_args(global_args + chunk) for chunk in chunks[1:]]
 
     current_path = os.path.abspath(os.getcwd())
     p_args.output_folder = os.path.abspath(p_args.output_folder) if p_args.output_folder else current_path
@@ -83,38 +255,193 @@ def setup_arguments():
     if not os.path.exists(p_args.output_folder):
         os.makedirs(p_args.output_folder)
 
-    if hasattr(p_args, "commands"):
-        p_args.commands = sorted(set(p_args.commands))
+    for tool_args in tools:
+        if tool_args.tool == "final" and tool_args.max_memory and set(tool_args.commands or ["mi"]) != {"mi"}:
+            parser.error("argument --max-memory: 'final' shows only the 'mi' table, not other --commands")
+        if tool_args.tool == "final" and tool_args.commands is None:
+            tool_args.commands = final_commands
+        tool_args.output_folder = p_args.output_folder
+        if hasattr(tool_args, "commands"):
+            tool_args.commands = sorted(set(tool_args.commands))
+        else:
+            tool_args.commands = []
+
+    json_backend.set_backend(p_args.json_backend)
+
+    if p_args.shared_cache:
+        global shared_cache
+        shared_cache = sc.SharedCache(p_args.shared_cache, p_args.shared_cache_size * 1024 * 1024)
+        # mi_score exits with its status, so the cache is trimmed on exit
+        atexit.register(close_shared_cache)
+
+    title = f"Metrics of {os.path.abspath(p_args.path)}"
+    p_args.report = html_report.Report(title, p_args.top) if p_args.html else None
+    if p_args.report:
+        p_args.entities_sink = p_args.report.add
+    elif p_args.top:
+        p_args.entities_sink = lambda e: print(top_k.render_top(e, p_args.top))
     else:
-        p_args.commands = []
-
+        p_args.entities_sink = None
+    for tool_args in tools:
+        tool_args.report, tool_args.entities_sink = p_args.report, p_args.entities_sink
+
+    p_args.tools = tools
+    if not p_args.stats_file:
+        p_args.stats_file = run_stats_file_path(p_args.output_folder)
+    # mi_score exits with its status, so the stats are saved on exit
+    atexit.register(save_run_stats, p_args)
     return p_args
 
 
+def run_stats_file_path(output_folder):
+    return os.path.join(output_folder, "run_stats.json")
+
+
+def count_project_files(path: str, exclude: list, whole_project: bool):
+    # python files left out by the exclude patterns, and when the tools ran on the whole project, the rest
+    analyzed = list(duplicates.source_files(path, exclude))
+    every = [os.path.join(r, f) for r, _, files in os.walk(path) for f in files if f.endswith(".py")]
+    run_stats.count("files_excluded", len(every) - len(analyzed))
+    if whole_project:
+        run_stats.count("files_total", len(analyzed))
+        run_stats.count("files_analyzed", len(analyzed))
+        run_stats.count("source_bytes", sum(os.path.getsize(os.path.join(path, f)) for f in analyzed))
+
+
+def save_run_stats(args):
+    backends_ran = any(phase == "backend" for phase, _ in run_stats.durations)
+    whole_project = backends_ran and not run_stats.counters["files_analyzed"]
+    if backends_ran or run_stats.counters["files_total"]:
+        count_project_files(args.path, args.exclude, whole_project)
+    if shared_cache is not None:
+        run_stats.count("cache_hits", shared_cache.hits)
+        run_stats.count("cache_misses", shared_cache.misses)
+    labels = dict(tool=" + ".join(t.tool for t in args.tools), path=os.path.abspath(args.path))
+    run_stats.save(args.stats_file, labels, args.stats_format == "prometheus")
+
+
+# results parsed from the tools output pipes, by the path of the file they would be saved to
+piped_results = dict()
+
+
+@run_stats.timed("parse", "results files")
 def read_dict(file: str):
-    with open(file, "r") as f:
-        return json.loads(f.read())
+    if file in piped_results:
+        return piped_results[file]
+    run_stats.count("results_bytes_read", os.path.getsize(file))
+    return json_backend.load_file(file)
 
 
+@run_stats.timed("parse", "results files")
 def read_text(file: str):
+    if file in piped_results:
+        return piped_results[file]
+    run_stats.count("results_bytes_read", os.path.getsize(file))
     with open(file, "r") as f:
         return f.read()
 
 
+def stored_results(file: str, read: callable):
+    # piped results are in memory already, saved results are parsed for the charts once per change
+    return read(file) if file in piped_results else results_store.StoredResults(file, read)
+
+
+def read_pipe_dict(popen_args: list, **kwargs) -> dict:
+    with subprocess.Popen(popen_args, stdout=subprocess.PIPE, text=True, **kwargs) as process:
+        try:
+            data = dict(stream_json.iter_object_items(stream_json.read_chunks(process.stdout)))
+        except json.JSONDecodeError:
+            # a failed tool may print no or partial json, its exit status is reported instead
+            if process.wait() == 0:
+                raise
+    if process.returncode != 0:
+        raise subprocess.CalledProcessError(process.returncode, popen_args)
+    return data
+
+
+def pipe_dict(popen_args: list, out: str, **kwargs):
+    piped_results[out] = read_pipe_dict(popen_args, **kwargs)
+
+
+def save_results(out: str, data, pipe: bool):
+    if pipe:
+        piped_results[out] = data
+        return
+    with open(out, "w") as f:
+        if isinstance(data, str):
+            f.write(data)
+        else:
+            json.dump(data, f, indent=2)
+
+
+# content-addressed cache of per file results shared between projects and runs, set by "--shared-cache"
+shared_cache = None
+# bytes of file names on a command line, under the limit of any system
+ARGV_MAX_BYTES = 30000
+
+
+def close_shared_cache():
+    evicted = shared_cache.evict()
+    print(f"shared cache: {shared_cache.hits} hits, {shared_cache.misses} misses, {evicted} evicted")
+
+
+@functools.lru_cache
+def tool_version(*args) -> str:
+    return subprocess.run(args, capture_output=True, text=True).stdout.strip()
+
+
+def read_pipe_dict_chunks(args: list, files: list, end_args: list, **kwargs) -> dict:
+    # the tool runs on chunks of the files, so a command line never gets over the system limit (E2BIG)
+    data, chunk, size = dict(), [], 0
+    for f in files + [None]:
+        if chunk and (f is None or size + len(os.fsencode(f)) + 1 > ARGV_MAX_BYTES):
+            data.update(read_pipe_dict(args + chunk + end_args, **kwargs))
+            chunk, size = [], 0
+        if f is not None:
+            chunk.append(f)
+            size += len(os.fsencode(f)) + 1
+    return data
+
+
+def get_cached_results(tool_id: list, path: str, exclude: list, files, analyze: callable):
+    files = files or list(duplicates.source_files(path, exclude))
+    return shared_cache.cached(tool_id, path, files, analyze)
+
+
 def radon_out_file(command: str, output_folder: str):
     return os.path.join(output_folder, f"radon_{command}_results.json")
 
 
-def get_radon_results(commands: list, project_path: str, output_folder: str, exclude: list):
+@run_stats.timed("backend", "radon")
+def get_radon_results(
+    commands: list, project_path: str, output_folder: str, exclude: list, pipe=False, files=None
+):
     i_f_args = ["-e", ",".join(exclude)] if exclude else []
+    targets = files or ["./"]
     # print(i_f_args)
     for command in commands:
         result_file = radon_out_file(command, output_folder)
+        if shared_cache is not None:
+            data = get_cached_results(
+                ["radon", command, tool_version("radon", "--version")],
+                project_path,
+                exclude,
+                files,
+                lambda missed: read_pipe_dict_chunks(
+                    ["radon", command], missed, ["-j"], cwd=project_path, stderr=sys.stderr
+                ),
+            )
+            save_results(result_file, data, pipe)
+            continue
+        if pipe:
+            radon_args = ["radon", command] + i_f_args + targets + ["-j"]
+            pipe_dict(radon_args, result_file, cwd=project_path, stderr=sys.stderr)
+            continue
         subprocess.Popen(
             ["radon", command]
             + i_f_args
+            + targets
             + [
-                "./",
                 "-j",
                 "--output-file",
                 result_file,
@@ -126,7 +453,10 @@ def get_radon_results(commands: list, project_path: str, output_folder: str, exc
     print("radon results done")
 
 
-def parse_radon_results(commands, output_folder, save, raw_distinct=None, cc_charts=["func", "class"]):
+@run_stats.timed("render", "radon")
+def parse_radon_results(
+    commands, output_folder, save, raw_distinct=None, cc_charts=["func", "class"], entities_sink=None
+):
     radon_raw_parser = rp.radon_raw_parser
     if raw_distinct is not None:
         if raw_distinct:
@@ -150,7 +480,11 @@ def parse_radon_results(commands, output_folder, save, raw_distinct=None, cc_cha
     for command in commands:
         parser = radon_parsers[command]
         result_file = radon_out_file(command, output_folder)
-        data = read_dict(result_file)
+        if entities_sink:
+            entities_sink(entities.radon_entities[command](read_dict(result_file)))
+            continue
+        # the hal and mi charts read the results directly
+        data = stored_results(result_file, read_dict) if command in ("cc", "raw") else read_dict(result_file)
         parser(
             data,
             save_output=output_folder if save else None,
@@ -161,8 +495,13 @@ def parse_radon_results(commands, output_folder, save, raw_distinct=None, cc_cha
 def get_and_parse_radon_results(args):
     radon_commands = args.commands
     if not args.use_cache:
-        get_radon_results(radon_commands, args.path, args.output_folder, args.exclude)
-    parse_radon_results(commands=radon_commands, save=args.save, output_folder=args.output_folder)
+        get_radon_results(radon_commands, args.path, args.output_folder, args.exclude, args.pipe)
+    parse_radon_results(
+        commands=radon_commands,
+        save=args.save,
+        output_folder=args.output_folder,
+        entities_sink=args.entities_sink,
+    )
 
 
 def get_and_parse_multimetric_results(args):
@@ -170,6 +509,7 @@ def get_and_parse_multimetric_results(args):
         get_multimetric_results(args.path, args.output_folder)
 
 
+@run_stats.timed("backend", "multimetric")
 def get_multimetric_results(path: str, output_folder: str):
     source_files = []
     for root, dirs, files in os.walk(path):
@@ -180,6 +520,7 @@ def get_multimetric_results(path: str, output_folder: str):
         subprocess.Popen(["multimetric", *source_files], stdout=out, stderr=err).communicate()
 
 
+@run_stats.timed("render", "multimetric")
 def parse_multimetric_results(args):
     mm_parsers = {
         "raw": rp.mm_raw_parser,
@@ -203,24 +544,31 @@ def flake8_out_file(output_folder):
 def get_and_parse_flake8_results(args):
     out = flake8_out_file(args.output_folder)
     if not args.use_cache:
-        get_flake8_results(args.commands, args.path, out, args.exclude)
-    parse_flake8_results(args.commands, args.output_folder, args.save)
+        get_flake8_results(args.commands, args.path, out, args.exclude, args.pipe)
+    parse_flake8_results(args.commands, args.output_folder, args.save, args.entities_sink)
 
 
-def parse_flake8_results(commands, output_folder, save):
+@run_stats.timed("render", "flake8")
+def parse_flake8_results(commands, output_folder, save, entities_sink=None):
     flake8_parsers = {
         "radon": rp.flake8_radon_preview,
         "mccabe": rp.flake8_mccabe_preview,
         "cognitive": rp.flake8_cognitive_preview,
         "cohesion": rp.flake8_cohesion_preview,
     }
-    data = read_dict(flake8_out_file(output_folder))
+    if entities_sink:
+        data = read_dict(flake8_out_file(output_folder))
+        for command in commands:
+            entities_sink(entities.flake8_entities[command](data))
+        return
+    data = stored_results(flake8_out_file(output_folder), read_dict)
     for command in commands:
         flake8_parsers[command](data, save_output=output_folder if save else None)
         print(f"flake8 {command} charts done")
 
 
-def get_flake8_results(commands, path: str, out: str, exclude: list):
+@run_stats.timed("backend", "flake8")
+def get_flake8_results(commands, path: str, out: str, exclude: list, pipe=False, files=None):
     codes = {"radon": "R701", "mccabe": "C901", "cognitive": "CCR001", "cohesion": "H601"}
     arguments = {
         "radon": ["--radon-max-cc", "0"],
@@ -229,18 +577,34 @@ def get_flake8_results(commands, path: str, out: str, exclude: list):
         "cohesion": ["--cohesion-below=100"],
     }
     i_f_args = ["--exclude=" + ",".join(exclude)] if exclude else []
-    with open(out, "w") as f:
-        args = (
-            ["flake8"]
-            + i_f_args
-            + [
-                "--format",
-                "json-pretty",
-                "--select=" + ",".join([codes[c] for c in commands]),
-                *[a for c in commands for a in arguments[c]],
-                ".",
-            ]
+    options = [
+        "--format",
+        "json-pretty",
+        "--select=" + ",".join([codes[c] for c in commands]),
+        *[a for c in commands for a in arguments[c]],
+    ]
+    # flake8 exits with 1 when it reports anything
+    args = ["flake8", "--exit-zero"] + i_f_args + options + (files or ["."])
+    if shared_cache is not None:
+        data = get_cached_results(
+            ["flake8", tool_version("flake8", "--version"), options],
+            path,
+            exclude,
+            files,
+            lambda missed: read_pipe_dict_chunks(
+                ["flake8", "--exit-zero"] + options, missed, [], cwd=path, stderr=sys.stderr
+            ),
         )
+        # cached entries may come from a file with the same content in another place
+        data = {f: [dict(e, filename=f) for e in es] for f, es in data.items()}
+        save_results(out, data, pipe)
+        print("flake8 results done")
+        return
+    if pipe:
+        pipe_dict(args, out, cwd=path, stderr=sys.stderr)
+        print("flake8 results done")
+        return
+    with open(out, "w") as f:
         # print(args)
         subprocess.Popen(
             args,
@@ -251,18 +615,63 @@ def get_flake8_results(commands, path: str, out: str, exclude: list):
         print("flake8 results done")
 
 
-def get_docstr_results(project_path: str, out: str, exclude: list):
-    exclude = [v.replace("*", ".*") for v in exclude]
-    i_f_args = ["--exclude=" + ",".join(exclude)] if exclude else []
-    with open(out, "w") as out:
-        subprocess.Popen(
-            ["docstr-coverage"] + i_f_args + [project_path, "-v", "2"], stdout=out, stderr=out
-        ).communicate()
+@run_stats.timed("backend", "docstr-coverage")
+def get_docstr_results(project_path: str, output_folder: str, exclude: list, pipe=False, files=None):
+    # counts of every file come from the docstr-coverage api, its "-v 2" text leaves out fully documented
+    # files, and the text for the charts is made from the counts
+    files = files or list(duplicates.source_files(project_path, exclude))
+    if shared_cache is not None:
+        counts = get_cached_results(
+            ["docstr-coverage", importlib.metadata.version("docstr-coverage")],
+            project_path,
+            exclude,
+            files,
+            lambda missed: docstr_file_counts(project_path, missed),
+        )
+    else:
+        counts = docstr_file_counts(project_path, files)
+    save_results(docstr_counts_file_path(output_folder), counts, pipe)
+    save_results(docstr_file_path(output_folder), docstr_text(project_path, counts), pipe)
     print("docstr-coverage results done")
 
 
-def parse_docstr_results(path, save, output_folder):
-    text = read_text(docstr_file_path(output_folder))
+def docstr_file_counts(project_path: str, files: list) -> dict:
+    from docstr_coverage import analyze
+
+    results = analyze([os.path.join(project_path, f) for f in files], show_progress=False)
+    counts = dict()
+    for file, result in results.files():
+        count = result.count_aggregate()
+        counts[os.path.relpath(file, project_path)] = [count.needed, count.found]
+    return counts
+
+
+def docstr_text(project_path: str, counts: dict) -> str:
+    # the same text as "docstr-coverage -v 2" prints for the files counts
+    def percent(needed, found):
+        return 100.0 * found / needed if needed else 100.0
+
+    lines = [
+        f'\nFile: "{os.path.join(os.path.abspath(project_path), f)}"\n'
+        + f" Needed: {n}; Found: {c}; Missing: {n - c}; Coverage: {percent(n, c):.1f}%\n\n"
+        for f, (n, c) in counts.items()
+        if n > c
+    ]
+    needed = sum(n for n, _ in counts.values())
+    found = sum(c for _, c in counts.values())
+    lines.append(f"Overall statistics for {len(counts)} files:")
+    lines.append(f"Needed: {needed}  -  Found: {found}  -  Missing: {needed - found}")
+    lines.append(f"Total coverage: {percent(needed, found):.1f}%")
+    return "\n".join(lines) + "\n"
+
+
+@run_stats.timed("render", "docstr-coverage")
+def parse_docstr_results(path, save, output_folder, entities_sink=None):
+    if entities_sink:
+        text = read_text(docstr_file_path(output_folder))
+        entities_sink(entities.docstr_entities(text, os.path.abspath(path)))
+        return
+    text = stored_results(docstr_file_path(output_folder), read_text)
     rp.docstr_preview(text, path=os.path.abspath(path), save_output=output_folder if save else None)
     print("docstring charts done")
 
@@ -271,16 +680,70 @@ def docstr_file_path(output_folder):
     return os.path.join(output_folder, "docstr_results.txt")
 
 
+def docstr_counts_file_path(output_folder):
+    return os.path.join(output_folder, "docstr_counts.json")
+
+
 def get_and_parse_docstr_results(args):
-    out = docstr_file_path(args.output_folder)
     if not args.use_cache:
-        get_docstr_results(args.path, out, args.exclude)
-    parse_docstr_results(args.path, args.save, args.output_folder)
+        get_docstr_results(args.path, args.output_folder, args.exclude, args.pipe)
+    parse_docstr_results(args.path, args.save, args.output_folder, args.entities_sink)
+
+
+def duplicates_file_path(output_folder):
+    return os.path.join(output_folder, "duplicates.json")
+
+
+@run_stats.timed("backend", "duplicates")
+def get_duplicates_results(project_path: str, out: str, exclude: list, pipe=False):
+    if pipe:
+        piped_results[out] = duplicates.find_duplicates(project_path, exclude)
+    else:
+        with open(out, "w") as f:
+            json.dump(duplicates.find_duplicates(project_path, exclude), f, indent=2)
+    print("duplicates results done")
+
+
+def imports_file_path(output_folder):
+    return os.path.join(output_folder, "imports.json")
+
+
+@run_stats.timed("backend", "imports")
+def get_imports_results(project_path: str, out: str, exclude: list, pipe=False):
+    data = import_graph.find_imports(project_path, exclude).to_dict()
+    if pipe:
+        piped_results[out] = data
+    else:
+        with open(out, "w") as f:
+            json.dump(data, f, indent=2)
+    print("imports results done")
+
+
+@run_stats.timed("render", "imports")
+def parse_imports_results(output_folder, entities_sink=None):
+    data = read_dict(imports_file_path(output_folder))
+    if entities_sink:
+        entities_sink(entities.imports_entities(data))
+        return
+    print(top_k.render_top(entities.imports_entities(data), 20))
+    for cycle in data["cycles"]:
+        print(f"import cycle of {len(cycle)} files: {' -> '.join(cycle)}")
+
+
+@run_stats.timed("render", "duplicates")
+def parse_duplicates_results(output_folder, save, entities_sink=None):
+    data = read_dict(duplicates_file_path(output_folder))
+    if entities_sink:
+        entities_sink(entities.duplicates_entities(data))
+        return
+    rp.duplicates_preview(data, save_output=output_folder if save else None)
+    print("duplicates charts done")
 
 
 flake8_final_commands = {"cog": "cognitive", "coh": "cohesion"}
 radon_final_commands = {"loc": "raw", "cc": "cc"}
 docstr_final_commands = {"doc": ""}
+source_final_commands = {"dup": "duplicates", "imp": "imports"}
 
 
 def choose_commands(specific: dict, commands: list):
@@ -292,6 +755,7 @@ def parse_final_results(args):
     radon_commands = choose_commands(radon_final_commands, commands)
     flake8_commands = choose_commands(flake8_final_commands, commands)
     docstr_commands = choose_commands(docstr_final_commands, commands)
+    source_commands = choose_commands(source_final_commands, commands)
 
     if len(radon_commands) != 0:
         args.commands = radon_commands
@@ -301,72 +765,602 @@ def parse_final_results(args):
             save=args.save,
             raw_distinct=False,
             cc_charts=["func"],
+            entities_sink=args.entities_sink,
         )
     if len(flake8_commands) != 0:
         args.commands = flake8_commands
-        parse_flake8_results(commands=flake8_commands, output_folder=args.output_folder, save=args.save)
+        parse_flake8_results(
+            commands=flake8_commands,
+            output_folder=args.output_folder,
+            save=args.save,
+            entities_sink=args.entities_sink,
+        )
     if len(docstr_commands) != 0:
         args.commands = []
-        parse_docstr_results(path=args.path, save=args.save, output_folder=args.output_folder)
-
-
-def get_final_results(radon_commands, flake8_commands, docstr_commands, path, output_folder, exclude):
+        parse_docstr_results(
+            path=args.path, save=args.save, output_folder=args.output_folder, entities_sink=args.entities_sink
+        )
+    if "duplicates" in source_commands:
+        args.commands = []
+        parse_duplicates_results(
+            output_folder=args.output_folder, save=args.save, entities_sink=args.entities_sink
+        )
+    if "imports" in source_commands:
+        args.commands = []
+        parse_imports_results(output_folder=args.output_folder, entities_sink=args.entities_sink)
+
+
+def get_final_results(
+    radon_commands,
+    flake8_commands,
+    docstr_commands,
+    source_commands,
+    path,
+    output_folder,
+    exclude,
+    pipe=False,
+    files=None,
+):
     if len(radon_commands) != 0:
-        get_radon_results(radon_commands, path, output_folder, exclude)
+        get_radon_results(radon_commands, path, output_folder, exclude, pipe, files)
     if len(flake8_commands) != 0:
-        get_flake8_results(flake8_commands, path, flake8_out_file(output_folder), exclude)
+        get_flake8_results(flake8_commands, path, flake8_out_file(output_folder), exclude, pipe, files)
     if len(docstr_commands) != 0:
-        get_docstr_results(path, docstr_file_path(output_folder), exclude)
-
+        get_docstr_results(path, output_folder, exclude, pipe, files)
+    if "duplicates" in source_commands:
+        get_duplicates_results(path, duplicates_file_path(output_folder), exclude, pipe)
+    if "imports" in source_commands:
+        get_imports_results(path, imports_file_path(output_folder), exclude, pipe)
+
+
+def mi_tree_file_path(output_folder):
+    return os.path.join(output_folder, "mi_tree.json")
+
+
+def read_final_results(
+    radon_commands, flake8_commands, docstr_commands, source_commands, path, output_folder
+):
+    cc_data = read_dict(radon_out_file("cc", output_folder)) if "cc" in radon_commands else dict()
+    raw_data = read_dict(radon_out_file("raw", output_folder)) if "raw" in radon_commands else dict()
+    flake8_data = read_dict(flake8_out_file(output_folder)) if len(flake8_commands) != 0 else dict()
+    docstrings_data = read_text(docstr_file_path(output_folder)) if len(docstr_commands) != 0 else ""
+    docstrings_counts = read_dict(docstr_counts_file_path(output_folder)) if len(docstr_commands) != 0 else {}
+    duplicates_data = (
+        read_dict(duplicates_file_path(output_folder)) if "duplicates" in source_commands else dict()
+    )
+    imports_data = read_dict(imports_file_path(output_folder)) if "imports" in source_commands else None
+    coupling_data = {f: e["fan_out"] for f, e in imports_data["files"].items()} if imports_data else dict()
+    path = os.path.abspath(path)
+    return (
+        cc_data,
+        raw_data,
+        flake8_data,
+        docstrings_data,
+        path,
+        duplicates_data,
+        coupling_data,
+        docstrings_counts,
+    )
 
-def get_and_parse_final_results_with_mi(args, score_only):
-    commands = args.commands
 
-    ignore_commands = score_only or ("mi" in commands)
-    r_c = (
-        radon_final_commands.values() if ignore_commands else choose_commands(radon_final_commands, commands)
+def mi_columns_folder(output_folder):
+    return os.path.join(output_folder, "mi_columns")
+
+
+def load_mi_raw_data(path: str, output_folder: str, use_cache: bool, exclude: list = None):
+    columns_folder = mi_columns_folder(output_folder)
+    # the columns are reused while the results files and the options they were read with don't change
+    results_files = [
+        radon_out_file("cc", output_folder),
+        radon_out_file("raw", output_folder),
+        flake8_out_file(output_folder),
+        docstr_file_path(output_folder),
+        docstr_counts_file_path(output_folder),
+        duplicates_file_path(output_folder),
+        imports_file_path(output_folder),
+    ]
+    stamp = results_store.files_stamp(
+        results_files, path=os.path.abspath(path), exclude=sorted(exclude or [])
     )
-    f_c = (
-        flake8_final_commands.values()
-        if ignore_commands
-        else choose_commands(flake8_final_commands, commands)
+    columns = results_store.load_columns(columns_folder, stamp) if use_cache else None
+    if columns is not None:
+        return mi_p.MIChartParser.MIRawData.from_columns(columns)
+    data = read_final_results(
+        radon_final_commands.values(),
+        flake8_final_commands.values(),
+        docstr_final_commands.values(),
+        source_final_commands.values(),
+        path,
+        output_folder,
     )
-    d_c = (
-        docstr_final_commands.values()
-        if ignore_commands
-        else choose_commands(docstr_final_commands, commands)
+    raw_data = mi_p.MIChartParser.MIRawData(*data)
+    if not piped_results:
+        results_store.save_columns(columns_folder, raw_data.columns, stamp)
+    return raw_data
+
+
+def get_mi_stats(path: str, output_folder: str, exclude: list, use_cache: bool = False):
+    if not use_cache:
+        get_final_results(
+            radon_final_commands.values(),
+            flake8_final_commands.values(),
+            docstr_final_commands.values(),
+            source_final_commands.values(),
+            path,
+            output_folder,
+            exclude,
+        )
+    return load_mi_raw_data(path, output_folder, use_cache, exclude).mi_s()
+
+
+def count_lines(file: str) -> int:
+    with open(file, "rb") as f:
+        return f.read().count(b"\n") + 1
+
+
+def source_lines(path: str, exclude: list) -> dict:
+    return {f: count_lines(os.path.join(path, f)) for f in duplicates.source_files(path, exclude)}
+
+
+def get_files_raw_data(
+    path: str, files: list, output_folder: str, exclude: list, duplicates_data: dict = None, graph=None
+) -> tuple:
+    run_stats.count("files_analyzed", len(files))
+    run_stats.count("source_bytes", sum(os.path.getsize(os.path.join(path, f)) for f in files))
+    commands = [radon_final_commands.values(), flake8_final_commands.values(), []]
+    get_final_results(*commands, [], path, output_folder, exclude, pipe=True, files=files)
+    cc_data, raw_data, flake8_data, _, path, _, _, _ = read_final_results(*commands, [], path, output_folder)
+    # files radon can't parse are reported with an error instead of results
+    cc_data = {f: es for f, es in cc_data.items() if isinstance(es, list)}
+    raw_data = {f: e for f, e in raw_data.items() if "error" not in e}
+    docstrings = docstr_file_counts(path, files)
+    # the fan-out of a file depends only on its imports and the modules of the project
+    coupling_data = import_graph.files_coupling(path, files, exclude, graph)
+    return results_raw_data(path, cc_data, raw_data, flake8_data, docstrings, duplicates_data, coupling_data)
+
+
+def get_files_counts(path: str, files: list, output_folder: str, exclude: list, graph=None) -> dict:
+    return dict(get_files_raw_data(path, files, output_folder, exclude, graph=graph).files_counts())
+
+
+def results_raw_data(
+    path: str,
+    cc_data: dict,
+    raw_data: dict,
+    flake8_data: dict,
+    docstrings: dict,
+    duplicates_data: dict = None,
+    coupling_data: dict = None,
+):
+    docstr_data = docstr_text(path, docstrings)
+    return mi_p.MIChartParser.MIRawData(
+        cc_data, raw_data, flake8_data, docstr_data, path, duplicates_data, coupling_data, docstrings
     )
 
+
+def results_counts(path: str, cc_data: dict, raw_data: dict, flake8_data: dict, docstrings: dict) -> dict:
+    return dict(results_raw_data(path, cc_data, raw_data, flake8_data, docstrings).files_counts())
+
+
+# peak memory of analyzing and parsing a batch of files is about this multiple of their size
+BATCH_MEMORY_PER_BYTE = 20
+
+
+def memory_batches(path: str, files: list, max_bytes: int):
+    batch, size = [], 0
+    for file in files:
+        file_size = os.path.getsize(os.path.join(path, file)) * BATCH_MEMORY_PER_BYTE
+        if batch and size + file_size > max_bytes:
+            yield batch
+            batch, size = [], 0
+        batch.append(file)
+        size += file_size
+    if batch:
+        yield batch
+
+
+def duplicates_database_path(output_folder):
+    return os.path.join(output_folder, "duplicates.sqlite")
+
+
+def mi_files_file_path(output_folder):
+    return os.path.join(output_folder, "mi_files.csv")
+
+
+def get_mi_stats_bounded(path: str, output_folder: str, exclude: list, max_bytes: int) -> cm.MIStats:
+    # files are analyzed and parsed in batches fitting max_bytes, the scores of files are spilled
+    # to a csv file, and only the counts of the package score are kept in memory;
+    # the duplicates fingerprints are spilled to a database by a first pass over the files
+    path = os.path.abspath(path)
+    index = duplicates.SpilledDuplicatesIndex(duplicates_database_path(output_folder))
+    for file in duplicates.source_files(path, exclude):
+        with open(os.path.join(path, file), "r", errors="replace") as f:
+            index.add(file, f.read())
+    graph = import_graph.project_modules(path, exclude)
+    counts = cm.MICounts()
+    with open(mi_files_file_path(output_folder), "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["file", "mi", "loc", "c", "red", "dep", "cov"])
+        for batch in memory_batches(path, duplicates.source_files(path, exclude), max_bytes):
+            raw = get_files_raw_data(path, batch, output_folder, exclude, index.percentages(batch), graph)
+            counts = sum((file_counts for _, file_counts in raw.files_counts()), counts)
+            writer.writerows([file, *vars(stats).values()] for file, stats in raw.mi_files())
+            f.flush()
+    index.close()
+    return cm.mi_counts_stats(counts)
+
+
+def read_mi_files(output_folder: str) -> list:
+    with open(mi_files_file_path(output_folder), "r", newline="") as f:
+        rows = csv.DictReader(f)
+        return [(row.pop("file"), cm.MIStats(**{k: float(v) for k, v in row.items()})) for row in rows]
+
+
+def get_final_results_bounded(args, score_only):
+    stats = get_mi_stats_bounded(args.path, args.output_folder, args.exclude, args.max_memory * 1024 * 1024)
+    print(stats)
+    if score_only:
+        print(f"Maintainability score: {stats.mi}, threshold: {args.threshold}")
+        sys.exit(stats.mi < args.threshold)
+    # only the scores are computed in batches, the worst files are read back from the spilled records
+    files = entities.mi_entities(read_mi_files(args.output_folder))
+    if args.entities_sink:
+        args.entities_sink(files)
+    else:
+        print(top_k.render_top(files, 20))
+
+
+def get_mi_score_fail_fast(args):
+    # analyze files in batches, the largest first, while the bounds of the score can't decide the threshold
+    path = os.path.abspath(args.path)
+    lines = source_lines(path, args.exclude)
+    files = sorted(lines, key=lambda f: lines[f], reverse=True)
+    remaining_loc = sum(lines.values())
+    run_stats.count("files_total", len(files))
+    graph = import_graph.project_modules(path, args.exclude)
+    counts = cm.MICounts()
+    for start in range(0, len(files), args.batch_size):
+        batch = files[start : start + args.batch_size]
+        counts = sum(get_files_counts(path, batch, args.output_folder, args.exclude, graph).values(), counts)
+        remaining_loc -= sum(lines[f] for f in batch)
+        analyzed = start + len(batch)
+        lower, upper = cm.mi_counts_bounds(counts, remaining_loc, analyzed < len(files), dup_known=False)
+        print(f"analyzed {analyzed} of {len(files)} files, score bounds: [{lower.mi}, {upper.mi}]")
+        if upper.mi < args.threshold or lower.mi >= args.threshold:
+            print(f"Maintainability score bounds: [{lower.mi}, {upper.mi}], threshold: {args.threshold}")
+            sys.exit(upper.mi < args.threshold)
+    counts.dup = cm.duplicate_limits.get_stats(list(duplicates.find_duplicates(path, args.exclude).values()))
+    stats = cm.mi_counts_stats(counts)
+    print(stats)
+    print(f"Maintainability score: {stats.mi}, threshold: {args.threshold}")
+    sys.exit(stats.mi < args.threshold)
+
+
+def get_mi_score_sample(args):
+    # analyze a stratified random sample of files, until the fraction or the time budget is used up
+    start_time = time.monotonic()
+    path = os.path.abspath(args.path)
+    sampler = sampling.Sampler(source_lines(path, args.exclude), args.seed)
+    order = sampler.order()
+    run_stats.count("files_total", len(order))
+    limit = math.ceil(args.sample * len(order)) if args.sample is not None else len(order)
+    graph = import_graph.project_modules(path, args.exclude)
+    counts_by_file = dict()
+    for start in range(0, limit, args.batch_size):
+        batch = order[start : min(start + args.batch_size, limit)]
+        counts_by_file.update(get_files_counts(path, batch, args.output_folder, args.exclude, graph))
+        if args.time_budget and time.monotonic() - start_time >= args.time_budget:
+            break
+    if not counts_by_file:
+        sys.exit(f"no analyzable source files to sample in {path}")
+    # duplicates are searched inside the sample only
+    for f, dup in duplicates.find_duplicates(path, args.exclude, list(counts_by_file)).items():
+        counts_by_file[f].dup = cm.duplicate_limits.get_stats([dup])
+    stats, intervals = sampler.estimate(counts_by_file)
+    elapsed = time.monotonic() - start_time
+    print(f"analyzed {len(counts_by_file)} of {len(order)} files in {elapsed:.1f} s")
+    print(", ".join(f"{k}: {v} [{intervals[k][0]}, {intervals[k][1]}]" for k, v in vars(stats).items()))
+    print(f"Maintainability score estimate: {stats.mi}, threshold: {args.threshold}")
+    sys.exit(stats.mi < args.threshold)
+
+
+def history_blobs_file_path(output_folder):
+    return os.path.join(output_folder, "history_blobs.json")
+
+
+def history_file_path(output_folder):
+    return os.path.join(output_folder, "history.csv")
+
+
+def is_source_path(path: str, exclude: list) -> bool:
+    if not path.endswith(".py") or any(d.startswith(".") for d in path.split("/")[:-1]):
+        return False
+    return not duplicates.is_excluded(path, exclude)
+
+
+def commit_files(objects: git_history.GitObjects, commit: str, exclude: list) -> dict:
+    return {p: b for p, b in objects.tree_blobs(objects.commit_tree(commit)) if is_source_path(p, exclude)}
+
+
+def blob_entry(counts: cm.MICounts, source: str) -> dict:
+    fingerprints, code_lines = duplicates.file_fingerprints(source)
+    return {
+        "counts": counts.to_row(),
+        "fingerprints": fingerprints,
+        "code_lines": sorted(code_lines),
+        "imports": import_graph.parse_imports(source),
+    }
+
+
+def analyzed_blobs(blobs: dict) -> set:
+    # entries saved before the imports were kept are analyzed again
+    return {blob for blob, entry in blobs.items() if "imports" in entry}
+
+
+def analyze_blobs(objects: git_history.GitObjects, blobs: list, output_folder: str, batch_size: int) -> dict:
+    # counts and duplicates fingerprints of every blob, written to a temporary folder under its sha
+    results = dict()
+    with tempfile.TemporaryDirectory() as folder:
+        for start in range(0, len(blobs), batch_size):
+            batch = blobs[start : start + batch_size]
+            sources = dict()
+            for blob in batch:
+                _, data = objects.read(blob)
+                with open(os.path.join(folder, f"{blob}.py"), "wb") as f:
+                    f.write(data)
+                sources[blob] = data.decode("utf-8", "replace")
+            counts = get_files_counts(folder, [f"{blob}.py" for blob in batch], output_folder, [])
+            for blob in batch:
+                results[blob] = blob_entry(counts.get(f"{blob}.py", cm.MICounts()), sources[blob])
+                os.remove(os.path.join(folder, f"{blob}.py"))
+            print(f"analyzed {start + len(batch)} of {len(blobs)} new files versions")
+    return results
+
+
+def update_import_graph(graph: import_graph.ImportGraph, previous: dict, files: dict, blobs: dict):
+    # only the files added, changed or removed since the previous commit are updated
+    for path in previous.keys() - files.keys():
+        graph.remove_file(path)
+    for path, blob in files.items():
+        if previous.get(path) != blob:
+            graph.set_imports(path, blobs[blob]["imports"])
+
+
+def commit_stats(files: dict, blobs: dict, graph: import_graph.ImportGraph) -> cm.MIStats:
+    # only the package aggregation is made per commit, duplicates are matched from the stored fingerprints
+    # and the coupling is taken from the import graph of the commit files
+    counts = cm.MICounts()
+    index = duplicates.DuplicatesIndex()
+    for path, blob in files.items():
+        counts += cm.MICounts.from_row(blobs[blob]["counts"])
+        index.add_fingerprints(path, blobs[blob]["fingerprints"], blobs[blob]["code_lines"])
+    counts.dup = cm.duplicate_limits.get_stats(list(index.percentages().values()))
+    counts.coupling = cm.coupling_limits.get_stats([graph.fan_out(path) for path in files])
+    return cm.mi_counts_stats(counts)
+
+
+def staged_baseline_file_path(output_folder):
+    return os.path.join(output_folder, "staged_baseline.json")
+
+
+def analyze_staged_blobs(objects: git_history.GitObjects, blobs: list, path: str) -> dict:
+    # the staged sources are analyzed in process, without writing them to files
+    sources, results = dict(), dict()
+    for blob in blobs:
+        _, sources[blob] = objects.read(blob)
+        run_stats.count("files_analyzed")
+        run_stats.count("source_bytes", len(sources[blob]))
+        results[f"{blob}.py"] = source_metrics.analyze_source(f"{blob}.py", sources[blob])
+    results = {f: r for f, r in results.items() if r is not None}
+    counts = results_counts(
+        path,
+        {f: r["cc"] for f, r in results.items() if r["cc"]},
+        {f: r["raw"] for f, r in results.items()},
+        {f: r["flake8"] for f, r in results.items()},
+        {f: r["docstrings"] for f, r in results.items()},
+    )
+    return {
+        blob: blob_entry(counts.get(f"{blob}.py", cm.MICounts()), sources[blob].decode("utf-8", "replace"))
+        for blob in blobs
+    }
+
+
+def get_mi_score_staged(args):
+    # only files changed since the last run are analyzed, the metrics of the others come from the baseline
+    path = os.path.abspath(args.path)
+    files = {p: b for p, b in git_history.index_files(path).items() if is_source_path(p, args.exclude)}
+    baseline_file = staged_baseline_file_path(args.output_folder)
+    baseline = read_dict(baseline_file) if os.path.exists(baseline_file) else dict()
+    new = sorted(set(files.values()) - analyzed_blobs(baseline))
+    print(f"{len(files)} staged files, {len(new)} changed since the baseline")
+    run_stats.count("files_total", len(set(files.values())))
+    if new:
+        with git_history.GitObjects(path) as objects:
+            baseline.update(analyze_staged_blobs(objects, new, path))
+    # the baseline keeps only the staged versions, so it follows the index
+    baseline = {blob: baseline[blob] for blob in set(files.values())}
+    with open(baseline_file, "w") as f:
+        json.dump(baseline, f)
+    graph = import_graph.ImportGraph(root=import_graph.root_package(path))
+    update_import_graph(graph, dict(), files, baseline)
+    stats = commit_stats(files, baseline, graph)
+    print(stats)
+    print(f"Maintainability score: {stats.mi}, threshold: {args.threshold}")
+    sys.exit(stats.mi < args.threshold)
+
+
+def get_history(args):
+    repo = os.path.abspath(args.path)
+    commits = git_history.rev_list(repo, args.rev, args.since, args.max_count)
+    blobs_file = history_blobs_file_path(args.output_folder)
+    blobs = read_dict(blobs_file) if os.path.exists(blobs_file) else dict()
+    with git_history.GitObjects(repo) as objects:
+        unique = {b for commit, _ in commits for b in commit_files(objects, commit, args.exclude).values()}
+        new = sorted(unique - analyzed_blobs(blobs))
+        print(f"{len(commits)} commits, {len(unique)} files versions, {len(new)} not analyzed yet")
+        if new:
+            blobs.update(analyze_blobs(objects, new, args.output_folder, args.batch_size))
+            with open(blobs_file, "w") as f:
+                json.dump(blobs, f)
+        rows = []
+        files, stats = dict(), None
+        graph = import_graph.ImportGraph(root=import_graph.root_package(repo))
+        for commit, timestamp in commits:
+            previous, files = files, commit_files(objects, commit, args.exclude)
+            if files != previous or stats is None:
+                update_import_graph(graph, previous, files, blobs)
+                stats = commit_stats(files, blobs, graph)
+            date = datetime.datetime.fromtimestamp(timestamp, datetime.timezone.utc).isoformat()
+            rows.append(dict(commit=commit, date=date, files=len(files), **vars(stats)))
+            print(f"{date} {commit[:10]} {stats}")
+    with open(history_file_path(args.output_folder), "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=["commit", "date", "files", *vars(stats)])
+        writer.writeheader()
+        writer.writerows(rows)
+    print(f"history saved to {history_file_path(args.output_folder)}")
+
+
+def churn_file_path(output_folder):
+    return os.path.join(output_folder, "churn.json")
+
+
+def read_function_records(output_folder: str, hal=True) -> dict:
+    cc_data = read_dict(radon_out_file("cc", output_folder))
+    hal_data = read_dict(radon_out_file("hal", output_folder)) if hal else None
+    return function_records.function_records(cc_data, read_dict(flake8_out_file(output_folder)), hal_data)
+
+
+def get_functions(args):
+    # radon cc and hal and flake8 cognitive and cohesion joined into one record per function
     if not args.use_cache:
-        get_final_results(r_c, f_c, d_c, args.path, args.output_folder, args.exclude)
+        get_radon_results(["cc", "hal"], args.path, args.output_folder, args.exclude, args.pipe)
+        out = flake8_out_file(args.output_folder)
+        get_flake8_results(["cognitive", "cohesion"], args.path, out, args.exclude, args.pipe)
+    functions = entities.function_entities(read_function_records(args.output_folder))
+    if args.entities_sink:
+        args.entities_sink(functions)
+    else:
+        print(top_k.render_top(functions, 20))
+
+
+def get_hotspots(args):
+    # the churn index is saved with the last scanned commit, so the next run reads only newer commits
+    churn_file = churn_file_path(args.output_folder)
+    index = churn.ChurnIndex()
+    if os.path.exists(churn_file):
+        index = churn.ChurnIndex.from_dict(read_dict(churn_file))
+    scanned = index.update(os.path.abspath(args.path), args.rev, lambda p: is_source_path(p, args.exclude))
+    with open(churn_file, "w") as f:
+        json.dump(index.to_dict(), f)
+    print(f"{scanned} new commits scanned, churn of {len(index.files)} files")
+    if not args.use_cache:
+        get_radon_results(["cc"], args.path, args.output_folder, args.exclude, args.pipe)
+        out = flake8_out_file(args.output_folder)
+        get_flake8_results(["cognitive"], args.path, out, args.exclude, args.pipe)
+    records = read_function_records(args.output_folder, hal=False)
+    hotspots = entities.hotspot_entities(records, index)
+    if args.entities_sink:
+        args.entities_sink(hotspots)
+    else:
+        print(top_k.render_top(hotspots, 20))
+
+
+def final_tools_commands(commands: list, score_only: bool) -> tuple:
+    # radon, flake8, docstr-coverage and duplicates commands needed for the final commands
+    ignore_commands = score_only or ("mi" in commands) or ("tree" in commands)
+    return tuple(
+        list(specific.values()) if ignore_commands else choose_commands(specific, commands)
+        for specific in [
+            radon_final_commands,
+            flake8_final_commands,
+            docstr_final_commands,
+            source_final_commands,
+        ]
+    )
+
+
+def get_and_parse_final_results_with_mi(args, score_only):
+    commands = args.commands
 
-    cc_data = read_dict(radon_out_file("cc", args.output_folder)) if "cc" in r_c else dict()
-    raw_data = read_dict(radon_out_file("raw", args.output_folder)) if "raw" in r_c else dict()
-    flake8_data = read_dict(flake8_out_file(args.output_folder)) if len(f_c) != 0 else dict()
-    docstrings_data = read_text(docstr_file_path(args.output_folder)) if len(d_c) != 0 else ""
+    ignore_commands = score_only or ("mi" in commands) or ("tree" in commands)
+    r_c, f_c, d_c, dup_c = final_tools_commands(commands, score_only)
 
-    data = (cc_data, raw_data, flake8_data, docstrings_data, os.path.abspath(args.path))
+    if not args.use_cache:
+        get_final_results(r_c, f_c, d_c, dup_c, args.path, args.output_folder, args.exclude, args.pipe)
+
+    raw_data = None
+    if ignore_commands:
+        raw_data = load_mi_raw_data(args.path, args.output_folder, args.use_cache, args.exclude)
 
     if score_only:
-        stats = mi_p.MIChartParser.MIRawData(*data).mi_s()
+        stats = raw_data.mi_s()
         score = stats.mi
         print(stats)
         print(f"Maintainability score: {score}, threshold: {args.threshold}")
         sys.exit(score < float(args.threshold))
     else:
-        if "mi" in commands:
-            mi_p.MIPreview().present(
-                data=data,
-                save=args.save,
-                output_folder=args.output_folder,
-            )
+        if "tree" in commands:
+            with run_stats.timed("scoring", "tree"):
+                root = mi_tree.mi_tree(raw_data)
+            mi_tree.save_tree(root, mi_tree_file_path(args.output_folder))
+            print(mi_tree.render_worst_subtrees(root, args.worst))
+        if "mi" in commands and args.entities_sink:
+            args.entities_sink(entities.mi_entities(raw_data.mi_files()))
+        elif "mi" in commands:
+            with run_stats.timed("render", "mi"):
+                mi_p.MIPreview().present(
+                    data=raw_data,
+                    save=args.save,
+                    output_folder=args.output_folder,
+                )
             args.use_cache = True
         parse_final_results(args)
 
 
-if __name__ == "__main__":
-    args = setup_arguments()
-    # print(args)
+def plannable(args) -> bool:
+    special = ["fail_fast", "sample", "time_budget", "staged", "max_memory"]
+    if args.tool in ("final", "mi_score"):
+        return not any(getattr(args, option, None) for option in special)
+    return args.tool in ("radon", "flake8", "docstr-coverage", "hotspots", "functions")
+
+
+def tool_needs(args) -> tuple:
+    # radon and flake8 commands, docstr-coverage and duplicates results needed by a tool
+    if args.tool == "radon":
+        return args.commands, [], [], []
+    if args.tool == "flake8":
+        return [], args.commands, [], []
+    if args.tool == "docstr-coverage":
+        return [], [], [""], []
+    if args.tool == "hotspots":
+        return ["cc"], ["cognitive"], [], []
+    if args.tool == "functions":
+        return ["cc", "hal"], ["cognitive", "cohesion"], [], []
+    return final_tools_commands(args.commands, args.tool == "mi_score")
+
+
+def get_planned_results(tools: list):
+    # the union of the tools needs runs once, then every tool only parses the results
+    needs = [tool_needs(args) for args in tools]
+    radon_commands, flake8_commands, docstr_commands, source_commands = (
+        sorted(set().union(*(need[i] for need in needs))) for i in range(4)
+    )
+    args = tools[0]
+    get_final_results(
+        radon_commands,
+        flake8_commands,
+        docstr_commands,
+        source_commands,
+        args.path,
+        args.output_folder,
+        args.exclude,
+        args.pipe,
+    )
+    for args in tools:
+        args.use_cache = True
+
+
+def run_tool(args):
     if args.tool == "radon":
         get_and_parse_radon_results(args)
     elif args.tool == "multimetric":
@@ -375,7 +1369,46 @@ if __name__ == "__main__":
         get_and_parse_flake8_results(args)
     elif args.tool == "docstr-coverage":
         get_and_parse_docstr_results(args)
+    elif args.tool == "final" and args.max_memory:
+        get_final_results_bounded(args, False)
     elif args.tool == "final":
         get_and_parse_final_results_with_mi(args, False)
+    elif args.tool == "history":
+        get_history(args)
+    elif args.tool == "hotspots":
+        get_hotspots(args)
+    elif args.tool == "functions":
+        get_functions(args)
+    elif args.tool == "serve":
+        # the server imports this module for the results parsing
+        import metrics_server
+
+        metrics_server.serve(args.path, args.exclude, args.host, args.port)
+    elif args.tool == "mi_score" and args.staged:
+        get_mi_score_staged(args)
+    elif args.tool == "mi_score" and (args.sample or args.time_budget):
+        get_mi_score_sample(args)
+    elif args.tool == "mi_score" and args.fail_fast:
+        get_mi_score_fail_fast(args)
+    elif args.tool == "mi_score" and args.max_memory:
+        get_final_results_bounded(args, True)
     elif args.tool == "mi_score":
         get_and_parse_final_results_with_mi(args, True)
+
+
+def run_tools(tools: list):
+    planned = [args for args in tools if plannable(args)]
+    if len(planned) > 1 and not planned[0].use_cache:
+        get_planned_results(planned)
+    # mi_score exits with its status, so it runs the last and the report is saved on its exit too
+    try:
+        for args in sorted(tools, key=lambda args: args.tool == "mi_score"):
+            run_tool(args)
+    finally:
+        if tools[0].report:
+            with run_stats.timed("render", "html"):
+                print(f"html report saved to {tools[0].report.save(tools[0].output_folder)}")
+
+
+if __name__ == "__main__":
+    run_tools(setup_arguments().tools)
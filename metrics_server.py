@@ -0,0 +1,171 @@
+import hashlib
+import json
+import os.path
+import threading
+import urllib.parse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import calculate_mi as cm
+import duplicates
+import import_graph
+import metrics_preview as mp
+import source_metrics
+
+
+class MetricsIndex:
+    # results of the in-process analyzers by file path, a file is analyzed again only when
+    # its mtime or size changed and its content hash differs
+    def __init__(self, path: str, exclude: list):
+        self.path = os.path.abspath(path)
+        self.exclude = exclude
+        self.lock = threading.Lock()
+        self.analyzed = 0
+        self._files = dict()
+        self.graph = import_graph.ImportGraph(root=import_graph.root_package(self.path))
+        self.duplicates = duplicates.DuplicatesIndex()
+        self._percentages = None
+        self._package_raw = None
+        self._package = None
+        self.refresh()
+
+    def _changed(self):
+        self._percentages = None
+        self._package_raw = None
+        self._package = None
+
+    def _analyze(self, file: str, stat: os.stat_result, data: bytes, digest: str) -> dict:
+        self.analyzed += 1
+        self.duplicates.add(file, data.decode("utf-8", "replace"))
+        return dict(
+            mtime=stat.st_mtime_ns,
+            size=stat.st_size,
+            hash=digest,
+            results=source_metrics.analyze_source(file, data),
+        )
+
+    def entry(self, file: str) -> dict:
+        try:
+            stat = os.stat(os.path.join(self.path, file))
+        except FileNotFoundError:
+            if file in self._files:
+                self._remove(file)
+            return None
+        entry = self._files.get(file)
+        if entry and (entry["mtime"], entry["size"]) == (stat.st_mtime_ns, stat.st_size):
+            return entry
+        with open(os.path.join(self.path, file), "rb") as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if entry and entry["hash"] == digest:
+            entry["mtime"], entry["size"] = stat.st_mtime_ns, stat.st_size
+            return entry
+        self._files[file] = self._analyze(file, stat, data, digest)
+        results = self._files[file]["results"]
+        self.graph.set_imports(file, results["imports"] if results else [])
+        self._changed()
+        return self._files[file]
+
+    def _remove(self, file: str):
+        del self._files[file]
+        self.graph.remove_file(file)
+        self.duplicates.remove(file)
+        self._changed()
+
+    def refresh(self):
+        files = set(duplicates.source_files(self.path, self.exclude))
+        for file in self._files.keys() - files:
+            self._remove(file)
+        for file in sorted(files):
+            self.entry(file)
+
+    def percentages(self) -> dict:
+        # only the duplicated lines of the changed files and of the files sharing their clones are updated
+        if self._percentages is None:
+            self._percentages = self.duplicates.percentages()
+        return self._percentages
+
+    def _raw_data(self, files: list):
+        results = {f: self._files[f]["results"] for f in files if self._files[f]["results"] is not None}
+        return mp.results_raw_data(
+            self.path,
+            {f: r["cc"] for f, r in results.items() if r["cc"]},
+            {f: r["raw"] for f, r in results.items()},
+            {f: r["flake8"] for f, r in results.items()},
+            {f: r["docstrings"] for f, r in results.items()},
+            {f: self.percentages()[f] for f in files},
+            {f: self.graph.fan_out(f) for f in files},
+        )
+
+    def file_stats(self, file: str) -> dict:
+        entry = self.entry(file)
+        if entry is None or entry["results"] is None:
+            return None
+        raw = self._raw_data([file])
+        _, stats = raw.mi_files()[0]
+        return dict(
+            file=file,
+            **vars(stats),
+            duplicated=self.percentages()[file],
+            fan_in=self.graph.fan_in(file),
+            fan_out=self.graph.fan_out(file),
+        )
+
+    def package_raw_data(self):
+        self.refresh()
+        if self._package_raw is None:
+            self._package_raw = self._raw_data(list(self._files))
+        return self._package_raw
+
+    def package_mi_stats(self) -> cm.MIStats:
+        raw = self.package_raw_data()
+        if self._package is None:
+            self._package = cm.mi_counts_stats(sum((c for _, c in raw.files_counts()), cm.MICounts()))
+        return self._package
+
+    def package_stats(self) -> dict:
+        stats = self.package_mi_stats()
+        return dict(files=len(self._files), **vars(stats), import_cycles=self.graph.cycles())
+
+
+class MetricsHandler(BaseHTTPRequestHandler):
+    index = None
+
+    def _reply(self, status: int, body: dict):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _file(self, query: dict) -> tuple:
+        path = query.get("path", [""])[0]
+        file = os.path.relpath(os.path.join(self.index.path, path), self.index.path)
+        if file.startswith("..") or not mp.is_source_path(file, self.index.exclude):
+            return 400, {"error": f"{path} is not a source file of {self.index.path}"}
+        stats = self.index.file_stats(file)
+        if stats is None:
+            return 404, {"error": f"{path} is missing or can't be parsed"}
+        return 200, stats
+
+    def do_GET(self):
+        url = urllib.parse.urlsplit(self.path)
+        with self.index.lock:
+            if url.path == "/file":
+                self._reply(*self._file(urllib.parse.parse_qs(url.query)))
+            elif url.path == "/package":
+                self._reply(200, self.index.package_stats())
+            else:
+                self._reply(404, {"error": "use /file?path=PATH or /package"})
+
+
+def serve(path: str, exclude: list, host: str, port: int):
+    MetricsHandler.index = MetricsIndex(path, exclude)
+    server = ThreadingHTTPServer((host, port), MetricsHandler)
+    print(f"{MetricsHandler.index.analyzed} files indexed, serving on http://{host}:{server.server_port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
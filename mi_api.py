@@ -0,0 +1,47 @@
+import os.path
+import threading
+
+import pandas as pd
+
+import calculate_mi as cm
+import metrics_server
+
+# Library entry point of the maintainability score: no argparse, output folder or exit status.
+# The analyzers run in process, and the index of every analyzed project stays warm between calls,
+# so a repeated call only analyzes the files changed since the previous one.
+FILE_METRICS = ["mi", "loc", "c", "red", "dep", "cov", "duplicated", "fan_in", "fan_out"]
+
+_indexes = dict()
+_indexes_lock = threading.Lock()
+
+
+def project_index(path: str, exclude: list = None) -> metrics_server.MetricsIndex:
+    key = (os.path.abspath(path), tuple(exclude or []))
+    with _indexes_lock:
+        if key not in _indexes:
+            _indexes[key] = metrics_server.MetricsIndex(path, list(key[1]))
+        return _indexes[key]
+
+
+def analyze(path: str, exclude: list = None, metrics: list = None) -> tuple:
+    # package MIStats and a DataFrame of the per file metrics indexed by file path
+    metrics = metrics or FILE_METRICS
+    unknown = set(metrics) - set(FILE_METRICS)
+    if unknown:
+        raise ValueError(f"unknown metrics {sorted(unknown)}, expected some of {FILE_METRICS}")
+    index = project_index(path, exclude)
+    with index.lock:
+        stats = index.package_mi_stats()
+        raw = index.package_raw_data()
+        files = raw.mi_files()
+        percentages = index.percentages()
+        fan = {file: (index.graph.fan_in(file), index.graph.fan_out(file)) for file, _ in files}
+    frame = pd.DataFrame(
+        [
+            dict(vars(file_stats), duplicated=percentages[file], fan_in=fan[file][0], fan_out=fan[file][1])
+            for file, file_stats in files
+        ],
+        index=pd.Index([file for file, _ in files], name="file"),
+        columns=FILE_METRICS,
+    )
+    return cm.MIStats(**vars(stats)), frame[metrics]
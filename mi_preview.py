@@ -3,6 +3,7 @@ import re
 import numpy as np
 
 import calculate_mi as cm
+import run_stats
 import preview.results_preview as rp
 
 
@@ -11,6 +12,16 @@ def radon_cc_parser_function(data: dict):
     return cc_f
 
 
+def radon_cc_parser_function_loc(data: dict):
+    counts = [sum(1 for e in es if e["type"] == "function") for es in data.values()]
+    lines = np.array(
+        [(e["lineno"], e["endline"]) for es in data.values() for e in es if e["type"] == "function"],
+        dtype=int,
+    ).reshape(-1, 2)
+    loc = lines[:, 1] - lines[:, 0] + 1
+    return dict(zip(data.keys(), np.split(loc, np.cumsum(counts)[:-1])))
+
+
 def radon_raw_distinct_parser(data: dict):
     return {f: e["loc"] for f, e in data.items()}
 
@@ -63,43 +74,184 @@ class MIChart(rp.DataChart):
         super().__init__(title="Maintainability score per file", xlabel="files", ylabel="ratio")
 
 
+@run_stats.timed("parse", "mi columns")
+def mi_columns(
+    radon_cc_data,
+    radon_raw_data,
+    flake8_data,
+    coverage_data,
+    path,
+    duplicates_data=None,
+    coupling_data=None,
+    docstrings_counts=None,
+) -> dict:
+    cc_values_by_file = radon_cc_parser_function(radon_cc_data)
+    funcs_loc_by_file = radon_cc_parser_function_loc(radon_cc_data)
+    raw_data_by_file = radon_raw_distinct_parser(radon_raw_data)
+    cognitive_values_by_file = flake8_cognitive_parser(flake8_data)
+    cohesion_values_by_file = flake8_cohesion_parser(flake8_data)
+    docstrings_by_file = docstr_parser_file_percentage(coverage_data, path)
+    # the text of docstr-coverage leaves fully documented files out, their counts come from its api
+    docstrings_counts_by_file = docstrings_counts or {}
+
+    raw_set = set(raw_data_by_file.keys())
+    cc_set = set(cc_values_by_file.keys())
+    cognitive_set = set(cognitive_values_by_file.keys())
+    coh_set = set(cohesion_values_by_file.keys())
+    docstr_set = set(docstrings_by_file.keys())
+    duplicates_data = duplicates_data or {}
+    dup_set = set(duplicates_data.keys())
+    coupling_data = coupling_data or {}
+    coupling_set = set(coupling_data.keys())
+
+    docstr_set |= set(docstrings_counts_by_file.keys())
+
+    files = sorted(raw_set | cc_set | cognitive_set | coh_set | docstr_set | dup_set | coupling_set)
+    file_ids = {f: i for i, f in enumerate(files)}
+
+    def ids(by_file: dict):
+        return np.array([file_ids[f] for f in by_file], dtype=int)
+
+    def values(value_by_file: dict):
+        return np.array(list(value_by_file.values()), dtype=float)
+
+    def repeated_ids(values_by_file: dict):
+        return np.repeat(ids(values_by_file), [len(vs) for vs in values_by_file.values()])
+
+    def concatenated_values(values_by_file: dict):
+        return np.concatenate([np.empty(0), *(np.asarray(vs, dtype=float) for vs in values_by_file.values())])
+
+    docstrings_counts = np.array(list(docstrings_counts_by_file.values()), dtype=int).reshape(-1, 2)
+
+    return {
+        "files": files,
+        "loc_ids": ids(raw_data_by_file),
+        "loc_values": values(raw_data_by_file),
+        "func_loc_ids": repeated_ids(funcs_loc_by_file),
+        "func_loc_values": concatenated_values(funcs_loc_by_file),
+        "cc_ids": repeated_ids(cc_values_by_file),
+        "cc_values": concatenated_values(cc_values_by_file),
+        "cognitive_ids": repeated_ids(cognitive_values_by_file),
+        "cognitive_values": concatenated_values(cognitive_values_by_file),
+        "cohesion_ids": repeated_ids(cohesion_values_by_file),
+        "cohesion_values": concatenated_values(cohesion_values_by_file),
+        "coverage_ids": ids(docstrings_by_file),
+        "coverage_values": values(docstrings_by_file),
+        "docstrings_ids": ids(docstrings_counts_by_file),
+        "docstrings_needed": docstrings_counts[:, 0],
+        "docstrings_found": docstrings_counts[:, 1],
+        "dup_ids": ids(duplicates_data),
+        "dup_values": values(duplicates_data),
+        "coupling_ids": ids(coupling_data),
+        "coupling_values": values(coupling_data),
+        "total_coverage": np.array([overall_coverage(coverage_data)]),
+    }
+
+
 class MIChartParser(rp.ABSParser):
     class MIRawData:
-        def __init__(self, radon_cc_data, radon_raw_data, flake8_data, coverage_data, path):
-            cc_values_by_file = radon_cc_parser_function(radon_cc_data)
-            raw_data_by_file = radon_raw_distinct_parser(radon_raw_data)
-            cognitive_values_by_file = flake8_cognitive_parser(flake8_data)
-            cohesion_values_by_file = flake8_cohesion_parser(flake8_data)
-            docstrings_by_file = docstr_parser_file_percentage(coverage_data, path)
-
-            self.files_loc_values = raw_data_by_file.values()
-            self.funcs_loc_values = []
-            self.total_loc_values = sum(self.files_loc_values)
-            self.cc_values = [v for vs in cc_values_by_file.values() for v in vs]
-            self.cognitive_values = [v for vs in cognitive_values_by_file.values() for v in vs]
-            self.dup_lines = []
-            self.cohesion_values = [v for vs in cohesion_values_by_file.values() for v in vs]
-            self.total_docstrings = overall_coverage(coverage_data)
-
-            raw_set = set(raw_data_by_file.keys())
-            cc_set = set(cc_values_by_file.keys())
-            cognitive_set = set(cognitive_values_by_file.keys())
-            coh_set = set(cohesion_values_by_file.keys())
-            docstr_set = set(docstrings_by_file.keys())
-
-            self.files = raw_set | cc_set | cognitive_set | coh_set | docstr_set
-
-            def mi_file(f):
-                return cm.mi_file_stats(
-                    loc=raw_data_by_file.setdefault(f, []),
-                    func_loc=[],
-                    file_cc=cc_values_by_file.setdefault(f, []),
-                    file_cognitive=cognitive_values_by_file.setdefault(f, []),
-                    file_cohesion=cohesion_values_by_file.setdefault(f, []),
-                    file_coverage=docstrings_by_file.setdefault(f, 100.0),
+        def __init__(
+            self,
+            radon_cc_data,
+            radon_raw_data,
+            flake8_data,
+            coverage_data,
+            path,
+            duplicates_data=None,
+            coupling_data=None,
+            docstrings_counts=None,
+        ):
+            self._set_columns(
+                mi_columns(
+                    radon_cc_data,
+                    radon_raw_data,
+                    flake8_data,
+                    coverage_data,
+                    path,
+                    duplicates_data,
+                    coupling_data,
+                    docstrings_counts,
                 )
+            )
+
+        @classmethod
+        def from_columns(cls, columns: dict):
+            raw_data = cls.__new__(cls)
+            raw_data._set_columns(columns)
+            return raw_data
+
+        def _set_columns(self, columns: dict):
+            # columns saved before the coupling was measured
+            columns.setdefault("coupling_ids", np.empty(0, dtype=int))
+            columns.setdefault("coupling_values", np.empty(0))
+            self.columns = columns
+            self.file_names = list(columns["files"])
+            self.files = self.file_names
+
+            self.files_loc_values = columns["loc_values"]
+            self.funcs_loc_values = columns["func_loc_values"]
+            self.total_loc_values = self.files_loc_values.sum()
+            self.cc_values = columns["cc_values"]
+            self.cognitive_values = columns["cognitive_values"]
+            self.dup_lines = list(columns["dup_values"])
+            self.cohesion_values = columns["cohesion_values"]
+            self.coupling_values = columns["coupling_values"]
+            self.total_docstrings = float(columns["total_coverage"][0])
+
+        def _pair(self, name: str):
+            return self.columns[f"{name}_ids"], self.columns[f"{name}_values"]
+
+        def mi_files(self):
+            n = len(self.file_names)
+            files_coverage = np.full(n, 100.0)
+            files_coverage[self.columns["coverage_ids"]] = self.columns["coverage_values"]
+            stats = cm.mi_files_stats(
+                n,
+                loc=self._pair("loc"),
+                func_loc=self._pair("func_loc"),
+                files_cc=self._pair("cc"),
+                files_cognitive=self._pair("cognitive"),
+                files_cohesion=self._pair("cohesion"),
+                files_coverage=files_coverage,
+                files_dup=self._pair("dup"),
+                files_coupling=self._pair("coupling"),
+            )
+            return list(zip(self.file_names, stats))
 
-            self.mi_file = mi_file
+        def files_counts(self):
+            n = len(self.file_names)
+            loc = np.bincount(self.columns["loc_ids"], weights=self.files_loc_values, minlength=n)
+            needed = np.bincount(
+                self.columns["docstrings_ids"], weights=self.columns["docstrings_needed"], minlength=n
+            )
+            found = np.bincount(
+                self.columns["docstrings_ids"], weights=self.columns["docstrings_found"], minlength=n
+            )
+            stats = [
+                limits.get_stats_by_id(*self._pair(name), n).tolist()
+                for limits, name in [
+                    (cm.loc_file_limits, "loc"),
+                    (cm.loc_func_limits, "func_loc"),
+                    (cm.cc_limits, "cc"),
+                    (cm.cognitive_limits, "cognitive"),
+                    (cm.duplicate_limits, "dup"),
+                    (cm.cohesion_limits, "cohesion"),
+                    (cm.coupling_limits, "coupling"),
+                ]
+            ]
+            return [
+                (
+                    f,
+                    cm.MICounts(
+                        loc.item(i),
+                        *(cm.Stats(*s[i]) for s in stats[:-1]),
+                        docstrings_needed=int(needed.item(i)),
+                        docstrings_found=int(found.item(i)),
+                        coupling=cm.Stats(*stats[-1][i]),
+                    ),
+                )
+                for i, f in enumerate(self.file_names)
+            ]
 
         def mi_s(self):
             return cm.mi_package_stats(
@@ -111,17 +263,20 @@ class MIChartParser(rp.ABSParser):
                 dup_lines=self.dup_lines,
                 package_cohesion=self.cohesion_values,
                 package_coverage=self.total_docstrings,
+                package_coupling=self.coupling_values,
             )
 
-    def parse(self, data):
-        prepared_data = MIChartParser.MIRawData(*data)
+    def parse(self, data, cache: rp.ParseCache = None):
+        if isinstance(data, MIChartParser.MIRawData):
+            prepared_data = data
+        else:
+            prepared_data = MIChartParser.MIRawData(*data)
 
         mi_s = prepared_data.mi_s()
 
         mi_f_d = []
 
-        for f in prepared_data.files:
-            stats = prepared_data.mi_file(f)
+        for f, stats in prepared_data.mi_files():
             mi_f_d.append(
                 (
                     stats.mi,
@@ -129,6 +284,7 @@ class MIChartParser(rp.ABSParser):
                     + f"MI: {stats.mi}\n\n"
                     + f"volume score: {stats.loc}\n"
                     + f"complexity score: {stats.c}\n"
+                    + f"redundancy score: {stats.red}\n"
                     + f"dependence score: {stats.dep}\n"
                     + f"coverage score: {stats.cov}",
                 )
@@ -151,7 +307,7 @@ class MIPreview(rp.DataPreview):
         )
 
     def present(self, data, save: bool, output_folder: str):
-        values, labels, total = self._charts[0][1].parse(data)
+        values, labels, total = self.parse(0, data)
         self.make_chart(0, values=np.array(values) - 1.005, labels=labels, bottom=1.005)
         self.add_statistics(0, values)
         self.make_chart_description(
@@ -159,6 +315,7 @@ class MIPreview(rp.DataPreview):
             f"Total Maintainability Score: {total.mi}\n\n"
             + f"Total volume score: {total.loc}\n"
             + f"Total complexity score: {total.c}\n"
+            + f"Total redundancy score: {total.red}\n"
             + f"Total dependence score: {total.dep}\n"
             + f"Total coverage score: {total.cov}",
         )
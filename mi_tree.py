@@ -0,0 +1,80 @@
+import heapq
+import json
+import os.path
+
+import calculate_mi as cm
+
+
+class MITreeNode:
+    def __init__(self, name: str, path: str):
+        self.name = name
+        self.path = path
+        self.children = dict()
+        self.files = 0
+        self.counts = cm.MICounts()
+        self.stats = None
+
+    def child(self, name: str):
+        if name not in self.children:
+            self.children[name] = MITreeNode(name, os.path.join(self.path, name))
+        return self.children[name]
+
+    def nodes(self):
+        yield self
+        for child in self.children.values():
+            yield from child.nodes()
+
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "path": self.path,
+            "files": self.files,
+            **vars(self.stats),
+            "children": [c.to_dict() for c in self.children.values()],
+        }
+
+
+def build_tree(files_counts) -> MITreeNode:
+    root = MITreeNode(".", "")
+    for f, counts in files_counts:
+        node = root
+        for part in os.path.dirname(f).split(os.sep):
+            if part and part != ".":
+                node = node.child(part)
+        node.files += 1
+        node.counts += counts
+    roll_up(root)
+    return root
+
+
+def roll_up(node: MITreeNode):
+    # children first, so every directory sums already aggregated subtrees only once
+    for child in node.children.values():
+        roll_up(child)
+        node.files += child.files
+        node.counts += child.counts
+    node.stats = cm.mi_counts_stats(node.counts)
+
+
+def mi_tree(raw_data) -> MITreeNode:
+    return build_tree(raw_data.files_counts())
+
+
+def save_tree(root: MITreeNode, out: str):
+    with open(out, "w") as f:
+        json.dump(root.to_dict(), f, indent=2)
+
+
+def worst_subtrees(root: MITreeNode, n: int) -> list:
+    return heapq.nsmallest(n, root.nodes(), key=lambda node: (node.stats.mi, node.path))
+
+
+def render_worst_subtrees(root: MITreeNode, n: int) -> str:
+    lines = [f"{'directory':<60} {'files':>6} {'MI':>5} {'loc':>5} {'c':>5} {'red':>5} {'dep':>5} {'cov':>5}"]
+    for node in worst_subtrees(root, n):
+        s = node.stats
+        lines.append(
+            f"{node.path or '.':<60} {node.files:>6} "
+            + f"{s.mi:>5} {s.loc:>5} {s.c:>5} {s.red:>5} {s.dep:>5} {s.cov:>5}"
+        )
+    return "\n".join(lines)
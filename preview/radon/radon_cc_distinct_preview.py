@@ -45,8 +45,8 @@ class RadonDistinctPreview(DataPreview):
         )
 
     def present(self, data, save: bool, output_folder: str):
-        for index, (chart, parser) in enumerate(self._charts):
-            values, labels = parser.parse(data)
+        for index in range(len(self._charts)):
+            values, labels = self.parse(index, data)
             self.make_chart(index, values=values, labels=labels)
             self.add_statistics(index, values)
 
@@ -1,4 +1,4 @@
-from preview.results_preview import DataChart, SimpleDictParser, DataPreview
+from preview.results_preview import DataChart, SimpleDictParser, DataPreview, dict_list_items
 
 
 class RadonCCChart(DataChart):
@@ -6,35 +6,22 @@ class RadonCCChart(DataChart):
         super().__init__(title="Radon Cyclomatic Complexity", xlabel="blocks", ylabel="points")
 
 
+def radon_cc_label(f, e):
+    return (
+        f'name: {e["name"]}\n'
+        + f'type: {e["type"]}\n'
+        + f'rank: {e["rank"]}\n'
+        + f'complexity: {e["complexity"]}\n'
+        + f"filename: {f}"
+    )
+
+
 class RadonCCParser(SimpleDictParser):
     def __init__(self, include: callable = lambda *_: True):
-        def label(f, e):
-            return (
-                f'name: {e["name"]}\n'
-                + f'type: {e["type"]}\n'
-                + f'rank: {e["rank"]}\n'
-                + f'complexity: {e["complexity"]}\n'
-                + f"filename: {f}"
-            )
-
         def value(_, e):
             return e["complexity"]
 
-        super().__init__(label, value, include)
-
-    def parse(self, data):
-        values, labels = zip(
-            *sorted(
-                [
-                    (self._value(k, v), self._label(k, v))
-                    for k, vs in data.items()
-                    for v in vs
-                    if self._include(k, v)
-                ],
-                reverse=self._reversed,
-            )
-        )
-        return values, labels
+        super().__init__(radon_cc_label, value, include, items=dict_list_items)
 
 
 class RadonCCPreview(DataPreview):
@@ -49,7 +36,7 @@ class RadonCCPreview(DataPreview):
         )
 
     def present(self, data, save: bool, output_folder: str):
-        values, labels = self._charts[0][1].parse(data)
+        values, labels = self.parse(0, data)
         self.make_chart(0, values=values, labels=labels)
         self.add_statistics(0, values)
         self.save_or_show(save, output_folder)
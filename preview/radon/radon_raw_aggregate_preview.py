@@ -43,8 +43,7 @@ class RadonRawAggregatePreview(DataPreview):
         )
 
     def present(self, data, save: bool, output_folder: str):
-        _, parser = self._charts[0]
-        values, labels = parser.parse(data)
+        values, labels = self.parse(0, data)
         loc = values[0][1]
         values = values[1:]
 
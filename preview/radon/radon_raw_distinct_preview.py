@@ -3,12 +3,13 @@ import numpy as np
 from preview.results_preview import SimpleDictParser, DataPreview, DataChart
 
 
+def radon_raw_label(f, e):
+    return f"filename: {f}\n" + "\n".join([f"{k}: {v}" for k, v in e.items()])
+
+
 class RadonRawDistinctParser(SimpleDictParser):
     def __init__(self, value: callable, reverse=True):
-        def label(f, e):
-            return f"filename: {f}\n" + "\n".join([f"{k}: {v}" for k, v in e.items()])
-
-        super().__init__(label, value, lambda *_: True, reverse)
+        super().__init__(radon_raw_label, value, lambda *_: True, reverse)
 
 
 class RadonRawDistinctPreview(DataPreview):
@@ -60,8 +61,8 @@ class RadonRawDistinctPreview(DataPreview):
         self._chart_labels = ["SLOC", "LLOC", "Comments", "Docstrings"]
 
     def present(self, data, save: bool, output_folder: str):
-        for index, (chart, parser) in enumerate(self._charts):
-            values, labels = parser.parse(data)
+        for index in range(len(self._charts)):
+            values, labels = self.parse(index, data)
             self.make_chart(index, values=values, labels=labels, bottom=-1)
             self.add_statistics(index, values)
             self.make_chart_description(index, f"{self._chart_labels[index]} total: {np.sum(values)}")
@@ -1,4 +1,5 @@
 import os.path
+import weakref
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -6,6 +7,35 @@ import numpy as np
 from typing import Sequence
 from abc import ABC, abstractmethod
 
+# charts of more bars shown on an interactive backend draw an envelope of them, the bars and their
+# annotations are drawn only for the visible range once zooming or panning leaves at most this many bars
+# in view; saved charts and charts of non-interactive backends draw all the bars
+LOD_BARS = 500
+
+# level of detail bars of the open figures, drawn in full detail when their figure is saved
+_level_of_detail_bars = weakref.WeakSet()
+
+_TEXT_KWARGS = dict(
+    ha="left",
+    va="top",
+    color="C1",
+    size="small",
+    bbox=dict(facecolor="white", alpha=0.8),
+    visible=False,
+)
+
+
+def _annotate_bar(ax: plt.Axes, text: str, xy: tuple):
+    return ax.annotate(
+        text,
+        xy=xy,
+        xytext=(50, 0.9),
+        textcoords=("offset pixels", "axes fraction"),
+        arrowprops=dict(arrowstyle="->"),
+        annotation_clip=True,
+        **_TEXT_KWARGS,
+    )
+
 
 def _make_bar(
     fig: plt.Figure,
@@ -42,12 +72,19 @@ def _make_stacked_bars(
     bottom=0.0,
     annotate_index=-1,
     show_first=True,
+    level_of_detail=None,
 ):
     ax.set_title(title)
     ax.set_xlabel(xlabel)
     ax.set_ylabel(ylabel)
     ax.grid()
     plt.setp(ax.get_xticklabels(), visible=False)  # don't show x labels to avoid overlap
+    if level_of_detail is None:
+        level_of_detail = len(labels) > LOD_BARS and _interactive(fig)
+    if level_of_detail:
+        bars = _LevelOfDetailBars(fig, ax, labels, values, bottom, annotate_index, show_first)
+        _level_of_detail_bars.add(bars)
+        return bars.handles
     plt_bars = []
     bottom = np.repeat(bottom, len(labels))
     for category, bar_values in values:
@@ -64,24 +101,8 @@ def _make_stacked_bars(
         bottom += np.array(bar_values)
     plt_labels = []
 
-    text_kwargs = dict(
-        ha="left",
-        va="top",
-        color="C1",
-        size="small",
-        bbox=dict(facecolor="white", alpha=0.8),
-        visible=False,
-    )
     for index, rect in enumerate(plt_bars[annotate_index].patches):
-        text = ax.annotate(
-            labels[index],
-            xy=(rect.get_x(), rect.get_y() + rect.get_height()),
-            xytext=(50, 0.9),
-            textcoords=("offset pixels", "axes fraction"),
-            arrowprops=dict(arrowstyle="->"),
-            annotation_clip=True,
-            **text_kwargs,
-        )
+        text = _annotate_bar(ax, labels[index], (rect.get_x(), rect.get_y() + rect.get_height()))
         plt_labels.append(text)
 
     visible_labels = []
@@ -112,6 +133,132 @@ def _make_stacked_bars(
     return plt_bars
 
 
+def _interactive(fig: plt.Figure) -> bool:
+    # canvases of non-interactive backends, e.g. Agg, require no gui framework
+    return fig.canvas.required_interactive_framework is not None
+
+
+class _LevelOfDetailBars:
+    # stacked bars redrawn on every change of the x limits: an envelope of the maximal tops in bins of
+    # a few pixels while many bars are in view, the bars with their annotations when at most LOD_BARS are
+    def __init__(self, fig, ax, labels, values, bottom, annotate_index, show_first):
+        self.figure = fig
+        self._ax = ax
+        self._labels = labels
+        self._categories = [category for category, _ in values]
+        n = len(labels)
+        heights = np.array([np.asarray(v, dtype=float) for _, v in values]).reshape(-1, n)
+        bottom = np.broadcast_to(np.asarray(bottom, dtype=float), (n,))
+        self._tops = bottom + np.cumsum(heights, axis=0)
+        self._bottoms = np.vstack([bottom, self._tops[:-1]])
+        self._annotate_index = annotate_index
+        self._shown = 0 if show_first and n else None
+        self._artists = []
+        self._bar_indices = dict()
+        self._annotations = dict()
+        self._range = None
+        self._envelope = True
+        low = min(0.0, float(self._bottoms.min(initial=0.0)))
+        high = float(self._tops.max(initial=1.0))
+        # fixed limits, so redrawing doesn't autoscale the view being zoomed
+        ax.set_xlim(0, max(n, 1))
+        ax.set_ylim(low, high + 0.05 * (high - low or 1.0))
+        self.handles = self._render(0, n)
+        ax.callbacks.connect("xlim_changed", lambda _: self._on_xlim_changed())
+        fig.canvas.mpl_connect("pick_event", lambda event: self._on_pick(event))
+
+    def _visible_range(self) -> tuple:
+        left, right = self._ax.get_xlim()
+        n = len(self._labels)
+        return max(0, int(np.floor(left))), min(n, int(np.ceil(right)))
+
+    def _on_xlim_changed(self):
+        first, last = self._visible_range()
+        if (first, last) != self._range:
+            self._render(first, last)
+            self.figure.canvas.draw_idle()
+
+    def detail(self):
+        # a saved chart can't be zoomed, so it shows all the bars of the visible range
+        self._envelope = False
+        self._render(*self._visible_range())
+
+    def _clear(self):
+        for artist in self._artists + list(self._annotations.values()):
+            artist.remove()
+        self._artists.clear()
+        self._bar_indices.clear()
+        self._annotations.clear()
+
+    def _render(self, first: int, last: int) -> list:
+        self._clear()
+        self._range = (first, last)
+        if last <= first:
+            return []
+        if last - first <= LOD_BARS or not self._envelope:
+            handles = self._render_bars(first, last)
+        else:
+            handles = self._render_envelope(first, last)
+        if self._shown is not None and first <= self._shown < last:
+            self._annotation(self._shown).set_visible(True)
+        return handles
+
+    def _render_bars(self, first: int, last: int) -> list:
+        x = np.arange(first, last)
+        bars = []
+        for i, category in enumerate(self._categories):
+            bar = self._ax.bar(
+                x=x,
+                height=self._tops[i, first:last] - self._bottoms[i, first:last],
+                bottom=self._bottoms[i, first:last],
+                width=1.0,
+                align="edge",
+                picker=True,  # show bar annotation on the pick event
+                label=category,
+                color=f"C{i}",
+            )
+            self._bar_indices.update(zip(bar.patches, x.tolist()))
+            self._artists.append(bar)
+            bars.append(bar)
+        return bars
+
+    def _render_envelope(self, first: int, last: int) -> list:
+        bins = max(1, min(last - first, int(self._ax.bbox.width) // 2))
+        edges = np.unique(np.linspace(first, last, bins + 1).astype(int))
+        starts = edges[:-1] - first
+        lower = np.minimum.reduceat(self._bottoms[0, first:last], starts)
+        envelopes = []
+        for i, category in enumerate(self._categories):
+            upper = np.maximum(np.maximum.reduceat(self._tops[i, first:last], starts), lower)
+            envelope = self._ax.fill_between(
+                edges,
+                np.append(lower, lower[-1]),
+                np.append(upper, upper[-1]),
+                step="post",
+                label=category,
+                color=f"C{i}",
+            )
+            self._artists.append(envelope)
+            envelopes.append(envelope)
+            lower = upper
+        return envelopes
+
+    def _annotation(self, index: int):
+        if index not in self._annotations:
+            top = self._tops[self._annotate_index, index]
+            self._annotations[index] = _annotate_bar(self._ax, self._labels[index], (index, top))
+        return self._annotations[index]
+
+    def _on_pick(self, event):
+        if not self._ax.in_axes(event.mouseevent) or event.artist not in self._bar_indices:
+            return
+        if self._shown in self._annotations:
+            self._annotations[self._shown].set_visible(False)
+        self._shown = self._bar_indices[event.artist]
+        self._annotation(self._shown).set_visible(True)
+        self.figure.canvas.draw_idle()
+
+
 def _add_statistics(values: Sequence, ax: plt.Axes, loc="upper right"):
     max_v = np.max(values)
     min_v = np.min(values)
@@ -138,6 +285,8 @@ def _make_plot_description(ax: plt.Axes, text: str):
 
 def _save_or_show(save_output: str, filename: str):
     if save_output:
+        for bars in [bars for bars in _level_of_detail_bars if bars.figure is plt.gcf()]:
+            bars.detail()
         plt.savefig(os.path.join(save_output, filename))
         plt.close()
     else:
@@ -190,9 +339,35 @@ class DataChart:
         )
 
 
+def dict_items(data: dict) -> list:
+    return list(data.items())
+
+
+def dict_list_items(data: dict) -> list:
+    return [(k, v) for k, vs in data.items() for v in vs]
+
+
+class ParseCache:
+    # rows of a dataset and their labels, made once and shared by all parsers of a preview,
+    # parsers only select and sort values from them
+    def __init__(self):
+        self._data = None
+        self._rows = dict()
+
+    def rows(self, data, items: callable, label: callable) -> tuple:
+        if data is not self._data:
+            self._data = data
+            self._rows.clear()
+        key = (items, label)
+        if key not in self._rows:
+            rows = items(data)
+            self._rows[key] = (rows, [label(*kv) for kv in rows])
+        return self._rows[key]
+
+
 class ABSParser(ABC):
     @abstractmethod
-    def parse(self, data) -> tuple:
+    def parse(self, data, cache: ParseCache = None) -> tuple:
         pass
 
 
@@ -218,6 +393,11 @@ class DataPreview(ABC):
         self._axs = [axs] if isinstance(axs, plt.Axes) else axs.flatten()
         self._charts = charts
         self._filename = filename
+        self._parse_cache = ParseCache()
+
+    def parse(self, nchart: int, data):
+        _, parser = self._charts[nchart]
+        return parser.parse(data, self._parse_cache)
 
     def make_chart(self, nchart: int, **kwargs):
         chart, _ = self._charts[nchart]
@@ -249,16 +429,25 @@ class DataPreview(ABC):
 
 
 class SimpleDictParser(ABSParser):
-    def __init__(self, label: callable, value: callable, include: callable, reversed: bool = True):
+    def __init__(
+        self,
+        label: callable,
+        value: callable,
+        include: callable,
+        reversed: bool = True,
+        items: callable = dict_items,
+    ):
         self._label = label
         self._value = value
         self._include = include
         self._reversed = reversed
+        self._items = items
 
-    def parse(self, data):
+    def parse(self, data, cache: ParseCache = None):
+        rows, row_labels = (cache or ParseCache()).rows(data, self._items, self._label)
         values, labels = zip(
             *sorted(
-                [(self._value(*kv), self._label(*kv)) for kv in data.items() if self._include(*kv)],
+                [(self._value(*kv), label) for kv, label in zip(rows, row_labels) if self._include(*kv)],
                 reverse=self._reversed,
             )
         )
@@ -280,10 +469,11 @@ class DictAggregateParser(ABSParser):
         self._include = include
         self._reverse = reverse
 
-    def parse(self, data):
+    def parse(self, data, cache: ParseCache = None):
+        rows, row_labels = (cache or ParseCache()).rows(data, dict_items, self._label)
         values, labels = zip(
             *sorted(
-                [(self._value(*kv), self._label(*kv)) for kv in data.items() if self._include(*kv)],
+                [(self._value(*kv), label) for kv, label in zip(rows, row_labels) if self._include(*kv)],
                 key=lambda vl: vl[0][self._categories[0]],
                 reverse=self._reverse,
             ),
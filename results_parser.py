@@ -1,3 +1,4 @@
+import functools
 import os.path
 import textwrap
 
@@ -6,6 +7,7 @@ import numpy as np
 import re
 
 import calculate_mi as cm
+import results_store
 
 
 def make_bar(
@@ -178,6 +180,34 @@ def save_or_show(save_output: str, filename: str):
         plt.show()
 
 
+# parser results as a list of columns and back: a tuple of columns, a list of rows, docstrings records
+_DOCSTR_KEYS = ["filename", "needed", "found", "missing", "coverage", "label"]
+_SHAPES = {
+    "columns": (lambda r: [list(c) for c in r], lambda cs: tuple(tuple(c) for c in cs)),
+    "rows": (lambda r: [list(c) for c in zip(*r)], lambda cs: list(zip(*cs))),
+    "docstr": (
+        lambda r: [[e[k] for e in r[0]] for k in _DOCSTR_KEYS] + [[r[1]]],
+        lambda cs: ([dict(zip(_DOCSTR_KEYS, e)) for e in zip(*cs[:-1])], cs[-1][0]),
+    ),
+}
+
+
+def stored(shape: str):
+    # a parser given results_store.StoredResults instead of the data reuses its saved columns
+    encode, decode = _SHAPES[shape]
+
+    def decorator(parser):
+        @functools.wraps(parser)
+        def wrapper(data, *args):
+            if isinstance(data, results_store.StoredResults):
+                return data.parsed(parser.__name__, args, parser, encode, decode)
+            return parser(data, *args)
+
+        return wrapper
+
+    return decorator
+
+
 def sort(values: list, labels: list, reverse=True):
     values_and_labels = sorted(zip(values, labels), reverse=reverse)
     return zip(*values_and_labels)
@@ -193,6 +223,7 @@ def cc_label(filename: str, entity: dict):
     )
 
 
+@stored("columns")
 def radon_cc_parser(data: dict):
     complexities = []
     cc_info = []
@@ -223,6 +254,7 @@ def radon_cc_preview(data: dict, save_output: str = None):
     save_or_show(save_output, "radon_cc.png")
 
 
+@stored("columns")
 def radon_cc_parser_class(data: dict):
     complexities = []
     cc_info = []
@@ -236,6 +268,7 @@ def radon_cc_parser_class(data: dict):
     return sort(complexities, cc_info)
 
 
+@stored("columns")
 def radon_cc_parser_function(data: dict):
     complexities = []
     cc_info = []
@@ -378,6 +411,7 @@ def radon_hal_parser(data: dict, save_output: str = None):
     save_or_show(save_output, "radon_halstead.png")
 
 
+@stored("rows")
 def radon_raw_aggregate_parser(data: dict):
     first_chart_keys = ["loc", "sloc", "single_comments", "multi", "blank"]
     first_chart_values = []
@@ -430,6 +464,7 @@ def radon_raw_aggregate_preview(data: dict, save_output: str = None):
     save_or_show(save_output, "radon_statistics_aggregate.png")
 
 
+@stored("rows")
 def radon_raw_distinct_parser(data: dict):
     data_distinct = []
 
@@ -704,10 +739,12 @@ def flake8_cc_parser(data: dict, code: str):
     return flake8_parser(data, code, cc_extract)
 
 
+@stored("columns")
 def flake8_mccabe_parser(data: dict):
     return flake8_cc_parser(data, "C901")
 
 
+@stored("columns")
 def flake8_radon_parser(data: dict):
     return flake8_cc_parser(data, "R701")
 
@@ -758,6 +795,7 @@ def flake8_mccabe_preview(data: dict, save_output: str = None):
     save_or_show(save_output, "flake8_mccabe.png")
 
 
+@stored("columns")
 def flake8_cognitive_parser(data: dict):
     def cognitive_extract(*args):
         entry = args[0]
@@ -796,6 +834,7 @@ def flake8_cognitive_preview(data: dict, save_output: str = None):
     save_or_show(save_output, "flake8_cognitive.png")
 
 
+@stored("columns")
 def flake8_cohesion_parser(data: dict):
     def cohesion_extract(*args):
         entry = args[0]
@@ -868,6 +907,7 @@ def flake8_parser(data: dict, code: str, specific_extract: callable, reverse=Tru
     return values, labels
 
 
+@stored("docstr")
 def docstr_parser(text: str, path: str):
     pattern = r'File: "(.*)"\n Needed: (.*); Found: (.*); Missing: (.*); Coverage: (.*)%'
     data = []
@@ -939,3 +979,26 @@ def docstr_preview(text: str, path: str, save_output: str = None):
 
     make_plot_description(f"Files processed: {len(data1)}\nTotal: " + stats.strip())
     save_or_show(save_output, "docstring_coverage.png")
+
+
+def duplicates_preview(data: dict, save_output: str = None):
+    values, labels = sort(
+        list(data.values()), [f"file: {f}\nduplicated lines: {v}%" for f, v in data.items()]
+    )
+    fig, ax = plt.subplots(num="Duplicated code", figsize=(10, 5), frameon=True, layout="constrained")
+    make_bar(
+        fig,
+        ax,
+        values=np.array(values) + 1.0,
+        labels=labels,
+        title="Duplicated lines per file",
+        xlabel="files",
+        ylabel="percentage",
+        bottom=-1.0,
+    )
+    add_statistics(values, ax)
+    add_limits(limits=cm.duplicate_limits, values=values, ax=ax)
+    make_plot_description(
+        f"Total files count: {len(labels)}\n" f"Files with duplicates: {np.count_nonzero(values)}"
+    )
+    save_or_show(save_output, "duplicates.png")
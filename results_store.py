@@ -0,0 +1,112 @@
+import json
+import os
+import os.path
+import shutil
+
+import numpy as np
+
+# Columns are saved as one .npy file each, so a cached run can memory-map them instead of parsing json.
+# Lists of strings are interned into one utf-8 blob plus an offsets column.
+_STRINGS_SUFFIX = ".strings.npy"
+_OFFSETS_SUFFIX = ".offsets.npy"
+_COLUMN_SUFFIX = ".npy"
+# the results files the columns were made from, with their modification times and sizes
+_STAMP_FILE = "stamp.json"
+
+
+def save_strings(folder: str, name: str, strings: list):
+    encoded = [s.encode("utf-8") for s in strings]
+    offsets = np.cumsum([0] + [len(e) for e in encoded], dtype=np.int64)
+    np.save(os.path.join(folder, name + _STRINGS_SUFFIX), np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    np.save(os.path.join(folder, name + _OFFSETS_SUFFIX), offsets)
+
+
+def load_strings(folder: str, name: str) -> list:
+    blob = load_array(os.path.join(folder, name + _STRINGS_SUFFIX)).tobytes()
+    offsets = load_array(os.path.join(folder, name + _OFFSETS_SUFFIX)).tolist()
+    return [blob[start:end].decode("utf-8") for start, end in zip(offsets[:-1], offsets[1:])]
+
+
+def load_array(file: str) -> np.ndarray:
+    try:
+        return np.load(file, mmap_mode="r")
+    except ValueError:  # empty arrays can't be memory-mapped by some numpy versions
+        return np.load(file)
+
+
+def files_stamp(files: list, **options) -> dict:
+    stamps = dict()
+    for file in files:
+        try:
+            stat = os.stat(file)
+            stamps[file] = [stat.st_mtime_ns, stat.st_size]
+        except FileNotFoundError:
+            stamps[file] = None
+    return dict(files=stamps, **options)
+
+
+def save_columns(folder: str, columns: dict, stamp: dict = None):
+    shutil.rmtree(folder, ignore_errors=True)
+    os.makedirs(folder)
+    for name, column in columns.items():
+        if isinstance(column, list):
+            save_strings(folder, name, column)
+        else:
+            np.save(os.path.join(folder, name + _COLUMN_SUFFIX), np.asarray(column))
+    if stamp is not None:
+        with open(os.path.join(folder, _STAMP_FILE), "w") as f:
+            json.dump(stamp, f)
+
+
+def load_columns(folder: str, stamp: dict = None) -> dict:
+    # None when the columns are missing or were saved from other results files
+    if stamp is not None:
+        try:
+            with open(os.path.join(folder, _STAMP_FILE), "r") as f:
+                if json.load(f) != stamp:
+                    return None
+        except (FileNotFoundError, ValueError):
+            return None
+    elif not os.path.exists(folder):
+        return None
+    columns = dict()
+    for file in os.listdir(folder):
+        if file.endswith(_STRINGS_SUFFIX):
+            name = file.removesuffix(_STRINGS_SUFFIX)
+            columns[name] = load_strings(folder, name)
+        elif not file.endswith(_OFFSETS_SUFFIX) and file.endswith(_COLUMN_SUFFIX):
+            columns[file.removesuffix(_COLUMN_SUFFIX)] = load_array(os.path.join(folder, file))
+    return columns
+
+
+def to_columns(table: list) -> dict:
+    # a list of value or string sequences to columns named by their position
+    return {
+        str(i): list(c) if len(c) and isinstance(c[0], str) else np.asarray(c) for i, c in enumerate(table)
+    }
+
+
+def from_columns(columns: dict) -> list:
+    return [
+        c if isinstance(c, list) else c.tolist() for _, c in sorted(columns.items(), key=lambda e: int(e[0]))
+    ]
+
+
+class StoredResults:
+    # a results file of a tool, the charts data parsed from it is saved as columns next to it
+    # and loaded while the file is unchanged, so cached runs don't parse it again
+    def __init__(self, file: str, read: callable):
+        self.file = file
+        self._read = read
+
+    def load(self):
+        return self._read(self.file)
+
+    def parsed(self, name: str, args: tuple, parse: callable, encode: callable, decode: callable):
+        folder = os.path.join(self.file + ".columns", name)
+        stamp = files_stamp([self.file], args=repr(args))
+        columns = load_columns(folder, stamp)
+        if columns is None:
+            columns = to_columns(encode(parse(self.load(), *args)))
+            save_columns(folder, columns, stamp)
+        return decode(from_columns(columns))
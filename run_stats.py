@@ -0,0 +1,84 @@
+import contextlib
+import json
+import resource
+import sys
+import time
+from collections import defaultdict
+
+# Operational counters of one run. Durations are exclusive: a timer started inside another one
+# pauses it, so the phases (backend, parse, scoring, render) add up without double counting.
+PHASES = ["backend", "parse", "scoring", "render"]
+
+counters = defaultdict(int)
+durations = defaultdict(float)
+_stack = []
+_start = time.perf_counter()
+
+
+@contextlib.contextmanager
+def timed(phase: str, name: str):
+    # also a decorator of functions
+    now = time.perf_counter()
+    if _stack:
+        durations[_stack[-1][0]] += now - _stack[-1][1]
+    _stack.append(((phase, name), now))
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        key, started = _stack.pop()
+        durations[key] += now - started
+        if _stack:
+            _stack[-1] = (_stack[-1][0], now)
+
+
+def count(name: str, value=1):
+    counters[name] += value
+
+
+def peak_rss_bytes(who=resource.RUSAGE_SELF) -> int:
+    # ru_maxrss is in KB on linux and in bytes on macOS
+    return resource.getrusage(who).ru_maxrss * (1 if sys.platform == "darwin" else 1024)
+
+
+def snapshot(labels: dict) -> dict:
+    seconds = time.perf_counter() - _start
+    stats = dict(labels, seconds=round(seconds, 3))
+    stats.update(counters)
+    stats["files_skipped"] = max(0, counters["files_total"] - counters["files_analyzed"])
+    stats["files_per_second"] = round(counters["files_analyzed"] / seconds, 2) if seconds else 0.0
+    lookups = counters["cache_hits"] + counters["cache_misses"]
+    stats["cache_hit_rate"] = round(counters["cache_hits"] / lookups, 4) if lookups else None
+    for phase in PHASES:
+        by_name = {name: round(d, 3) for (p, name), d in sorted(durations.items()) if p == phase}
+        stats[f"{phase}_seconds"] = dict(by_name, total=round(sum(by_name.values()), 3))
+    stats["peak_rss_bytes"] = peak_rss_bytes()
+    stats["children_peak_rss_bytes"] = peak_rss_bytes(resource.RUSAGE_CHILDREN)
+    return stats
+
+
+def prometheus_text(stats: dict, prefix="metrics_preview_") -> str:
+    # textfile collector format, the string values are labels of every sample
+    labels = [f'{k}="{v}"' for k, v in stats.items() if isinstance(v, str)]
+
+    def sample(key, value, *extra):
+        return f"{prefix}{key}{{{','.join(labels + list(extra))}}} {value}"
+
+    lines = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            lines.append(f"# TYPE {prefix}{key} gauge")
+            lines.extend(sample(key, v, f'name="{n}"') for n, v in value.items() if n != "total")
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            lines.append(f"# TYPE {prefix}{key} gauge")
+            lines.append(sample(key, value))
+    return "\n".join(lines) + "\n"
+
+
+def save(file: str, labels: dict, prometheus=False):
+    stats = snapshot(labels)
+    with open(file, "w") as f:
+        if prometheus:
+            f.write(prometheus_text(stats))
+        else:
+            json.dump(stats, f, indent=2)
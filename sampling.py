@@ -0,0 +1,70 @@
+import os
+
+import numpy as np
+
+import calculate_mi as cm
+
+_MI_COMPONENTS = ["mi", "loc", "c", "red", "dep", "cov"]
+_ROW_SIZE = len(cm.MICounts().to_row())
+
+
+def stratum(file: str, lines: int) -> str:
+    # top level directory and a size class growing by 4 times
+    parts = file.split(os.sep, 1)
+    directory = parts[0] if len(parts) > 1 else "."
+    return f"{directory}:{int(np.log2(max(lines, 1))) // 2}"
+
+
+class Sampler:
+    def __init__(self, lines: dict, seed=None):
+        self.files = list(lines)
+        self._index = {f: i for i, f in enumerate(self.files)}
+        self._rng = np.random.default_rng(seed)
+        _, self._strata = np.unique([stratum(f, n) for f, n in lines.items()], return_inverse=True)
+        self._sizes = np.bincount(self._strata)
+
+    def order(self) -> list:
+        # random order of files, every prefix of it keeps the strata proportions
+        by_stratum = self._rng.permutation(len(self.files))
+        by_stratum = by_stratum[np.argsort(self._strata[by_stratum], kind="stable")]
+        ranks = np.arange(len(self.files)) - np.repeat(np.cumsum(self._sizes) - self._sizes, self._sizes)
+        keys = np.empty(len(self.files))
+        keys[by_stratum] = (ranks + self._rng.random(len(self.files))) / self._sizes[self._strata[by_stratum]]
+        return [self.files[i] for i in np.argsort(keys, kind="stable").tolist()]
+
+    def _weights(self, strata: np.ndarray) -> np.ndarray:
+        # every sampled file stands for N_h / n_h files of its stratum, not sampled strata are spread evenly
+        sampled = np.bincount(strata, minlength=len(self._sizes))
+        weights = np.where(sampled > 0, self._sizes / np.maximum(sampled, 1), 0.0)
+        return weights * self._sizes.sum() / self._sizes[sampled > 0].sum()
+
+    def _resample(self, strata: np.ndarray) -> np.ndarray:
+        # indices of a bootstrap resample drawn with replacement inside every stratum,
+        # fully analyzed strata are known exactly and kept as they are,
+        # a single file can't show the variance of its stratum, so it's drawn from the whole sample
+        members = np.argsort(strata, kind="stable")
+        sampled = np.bincount(strata, minlength=len(self._sizes))
+        starts = np.cumsum(sampled) - sampled
+        draws = np.floor(self._rng.random(len(strata)) * sampled[strata]).astype(int)
+        resample = members[starts[strata] + draws]
+        single = sampled[strata] == 1
+        resample[single] = self._rng.integers(len(strata), size=single.sum())
+        census = sampled[strata] == self._sizes[strata]
+        return np.where(census, np.arange(len(strata)), resample)
+
+    def estimate(self, counts_by_file: dict, resamples=200, confidence=0.95):
+        # extrapolated package MIStats and the bootstrap confidence interval of every component
+        if not counts_by_file:
+            raise ValueError("no files in the sample")
+        rows = np.array([c.to_row() for c in counts_by_file.values()], dtype=float).reshape(-1, _ROW_SIZE)
+        strata = self._strata[[self._index[f] for f in counts_by_file]]
+        weights = self._weights(strata)[strata]
+        stats = cm.mi_counts_stats(cm.MICounts.from_row((weights @ rows).tolist()))
+        bootstrap = [
+            cm.mi_counts_stats(cm.MICounts.from_row((weights @ rows[self._resample(strata)]).tolist()))
+            for _ in range(resamples)
+        ]
+        values = np.array([[getattr(s, c) for c in _MI_COMPONENTS] for s in bootstrap])
+        tail = 50 * (1 - confidence)
+        low, high = np.percentile(values, [tail, 100 - tail], axis=0).round(2).tolist()
+        return stats, dict(zip(_MI_COMPONENTS, zip(low, high)))
@@ -0,0 +1,95 @@
+import contextlib
+import hashlib
+import json
+import os
+import os.path
+import tempfile
+
+# Results are stored by the hash of the analyzed file content and the tool identity (name, version, options),
+# so identical files are analyzed once for any checkout, branch or project sharing the cache folder.
+# Entries are written atomically, every hit refreshes the entry time, the least recently used are evicted.
+DEFAULT_SIZE_MB = 1024
+
+
+def file_hash(file: str) -> str:
+    with open(file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+class SharedCache:
+    def __init__(self, folder: str, max_bytes: int):
+        self.folder = folder
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(folder, exist_ok=True)
+
+    @staticmethod
+    def key(tool_id: list, content_hash: str) -> str:
+        return hashlib.sha256(json.dumps([tool_id, content_hash]).encode("utf-8")).hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.folder, key[:2], key + ".json")
+
+    def get(self, key: str) -> dict:
+        # the entry is {"value": value}, so a tool giving no result for a file is cached too
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                entry = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):  # missing, evicted meanwhile or broken entry
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, value):
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump({"value": value}, f)
+            os.replace(tmp, path)
+        except BaseException:
+            with contextlib.suppress(FileNotFoundError):
+                os.unlink(tmp)
+            raise
+
+    def evict(self) -> int:
+        entries = []
+        for root, _, files in os.walk(self.folder):
+            for file in files:
+                # temporary files are entries being written by another process
+                if file.endswith(".tmp"):
+                    continue
+                try:
+                    stat = os.stat(os.path.join(root, file))
+                except FileNotFoundError:
+                    continue
+                entries.append((stat.st_mtime, stat.st_size, os.path.join(root, file)))
+        total = sum(size for _, size, _ in entries)
+        evicted = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+                evicted += 1
+            except FileNotFoundError:
+                pass
+            total -= size
+        return evicted
+
+    def cached(self, tool_id: list, path: str, files: list, analyze: callable) -> dict:
+        # results by file, analyze(missed files) -> results by file is called only for files not in the cache
+        hashes = {f: file_hash(os.path.join(path, f)) for f in files}
+        entries = {f: self.get(self.key(tool_id, h)) for f, h in hashes.items()}
+        missed = [f for f, e in entries.items() if e is None]
+        if missed:
+            fresh = analyze(missed)
+            for f in missed:
+                entries[f] = {"value": fresh.get(f)}
+                self.put(self.key(tool_id, hashes[f]), fresh.get(f))
+        return {f: e["value"] for f, e in entries.items() if e["value"] is not None}
@@ -0,0 +1,104 @@
+import ast
+import io
+import tokenize
+
+from docstr_coverage.coverage import _analyze_docstrings_on_node
+from docstr_coverage.ignore_config import IgnoreConfig
+from docstr_coverage.result_collection import File, FileStatus
+from docstr_coverage.visitor import DocStringCoverageVisitor
+from flake8.defaults import NOQA_INLINE_REGEXP
+from flake8_cognitive_complexity.checker import CognitiveComplexityChecker
+from flake8_cohesion.extension import CohesionChecker
+from radon.cli.tools import cc_to_dict, raw_to_dict
+from radon.complexity import cc_visit, sorted_results
+from radon.raw import analyze
+
+import import_graph
+
+# The analyzers of the final results run in process on a source text, without files or subprocesses,
+# and give results in the same format as the tools json output and docstr-coverage api.
+
+
+def radon_cc(source: str) -> list:
+    return [cc_to_dict(block) for block in sorted_results(cc_visit(source))]
+
+
+def radon_raw(source: str) -> dict:
+    return raw_to_dict(analyze(source))
+
+
+class _Cognitive(CognitiveComplexityChecker):
+    max_cognitive_complexity = -1
+
+
+class _Cohesion(CohesionChecker):
+    _cohesion_below = 100.0
+
+
+def _noqa(line: str, code: str) -> bool:
+    match = NOQA_INLINE_REGEXP.search(line)
+    return match is not None and (not match.group("codes") or code in match.group("codes"))
+
+
+def flake8_entries(filename: str, source: str, tree: ast.AST) -> list:
+    # cognitive complexity and cohesion entries as flake8 reports them with the options of "final"
+    lines = source.splitlines(keepends=True)
+    entries = []
+    for checker in (_Cognitive(tree, filename), _Cohesion(tree)):
+        for line_number, column, message, _ in checker.run():
+            code, text = message.split(" ", 1)
+            physical_line = lines[line_number - 1] if line_number <= len(lines) else ""
+            if _noqa(physical_line, code):
+                continue
+            entries.append(
+                dict(
+                    code=code,
+                    filename=filename,
+                    line_number=line_number,
+                    column_number=column + 1,
+                    text=text,
+                    physical_line=physical_line,
+                )
+            )
+    return sorted(entries, key=lambda e: (e["line_number"], e["column_number"]))
+
+
+class _SourceVisitor(DocStringCoverageVisitor):
+    def __init__(self, filename: str, data: bytes):
+        # the same state as the base visitor reading the file
+        self.filename = filename
+        self.tokens = list(tokenize.tokenize(io.BytesIO(data).readline))
+        self.symbol_count = 0
+        self.tree = []
+
+
+def docstring_counts(filename: str, data: bytes, tree: ast.AST) -> list:
+    # [needed, found] as docstr_coverage.analyze counts them with the default options
+    visitor = _SourceVisitor(filename, data)
+    visitor.visit(tree)
+    has_docstring, is_empty, _, symbols = visitor.tree[0]
+    result = File()
+    if is_empty:
+        result.status = FileStatus.EMPTY
+    else:
+        result.collect_module_docstring(bool(has_docstring))
+    for symbol in symbols:
+        _analyze_docstrings_on_node("", symbol, filename, IgnoreConfig(), result)
+    count = result.count_aggregate()
+    return [count.needed, count.found]
+
+
+def analyze_source(filename: str, data: bytes) -> dict:
+    # results of every tool for one file, None for a file python can't parse
+    source = data.decode("utf-8", "replace")
+    try:
+        tree = ast.parse(data)
+    except (SyntaxError, ValueError):
+        return None
+    return dict(
+        cc=radon_cc(source),
+        raw=radon_raw(source),
+        flake8=flake8_entries(filename, source, tree),
+        docstrings=docstring_counts(filename, data, tree),
+        imports=import_graph.source_imports(tree),
+    )
@@ -0,0 +1,93 @@
+import json
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = " \t\n\r"
+_NUMBER_START = "-0123456789"
+_NUMBER = "0123456789.eE+-"
+
+
+def read_chunks(stream, size: int = 1 << 16):
+    return iter(lambda: stream.read(size), "")
+
+
+class _Buffer:
+    def __init__(self, chunks):
+        self._chunks = iter(chunks)
+        self.text = ""
+        self.pos = 0
+        self.finished = False
+        # chunks received but not joined to the text yet, and their size
+        self._pending = []
+        self._pending_size = 0
+
+    def more(self, join=True) -> bool:
+        if self.finished:
+            return False
+        chunk = next(self._chunks, None)
+        if chunk is None:
+            self.finished = True
+            self._join()
+            return False
+        self._pending.append(chunk)
+        self._pending_size += len(chunk)
+        if join:
+            self._join()
+        return True
+
+    def _join(self):
+        # drop consumed text, so the buffer holds only the member being decoded
+        self.text = self.text[self.pos :] + "".join(self._pending)
+        self.pos = 0
+        self._pending = []
+        self._pending_size = 0
+
+    def skip_whitespace(self):
+        while True:
+            while self.pos < len(self.text) and self.text[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.text) or not self.more():
+                return
+
+    def expect(self, chars: str) -> str:
+        self.skip_whitespace()
+        if self.pos >= len(self.text) or self.text[self.pos] not in chars:
+            raise json.JSONDecodeError(f"Expecting one of {chars!r}", self.text, self.pos)
+        self.pos += 1
+        return self.text[self.pos - 1]
+
+    def decode(self):
+        self.skip_whitespace()
+        retry_size = 0
+        while True:
+            if self.finished or len(self.text) - self.pos + self._pending_size >= retry_size:
+                self._join()
+                try:
+                    value, end = _decoder.raw_decode(self.text, self.pos)
+                    # a number cut at the end of the buffer may continue in the next chunk
+                    is_number = self.text[self.pos] in _NUMBER_START
+                    number_ended = end < len(self.text) and self.text[end] not in _NUMBER
+                    if self.finished or not is_number or number_ended:
+                        self.pos = end
+                        return value
+                except json.JSONDecodeError:
+                    if self.finished:
+                        raise
+                    # an incomplete member is decoded again once its text doubles, instead of once per chunk,
+                    # so decoding and joining take time linear in its size
+                    retry_size = 2 * (len(self.text) - self.pos)
+            self.more(join=False)
+
+
+def iter_object_items(chunks):
+    # yield (key, value) members of a top level json object as soon as every member is received
+    buffer = _Buffer(chunks)
+    buffer.expect("{")
+    buffer.skip_whitespace()
+    if buffer.text[buffer.pos : buffer.pos + 1] == "}":
+        return
+    while True:
+        key = buffer.decode()
+        buffer.expect(":")
+        yield key, buffer.decode()
+        if buffer.expect(",}") == "}":
+            return
@@ -0,0 +1,27 @@
+import batch_mi_score
+import metrics_preview as mp
+
+SIMPLE = '"""simple"""\n\n\ndef f():\n    """f"""\n    return 1\n'
+BRANCHY = (
+    "def g(x):\n" + "".join(f"    if x == {i}:\n        return {i}\n" for i in range(30)) + "    return x\n"
+)
+
+
+def test_projects_keep_their_results_in_any_manifest_order(tmp_path):
+    paths = []
+    for name, source in [("simple", SIMPLE), ("branchy", BRANCHY)]:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / "module.py").write_text(source)
+        paths.append(str(tmp_path / name))
+    output_folder = str(tmp_path / "output")
+    rows = {r["project"]: r for r in batch_mi_score.score_projects(paths, output_folder, [], False, 2)}
+    assert set(rows) == set(paths) and not any(r.get("error") for r in rows.values())
+    assert rows[paths[0]]["mi"] > rows[paths[1]]["mi"]
+    (tmp_path / "single").mkdir()
+    assert rows[paths[0]]["mi"] == mp.get_mi_stats(paths[0], str(tmp_path / "single"), []).mi
+    # the results of a project are found by its path after the manifest is reordered
+    cached = {r["project"]: r for r in batch_mi_score.score_projects(paths[::-1], output_folder, [], True, 1)}
+    assert {p: r["mi"] for p, r in cached.items()} == {p: r["mi"] for p, r in rows.items()}
+    assert batch_mi_score.project_folder(paths[0], output_folder) != batch_mi_score.project_folder(
+        paths[1], output_folder
+    )
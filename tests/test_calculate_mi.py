@@ -0,0 +1,47 @@
+import numpy as np
+import pytest
+
+import calculate_mi as cm
+
+
+def test_counts_are_added_by_name():
+    a = cm.MICounts(
+        10, cc=cm.Stats(1, 2, 3, 0), docstrings_needed=4, docstrings_found=3, coupling=cm.Stats(1)
+    )
+    b = cm.MICounts(
+        5, dup=cm.Stats(0, 1), docstrings_needed=2, docstrings_found=2, coupling=cm.Stats(0, 0, 1)
+    )
+    total = a + b
+    assert total.loc == 15
+    assert vars(total.cc) == vars(cm.Stats(1, 2, 3, 0))
+    assert vars(total.dup) == vars(cm.Stats(0, 1))
+    assert vars(total.coupling) == vars(cm.Stats(1, 0, 1))
+    assert (total.docstrings_needed, total.docstrings_found) == (6, 5)
+    assert total.to_row() == [x + y for x, y in zip(a.to_row(), b.to_row())]
+
+
+def test_vectorized_scores_equal_per_file_scores():
+    rng = np.random.default_rng(0)
+    n = 50
+    for limits in [
+        cm.loc_func_limits,
+        cm.cc_limits,
+        cm.cognitive_limits,
+        cm.cohesion_limits,
+        cm.coupling_limits,
+    ]:
+        # integer values hit the interval bounds, where the closed sides matter
+        ids = rng.integers(0, n, 2000)
+        data = rng.integers(0, 120, 2000).astype(float)
+        counts = limits.get_stats_by_id(ids, data, n)
+        scores = cm.evaluate_counts(counts)
+        for i in range(n):
+            stats = limits.get_stats(data[ids == i].tolist())
+            assert counts[i].tolist() == list(vars(stats).values())
+            assert scores[i] == pytest.approx(cm.evaluate(stats))
+
+
+def test_evaluate_counts_edge_cases():
+    rows = [cm.Stats(), cm.Stats(3), cm.Stats(1, 1, 1), cm.Stats(5, 0, 0, 1), cm.Stats(1, 0, 20)]
+    counts = np.array([list(vars(s).values()) for s in rows])
+    assert cm.evaluate_counts(counts).tolist() == pytest.approx([cm.evaluate(s) for s in rows])
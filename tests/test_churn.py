@@ -0,0 +1,72 @@
+import subprocess
+
+import churn
+
+# commits of a scripted repository: path -> content, None deletes the file, a pair renames it
+COMMITS = [
+    {"a.py": "x = 1\ny = 2\nz = 3\n", "b.py": "import a\n"},
+    {"a.py": "x = 1\ny = 20\nz = 3\nw = 4\n"},
+    # lines looking like diff headers and a missing newline at the end
+    {"b.py": "import a\n-- a/b.py\n++ b/b.py\n@@ -1 +1 @@\n", "c.py": "print(1)"},
+    {("a.py", "d.py"): "x = 1\ny = 20\nz = 3\nw = 4\nv = 5\n"},
+    {"b.py": "-- a/b.py\n++ b/b.py\n", "c.py": None},
+    {"d.py": "y = 21\nw = 4\n", "c.py": "print(2)\n"},
+    # a path with a space and an empty file, which has no hunks
+    {"a b.py": "x = 1\n", "empty.py": ""},
+    {"a b.py": "x = 1\ny = 2\n"},
+]
+
+
+def git(repo, *args):
+    return subprocess.run(["git", *args], cwd=repo, capture_output=True, text=True, check=True).stdout
+
+
+def scripted_repo(repo):
+    git(repo, "init", "-q")
+    for i, changes in enumerate(COMMITS):
+        for path, content in changes.items():
+            if isinstance(path, tuple):
+                git(repo, "mv", *path)
+                path = path[1]
+            if content is None:
+                git(repo, "rm", "-q", path)
+            else:
+                (repo / path).write_text(content)
+                git(repo, "add", path)
+        git(repo, "-c", "user.name=a", "-c", "user.email=a@a", "commit", "-q", "-m", f"commit {i}")
+
+
+def test_hunks_equal_numstat(tmp_path):
+    scripted_repo(tmp_path)
+    log = ["log", "--first-parent", "--reverse", "-M", "--format=%x00%H"]
+    patches = git(tmp_path, *log, "-p", "-U0", "--no-color").splitlines(keepends=True)
+    from_hunks, commit = [], None
+    for diff in churn._file_diffs(iter(patches)):
+        if diff is None:
+            commit = []
+            from_hunks.append(commit)
+        else:
+            commit.append((sum(h[2] for h in diff[2]), sum(h[1] for h in diff[2])))
+    from_numstat = [
+        [tuple(int(n) for n in line.split("\t")[:2]) for line in c.splitlines()[1:] if line]
+        for c in git(tmp_path, *log, "--numstat").split("\0")[1:]
+    ]
+    # a rename with unchanged content has no hunks and no numstat lines changed
+    assert [sorted(c) for c in from_hunks] == [sorted(c) for c in from_numstat]
+
+
+def test_churn_index_follows_the_current_files(tmp_path):
+    scripted_repo(tmp_path)
+    index = churn.ChurnIndex()
+    assert index.update(str(tmp_path)) == len(COMMITS)
+    assert sorted(index.files) == ["a b.py", "b.py", "c.py", "d.py", "empty.py"]
+    for path in index.files:
+        assert len(index.line_changes(path, 1, 1000)) == (tmp_path / path).read_text().count("\n")
+    # the commits of a renamed file are followed, a deleted and added again file starts over
+    for path in ["a b.py", "b.py", "d.py", "empty.py"]:
+        follow = git(tmp_path, "log", "--first-parent", "--follow", "--format=%H", "--", path).split()
+        assert index.commits(path) == len(follow)
+    assert [index.commits(p) for p in ["a b.py", "b.py", "c.py", "d.py", "empty.py"]] == [2, 3, 1, 4, 1]
+    assert index.line_changes("a b.py", 1, 2) == [1, 1]
+    # "y = 21" replaces a line changed in 2 commits, "w = 4" is the line added by the second commit
+    assert index.line_changes("d.py", 1, 2) == [3, 1]
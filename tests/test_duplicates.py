@@ -0,0 +1,103 @@
+import duplicates
+
+BLOCK = """
+def {name}(values, limit):
+    result = []
+    for i, value in enumerate(values):
+        if value > limit and i % 2 == 0:
+            result.append(value * 2 + 1)
+        elif value < -limit:
+            result.append(-value)
+        else:
+            result.append(0)
+    return sorted(result, reverse=True)
+"""
+
+UNIQUE = """
+class Point:
+    def __init__(self, x, y):
+        self.x = x
+        self.y = y
+
+    def norm(self):
+        return (self.x ** 2 + self.y ** 2) ** 0.5
+"""
+
+
+def write(path, files):
+    for name, source in files.items():
+        (path / name).write_text(source)
+
+
+def test_duplicated_block_is_found(tmp_path):
+    write(
+        tmp_path,
+        {
+            "a.py": "import os\n" + BLOCK.format(name="first"),
+            "b.py": UNIQUE + BLOCK.format(name="second"),
+            "c.py": "import sys\n\nprint(sys.argv)\n",
+        },
+    )
+    files = ["a.py", "b.py", "c.py"]
+    index = duplicates.DuplicatesIndex()
+    for name in files:
+        index.add(name, (tmp_path / name).read_text())
+    lines = dict(zip(files, index.duplicated_lines()))
+    # the block is found with renamed identifiers, and nothing out of it
+    a_block, b_block = set(range(3, 13)), set(range(10, 20))
+    assert lines["a.py"] <= a_block and len(lines["a.py"]) >= 8
+    assert lines["b.py"] <= b_block and len(lines["b.py"]) >= 8
+    assert lines["c.py"] == set()
+
+
+def test_no_duplicates_in_distinct_files(tmp_path):
+    write(tmp_path, {"a.py": BLOCK.format(name="first"), "b.py": UNIQUE})
+    assert duplicates.find_duplicates(str(tmp_path), []) == {"a.py": 0.0, "b.py": 0.0}
+
+
+def test_percentages_do_not_depend_on_file_order(tmp_path):
+    write(tmp_path, {"a.py": UNIQUE + BLOCK.format(name="f"), "b.py": BLOCK.format(name="g"), "c.py": UNIQUE})
+    files = ["a.py", "b.py", "c.py"]
+    forward = duplicates.find_duplicates(str(tmp_path), [], files)
+    assert forward == duplicates.find_duplicates(str(tmp_path), [], files[::-1])
+    assert forward["b.py"] >= 80.0 and forward["c.py"] >= 80.0
+
+
+def test_spilled_index_has_the_same_percentages(tmp_path):
+    sources = {
+        "a.py": UNIQUE + BLOCK.format(name="f"),
+        "b.py": BLOCK.format(name="g") + BLOCK.format(name="h"),
+        "c.py": UNIQUE,
+        "d.py": "import sys\n",
+        "e.py": "",
+    }
+    write(tmp_path, sources)
+    index = duplicates.SpilledDuplicatesIndex(str(tmp_path / "duplicates.sqlite"))
+    for name, source in sources.items():
+        index.add(name, source)
+    # percentages are read back for any batch of files
+    spilled = {**index.percentages(["c.py", "a.py"]), **index.percentages(["b.py", "d.py", "e.py"])}
+    index.close()
+    assert spilled == duplicates.find_duplicates(str(tmp_path), [])
+    assert spilled["a.py"] > 0.0 and spilled["d.py"] == 0.0
+
+
+def test_updated_index_matches_a_new_one(tmp_path):
+    index = duplicates.DuplicatesIndex()
+    sources = {"a.py": UNIQUE + BLOCK.format(name="f"), "b.py": BLOCK.format(name="g"), "c.py": UNIQUE}
+    for name, source in sources.items():
+        index.add(name, source)
+    assert index.percentages()["a.py"] > 0.0
+    # the clone of a.py is removed from b.py, the one of c.py is added to it, then c.py is removed
+    for changes in [{"b.py": UNIQUE}, {"c.py": None}, {"b.py": BLOCK.format(name="h")}]:
+        for name, source in changes.items():
+            if source is None:
+                index.remove(name)
+                del sources[name]
+            else:
+                index.add(name, source)
+                sources[name] = source
+        fresh = duplicates.DuplicatesIndex()
+        for name, source in sources.items():
+            fresh.add(name, source)
+        assert index.percentages() == fresh.percentages()
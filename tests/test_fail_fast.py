@@ -0,0 +1,53 @@
+import shutil
+from pathlib import Path
+
+import pytest
+
+import calculate_mi as cm
+import duplicates
+import import_graph
+import metrics_preview as mp
+
+REPO = Path(__file__).resolve().parent.parent
+# modules of this repository make a project of files with different sizes and scores
+SOURCES = ["duplicates.py", "top_k.py", "mi_tree.py", "sampling.py", "stream_json.py", "import_graph.py"]
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    for name in SOURCES:
+        shutil.copy(REPO / name, tmp_path / "pkg" / name)
+    return tmp_path
+
+
+def test_bounds_bracket_the_full_score(project, tmp_path_factory):
+    output_folder = str(tmp_path_factory.mktemp("output"))
+    lines = mp.source_lines(str(project), [])
+    files = sorted(lines, key=lambda f: lines[f], reverse=True)
+    counts_by_file = mp.get_files_counts(str(project), files, output_folder, [])
+    total = sum(counts_by_file.values(), cm.MICounts())
+    total.dup = cm.duplicate_limits.get_stats(list(duplicates.find_duplicates(str(project), []).values()))
+    full = cm.mi_counts_stats(total)
+    counts, remaining_loc = cm.MICounts(), sum(lines.values())
+    for analyzed, file in enumerate(files, 1):
+        counts += counts_by_file[file]
+        remaining_loc -= lines[file]
+        lower, upper = cm.mi_counts_bounds(counts, remaining_loc, analyzed < len(files), dup_known=False)
+        for component in vars(full):
+            assert getattr(lower, component) <= getattr(full, component) <= getattr(upper, component)
+    # with every file analyzed and the duplicates known both bounds are the score
+    assert [vars(s) for s in cm.mi_counts_bounds(total)] == [vars(full), vars(full)]
+
+
+def test_bounded_score_is_the_full_score(project, tmp_path_factory, monkeypatch):
+    full = mp.get_mi_stats(str(project), str(tmp_path_factory.mktemp("full")), [])
+    graphs = []
+    project_modules = import_graph.project_modules
+    monkeypatch.setattr(
+        import_graph, "project_modules", lambda *a: graphs.append(project_modules(*a)) or graphs[-1]
+    )
+    # one source file per batch, the modules of the project are found once
+    bounded = mp.get_mi_stats_bounded(str(project), str(tmp_path_factory.mktemp("bounded")), [], 1)
+    assert vars(bounded) == vars(full)
+    assert len(graphs) == 1
@@ -0,0 +1,73 @@
+import numpy as np
+
+import function_records
+
+CC = {
+    "./a.py": [
+        {"type": "function", "name": "f", "lineno": 1, "endline": 5, "complexity": 3},
+        {"type": "class", "name": "Point", "lineno": 8, "endline": 14, "complexity": 2},
+        {
+            "type": "method",
+            "name": "norm",
+            "classname": "Point",
+            "lineno": 10,
+            "endline": 14,
+            "complexity": 1,
+        },
+        {"type": "function", "name": "g", "lineno": 16, "endline": 18, "complexity": 1},
+    ],
+    "./broken.py": {"error": "invalid syntax"},
+}
+FLAKE8 = {
+    "./a.py": [
+        {"code": "CCR001", "line_number": 1, "text": "Cognitive complexity is too high (9 > 7)"},
+        {"code": "H601", "line_number": 8, "text": "class has low (40.00%) cohesion"},
+        # a line without a function of radon cc
+        {"code": "CCR001", "line_number": 30, "text": "Cognitive complexity is too high (12 > 7)"},
+        {"code": "E501", "line_number": 16, "text": "line too long (120 > 110 characters)"},
+    ],
+}
+HAL = {
+    "a.py": {
+        "functions": {
+            "f": {"volume": 10.0, "difficulty": 2.0, "effort": 20.0},
+            "norm": {"volume": 5.0, "difficulty": 1.0, "effort": 5.0},
+            "only_hal": {"volume": 1.0, "difficulty": 1.0, "effort": 1.0},
+        }
+    }
+}
+
+
+def record(records: dict, name: str) -> dict:
+    i = records["names"].index(name)
+    return {column: values[i] for column, values in records.items() if column not in ("files", "names")}
+
+
+def test_function_in_every_tool_is_joined():
+    records = function_records.function_records(CC, FLAKE8, HAL)
+    assert records["files"] == ["a.py"] * 3 and records["names"] == ["f", "Point.norm", "g"]
+    f = record(records, "f")
+    assert (f["lineno"], f["endline"], f["loc"], f["cc"], f["cognitive"]) == (1, 5, 5, 3, 9)
+    assert np.isnan(f["cohesion"])
+    assert (f["volume"], f["difficulty"], f["effort"]) == (10.0, 2.0, 20.0)
+    norm = record(records, "Point.norm")
+    assert (norm["cohesion"], norm["volume"], norm["effort"]) == (40.0, 5.0, 5.0)
+    assert np.isnan(norm["cognitive"])
+    assert np.isfinite([f["mi"], norm["mi"]]).all()
+
+
+def test_function_only_in_radon_cc_has_nan_for_the_other_tools():
+    records = function_records.function_records(CC, FLAKE8, HAL)
+    g = record(records, "g")
+    assert (g["cc"], g["loc"]) == (1, 3)
+    assert all(np.isnan(g[column]) for column in ["cognitive", "cohesion", "volume", "difficulty", "effort"])
+    assert np.isfinite(g["mi"])
+    # without hal results every function has nan hal values
+    records = function_records.function_records(CC, FLAKE8)
+    assert np.isnan(records["volume"]).all() and record(records, "f")["cognitive"] == 9
+
+
+def test_repeated_function_name_gets_no_hal_values():
+    cc = {"a.py": [dict(CC["./a.py"][0], lineno=line, endline=line + 1) for line in (1, 3)]}
+    records = function_records.function_records(cc, {}, HAL)
+    assert records["names"] == ["f", "f"] and np.isnan(records["volume"]).all()
@@ -0,0 +1,33 @@
+import json
+import re
+
+import numpy as np
+
+import entities
+import html_report
+
+
+def report_meta(text: str) -> dict:
+    block = re.search(r'<script type="application/json" id="meta">(.*?)</script>', text).group(1)
+    return json.loads(block)
+
+
+def function_entities():
+    values = np.array([3.0, np.nan, 7.0, np.inf, 1.0])
+    return entities.Entities("Functions", ["value", "name"], values, lambda i: [values[i], f"f{i}"])
+
+
+def test_non_finite_values_are_null():
+    report = html_report.Report("title")
+    report.add(function_entities())
+    chart = report_meta(report.render())["charts"][0]
+    assert chart["values"] == [None, 7.0, 3.0, 1.0, None]
+
+
+def test_top_keeps_the_worst_rows():
+    report = html_report.Report("title", top=2)
+    report.add(function_entities())
+    text = report.render()
+    assert report_meta(text)["charts"][0]["values"] == [None, 7.0]
+    rows = json.loads(re.search(r'id="c0-0">(.*?)</script>', text).group(1))
+    assert [row[1] for row in rows] == ["f3", "f2"]
@@ -0,0 +1,114 @@
+import numpy as np
+import pytest
+
+import calculate_mi as cm
+import import_graph
+
+# a -> b -> c -> a and sub <-> sub.d are cycles, the other imports only add fan-in
+PROJECT = {
+    "pkg/__init__.py": "from . import a\n",
+    "pkg/a.py": "import os\nfrom .b import f\nfrom ... import beyond_the_root\n",
+    "pkg/b.py": "from pkg import c\n",
+    "pkg/c.py": "import pkg.a\n",
+    "pkg/sub/__init__.py": "from .d import *\n",
+    "pkg/sub/d.py": "from .. import a, b\nfrom ..c import *\nimport pkg.sub\n",
+    # a missing module resolves to its longest existing parent
+    "main.py": "import json\nimport pkg.sub.d as d\nfrom pkg.missing import x\n",
+}
+IMPORTS = {
+    "main.py": ["pkg/__init__.py", "pkg/sub/d.py"],
+    "pkg/__init__.py": ["pkg/a.py"],
+    "pkg/a.py": ["pkg/b.py"],
+    "pkg/b.py": ["pkg/c.py"],
+    "pkg/c.py": ["pkg/a.py"],
+    "pkg/sub/__init__.py": ["pkg/sub/d.py"],
+    "pkg/sub/d.py": ["pkg/a.py", "pkg/b.py", "pkg/c.py", "pkg/sub/__init__.py"],
+}
+FAN_IN = {"main.py": 0, "pkg/__init__.py": 1, "pkg/a.py": 3, "pkg/b.py": 2, "pkg/c.py": 2}
+FAN_IN.update({"pkg/sub/__init__.py": 1, "pkg/sub/d.py": 2})
+CYCLES = [["pkg/a.py", "pkg/b.py", "pkg/c.py"], ["pkg/sub/__init__.py", "pkg/sub/d.py"]]
+
+
+@pytest.fixture
+def project(tmp_path):
+    for file, source in PROJECT.items():
+        (tmp_path / file).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / file).write_text(source)
+    return tmp_path
+
+
+def test_imports_fan_in_fan_out_and_cycles(project):
+    graph = import_graph.find_imports(str(project), [])
+    assert {f: graph.imports(f) for f in graph.files()} == IMPORTS
+    assert {f: graph.fan_in(f) for f in graph.files()} == FAN_IN
+    assert {f: graph.fan_out(f) for f in graph.files()} == {f: len(i) for f, i in IMPORTS.items()}
+    assert graph.cycles() == CYCLES
+    assert import_graph.files_coupling(str(project), ["pkg/sub/d.py", "main.py"], []) == {
+        "pkg/sub/d.py": 4,
+        "main.py": 2,
+    }
+
+
+def test_batches_share_the_project_modules(project):
+    graph = import_graph.project_modules(str(project), [])
+    files = sorted(PROJECT)
+    coupling = dict()
+    for start in range(0, len(files), 3):
+        coupling.update(import_graph.files_coupling(str(project), files[start : start + 3], [], graph))
+    assert coupling == {f: len(i) for f, i in IMPORTS.items()}
+
+
+def test_project_package_imports_itself_by_folder_name(project):
+    (project / "__init__.py").write_text("")
+    (project / "pkg" / "b.py").write_text(f"from {project.name}.pkg import c\n")
+    graph = import_graph.find_imports(str(project), [])
+    assert graph.imports("pkg/b.py") == ["pkg/c.py"]
+    assert graph.cycles()[0] == CYCLES[0]
+
+
+def test_removed_and_added_files_resolve_again(project):
+    graph = import_graph.find_imports(str(project), [])
+    graph.remove_file("pkg/c.py")
+    # "from pkg import c" falls back to the package, which imports a, "from ..c import *" too
+    assert graph.cycles() == [["pkg/__init__.py", "pkg/a.py", "pkg/b.py"], CYCLES[1]]
+    assert graph.imports("pkg/b.py") == ["pkg/__init__.py"]
+    assert graph.imports("pkg/sub/d.py") == ["pkg/__init__.py", "pkg/a.py", "pkg/b.py", "pkg/sub/__init__.py"]
+    graph.set_imports("pkg/c.py", import_graph.file_imports(str(project), "pkg/c.py"))
+    assert graph.to_dict() == import_graph.find_imports(str(project), []).to_dict()
+
+
+def test_long_cycle_and_self_import():
+    # the iterative Tarjan's algorithm doesn't recurse, and a file importing itself isn't a cycle
+    n = 5000
+    files = [f"m{i}.py" for i in range(n)]
+    graph = import_graph.ImportGraph(files)
+    for i, file in enumerate(files):
+        graph.set_imports(file, [[0, f"m{(i + 1) % n}", []], [0, f"m{i}", []]])
+    assert graph.cycles() == [sorted(files)]
+    assert all(graph.fan_in(f) == graph.fan_out(f) == 1 for f in files)
+
+
+def test_no_coupling_keeps_the_score_without_it():
+    # before coupling the dependence score was the cohesion score alone
+    rng = np.random.default_rng(0)
+    for _ in range(20):
+        cohesion = rng.integers(0, 101, rng.integers(0, 5)).tolist()
+        old_dep = round(cm.cohesion_limits.score(cohesion), 2)
+        args = [300, [10, 40], [300], [1, 12], [0, 9], [], cohesion, 50.0]
+        assert cm.mi_package_stats(*args).dep == old_dep
+        assert cm.mi_file_stats(300, [10, 40], [1, 12], [0, 9], cohesion, 50.0).dep == old_dep
+        assert cm.dependence_complex(cohesion) == cm.cohesion_limits.score(cohesion)
+        ids = np.zeros(len(cohesion), dtype=int)
+        no_coupling = (np.array([], dtype=int), np.array([]))
+        files = cm.mi_files_stats(
+            1,
+            (np.array([0]), np.array([300])),
+            (np.array([0, 0]), np.array([10, 40])),
+            (np.array([0, 0]), np.array([1, 12])),
+            (np.array([0, 0]), np.array([0, 9])),
+            (ids, np.array(cohesion, dtype=float)),
+            [50.0],
+            no_coupling,
+            no_coupling,
+        )
+        assert files[0].dep == old_dep
@@ -0,0 +1,66 @@
+import subprocess
+import sys
+
+import pytest
+
+import metrics_preview as mp
+
+
+def python(code: str) -> list:
+    return [sys.executable, "-c", code]
+
+
+def test_pipe_reads_tool_json():
+    assert mp.read_pipe_dict(python("print('{\"a.py\": [1, 2]}')")) == {"a.py": [1, 2]}
+
+
+@pytest.mark.parametrize("code", ["import sys; print('{\"a\": 1}'); sys.exit(3)", "import sys; sys.exit(2)"])
+def test_pipe_raises_on_tool_failure(code):
+    with pytest.raises(subprocess.CalledProcessError):
+        mp.read_pipe_dict(python(code))
+
+
+@pytest.mark.parametrize(
+    "argv, expected",
+    [
+        (["path", "final"], ["path"]),
+        (["-o", "out", "--pipe", "path", "radon", "-c", "cc", "hal"], ["-o", "out", "--pipe", "path"]),
+        # the tool name given as a value of options
+        (["-p", "final", "final", "final", "-c", "mi"], ["-p", "final", "final"]),
+        (["path", "history", "--rev", "history"], ["path"]),
+    ],
+)
+def test_global_arguments_end_at_the_tool(argv, expected):
+    assert mp.global_arguments(argv) == expected
+
+
+@pytest.mark.parametrize(
+    "argv, commands",
+    [
+        (["final"], ["cc", "cog", "coh", "doc", "dup", "imp", "loc", "mi", "tree"]),
+        (["final", "-c", "mi"], ["mi"]),
+    ],
+)
+def test_final_commands(tmp_path, monkeypatch, argv, commands):
+    monkeypatch.setattr(
+        sys, "argv", ["metrics_preview.py", "-o", str(tmp_path), "--max-memory", "64", "path", *argv]
+    )
+    assert mp.setup_arguments().commands == commands
+
+
+def test_max_memory_rejects_final_preview_commands(tmp_path, monkeypatch):
+    argv = [
+        "metrics_preview.py",
+        "-o",
+        str(tmp_path),
+        "--max-memory",
+        "64",
+        "path",
+        "final",
+        "-c",
+        "mi",
+        "cc",
+    ]
+    monkeypatch.setattr(sys, "argv", argv)
+    with pytest.raises(SystemExit):
+        mp.setup_arguments()
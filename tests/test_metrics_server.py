@@ -0,0 +1,21 @@
+import os
+
+import duplicates
+import metrics_server
+from test_duplicates import BLOCK, UNIQUE
+
+
+def test_changed_file_updates_the_duplicates_of_its_clones(tmp_path):
+    (tmp_path / "a.py").write_text(UNIQUE + BLOCK.format(name="f"))
+    (tmp_path / "b.py").write_text(BLOCK.format(name="g"))
+    index = metrics_server.MetricsIndex(str(tmp_path), [])
+    assert index.file_stats("a.py")["duplicated"] > 0.0
+    (tmp_path / "b.py").write_text(UNIQUE + "\n")
+    os.utime(tmp_path / "b.py", ns=(1, 1))
+    # the clone moved from the end of a.py to its start
+    assert index.file_stats("b.py")["duplicated"] > 0.0
+    assert index.percentages() == duplicates.find_duplicates(str(tmp_path), [])
+    (tmp_path / "b.py").unlink()
+    index.refresh()
+    assert index.percentages() == {"a.py": 0.0}
+    assert index.analyzed == 3
@@ -0,0 +1,28 @@
+import mi_preview as mi_p
+
+CC_DATA = {
+    "a.py": [
+        {"type": "function", "name": "f", "lineno": 1, "endline": 4, "complexity": 3},
+        {"type": "class", "name": "C", "lineno": 6, "endline": 20, "complexity": 5},
+        {"type": "method", "name": "m", "lineno": 7, "endline": 12, "complexity": 4},
+    ],
+    "b.py": [{"type": "method", "name": "n", "lineno": 2, "endline": 3, "complexity": 1}],
+    "c.py": [{"type": "function", "name": "g", "lineno": 1, "endline": 10, "complexity": 2}],
+}
+
+
+def test_function_complexity_and_loc_take_the_same_blocks():
+    cc = mi_p.radon_cc_parser_function(CC_DATA)
+    loc = mi_p.radon_cc_parser_function_loc(CC_DATA)
+    assert cc == {"a.py": [3], "b.py": [], "c.py": [2]}
+    assert {f: v.tolist() for f, v in loc.items()} == {"a.py": [4], "b.py": [], "c.py": [10]}
+
+
+def test_raw_data_takes_the_original_positional_arguments():
+    raw = {"a.py": {"loc": 20}, "c.py": {"loc": 30}}
+    coverage = "Total coverage: 50.0%"
+    data = mi_p.MIChartParser.MIRawData(CC_DATA, raw, {}, coverage, "/project")
+    assert data.files == ["a.py", "b.py", "c.py"]
+    assert data.dup_lines == []
+    with_duplicates = mi_p.MIChartParser.MIRawData(CC_DATA, raw, {}, coverage, "/project", {"a.py": 10.0})
+    assert with_duplicates.dup_lines == [10.0]
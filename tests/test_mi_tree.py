@@ -0,0 +1,33 @@
+import pytest
+
+import metrics_preview as mp
+import mi_preview as mi_p
+import mi_tree
+
+DOCUMENTED = '"""a"""\n\n\ndef f():\n    """f"""\n\n\ndef g():\n    """g"""\n\n\ndef h():\n    """h"""\n'
+HALF_DOCUMENTED = '"""b"""\n\n\ndef f():\n    pass\n'
+
+
+@pytest.fixture
+def project(tmp_path):
+    (tmp_path / "pkg").mkdir()
+    (tmp_path / "pkg" / "a.py").write_text(DOCUMENTED)
+    (tmp_path / "pkg" / "b.py").write_text(HALF_DOCUMENTED)
+    (tmp_path / "main.py").write_text(HALF_DOCUMENTED)
+    return tmp_path
+
+
+def test_directory_coverage_counts_fully_documented_files(project, tmp_path_factory):
+    output_folder = tmp_path_factory.mktemp("output")
+    mp.get_docstr_results(str(project), str(output_folder), [], pipe=True)
+    data = list(mp.read_final_results([], [], [""], [], str(project), str(output_folder)))
+    data[1] = {f: {"loc": 12} for f in ["pkg/a.py", "pkg/b.py", "main.py"]}
+    root = mi_tree.mi_tree(mi_p.MIChartParser.MIRawData(*data))
+    pkg = root.children["pkg"]
+    # a.py has 4 of 4 docstrings, b.py 1 of 2 and it's the only one in the text report
+    assert (pkg.counts.docstrings_needed, pkg.counts.docstrings_found) == (6, 5)
+    assert pkg.counts.coverage() == pytest.approx(100 * 5 / 6)
+    assert (root.counts.docstrings_needed, root.counts.docstrings_found) == (8, 6)
+    assert root.counts.coverage() == pytest.approx(mi_p.overall_coverage(data[3]), abs=0.05)
+    # the text for the charts is the one of "docstr-coverage -v 2"
+    assert "Overall statistics for 3 files:\nNeeded: 8  -  Found: 6  -  Missing: 2\n" in data[3]
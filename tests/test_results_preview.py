@@ -0,0 +1,57 @@
+import matplotlib
+
+matplotlib.use("Agg")
+
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pytest  # noqa: E402
+
+from preview import results_preview as rp  # noqa: E402
+
+
+@pytest.fixture
+def interactive(monkeypatch):
+    monkeypatch.setattr(rp, "_interactive", lambda fig: True)
+
+
+def chart(n: int) -> plt.Axes:
+    fig, ax = plt.subplots()
+    labels = [f"f{i}.py" for i in range(n)]
+    rp._make_bar(fig, ax, np.linspace(0.0, 1.0, n), labels, "title", "x", "y")
+    return ax
+
+
+def bars(ax: plt.Axes) -> int:
+    return len(ax.patches)
+
+
+@pytest.mark.parametrize("n, drawn", [(rp.LOD_BARS, rp.LOD_BARS), (rp.LOD_BARS + 1, 0)])
+def test_envelope_replaces_the_bars_above_the_threshold(interactive, n, drawn):
+    ax = chart(n)
+    assert bars(ax) == drawn
+    assert len(ax.collections) == (n > rp.LOD_BARS)
+    plt.close(ax.figure)
+
+
+def test_zoom_redraws_the_bars_in_view(interactive):
+    ax = chart(3 * rp.LOD_BARS)
+    ax.set_xlim(100, 100 + rp.LOD_BARS)
+    assert bars(ax) == rp.LOD_BARS and not ax.collections
+    ax.set_xlim(0, rp.LOD_BARS + 1)
+    assert bars(ax) == 0 and len(ax.collections) == 1
+    plt.close(ax.figure)
+
+
+def test_saved_chart_draws_all_the_bars(interactive, tmp_path):
+    ax = chart(rp.LOD_BARS + 1)
+    plt.figure(ax.figure)
+    rp._save_or_show(str(tmp_path), "chart.png")
+    assert bars(ax) == rp.LOD_BARS + 1 and not ax.collections
+    assert (tmp_path / "chart.png").exists()
+
+
+def test_non_interactive_backend_draws_all_the_bars():
+    ax = chart(rp.LOD_BARS + 1)
+    assert not rp._interactive(ax.figure)
+    assert bars(ax) == rp.LOD_BARS + 1 and not ax.collections
+    plt.close(ax.figure)
@@ -0,0 +1,64 @@
+import json
+import os
+
+import pytest
+
+import metrics_preview as mp
+import results_parser as rp
+import results_store
+
+SOURCE = '"""m"""\n\n\nclass A:\n    def f(self, x):\n        if x:\n            return 1\n        return 2\n\n\ndef g():\n    pass\n'
+
+
+@pytest.fixture
+def analyzed(tmp_path, monkeypatch):
+    # results piped by other tests are not saved to the output folder
+    monkeypatch.setattr(mp, "piped_results", dict())
+    (tmp_path / "project").mkdir()
+    (tmp_path / "project" / "a.py").write_text(SOURCE)
+    (tmp_path / "project" / "b.py").write_text("def h(y):\n    return y * 2\n")
+    (tmp_path / "output").mkdir()
+    path, output_folder = str(tmp_path / "project"), str(tmp_path / "output")
+    mp.get_mi_stats(path, output_folder, [])
+    return path, output_folder
+
+
+def test_mi_columns_follow_the_results_files(analyzed, monkeypatch):
+    path, output_folder = analyzed
+    assert mp.load_mi_raw_data(path, output_folder, True, []).dup_lines == [0.0, 0.0]
+    read_final_results = mp.read_final_results
+    reads = []
+    monkeypatch.setattr(mp, "read_final_results", lambda *args: reads.append(1) or read_final_results(*args))
+    mp.load_mi_raw_data(path, output_folder, True, [])
+    assert reads == []
+    # a rewritten results file or other options make the columns stale
+    with open(mp.duplicates_file_path(output_folder), "w") as f:
+        json.dump({"a.py": 50.0, "b.py": 0.0}, f)
+    assert mp.load_mi_raw_data(path, output_folder, True, []).dup_lines == [50.0, 0.0]
+    assert len(reads) == 1
+    mp.load_mi_raw_data(path, output_folder, True, [])
+    mp.load_mi_raw_data(path, output_folder, True, ["b.py"])
+    assert len(reads) == 2
+
+
+@pytest.mark.parametrize(
+    "parser, file, read, args",
+    [
+        (rp.radon_cc_parser_function, "radon_cc_results.json", mp.read_dict, ()),
+        (rp.radon_raw_distinct_parser, "radon_raw_results.json", mp.read_dict, ()),
+        (rp.flake8_cognitive_parser, "flake8.json", mp.read_dict, ()),
+        (rp.docstr_parser, "docstr_results.txt", mp.read_text, ("/project/",)),
+    ],
+)
+def test_previews_parse_results_once_per_change(analyzed, parser, file, read, args):
+    _, output_folder = analyzed
+    file = os.path.join(output_folder, file)
+    reads = []
+    stored = results_store.StoredResults(file, lambda f: reads.append(f) or read(f))
+    expected = list(parser(read(file), *args))
+    assert list(parser(stored, *args)) == expected
+    assert list(parser(stored, *args)) == expected
+    assert len(reads) == 1
+    os.utime(file, ns=(0, 0))
+    assert list(parser(stored, *args)) == expected
+    assert len(reads) == 2
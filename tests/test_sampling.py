@@ -0,0 +1,59 @@
+import argparse
+import shutil
+from pathlib import Path
+
+import pytest
+
+import calculate_mi as cm
+import duplicates
+import metrics_preview as mp
+import sampling
+
+REPO = Path(__file__).resolve().parent.parent
+# modules of this repository in two directories make strata of files with different sizes and scores
+SOURCES = {
+    "pkg": ["duplicates.py", "top_k.py", "mi_tree.py", "sampling.py", "stream_json.py", "import_graph.py"],
+    "tools": ["html_report.py", "function_records.py", "shared_cache.py", "mi_api.py", "run_stats.py"],
+}
+
+
+@pytest.fixture
+def project(tmp_path):
+    for directory, names in SOURCES.items():
+        (tmp_path / directory).mkdir()
+        for name in names:
+            shutil.copy(REPO / name, tmp_path / directory / name)
+    return tmp_path
+
+
+def sample_counts(path, files, output_folder):
+    counts_by_file = mp.get_files_counts(path, files, output_folder, [])
+    for f, dup in duplicates.find_duplicates(path, [], files).items():
+        counts_by_file[f].dup = cm.duplicate_limits.get_stats([dup])
+    return counts_by_file
+
+
+def test_bootstrap_interval_contains_the_full_score(project, tmp_path_factory):
+    path, output_folder = str(project), str(tmp_path_factory.mktemp("output"))
+    sampler = sampling.Sampler(mp.source_lines(path, []), seed=1)
+    order = sampler.order()
+    full = cm.mi_counts_stats(sum(sample_counts(path, order, output_folder).values(), cm.MICounts()))
+    # a census is known exactly
+    stats, intervals = sampler.estimate(sample_counts(path, order, output_folder))
+    assert vars(stats) == vars(full)
+    assert all(intervals[k] == (v, v) for k, v in vars(full).items())
+    stats, intervals = sampler.estimate(sample_counts(path, order[: len(order) * 2 // 3], output_folder))
+    low, high = intervals["mi"]
+    assert low <= full.mi <= high and low < high
+
+
+@pytest.mark.parametrize("text", ["0", "-0.5", "1.5", "nan"])
+def test_sample_fraction_out_of_range_is_rejected(text):
+    with pytest.raises(argparse.ArgumentTypeError):
+        mp.sample_fraction(text)
+
+
+def test_empty_sample_has_no_estimate():
+    assert mp.sample_fraction("1") == 1.0
+    with pytest.raises(ValueError):
+        sampling.Sampler({"a.py": 10}, seed=0).estimate(dict())
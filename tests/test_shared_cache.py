@@ -0,0 +1,49 @@
+import os
+
+import pytest
+
+import metrics_preview as mp
+import shared_cache as sc
+
+
+def test_evict_keeps_files_being_written(tmp_path):
+    cache = sc.SharedCache(str(tmp_path), 0)
+    cache.put(cache.key(["tool"], "a"), [1, 2])
+    cache.put(cache.key(["tool"], "b"), None)
+    (tmp_path / "ab").mkdir()
+    (tmp_path / "ab" / "entry.tmp").write_text("{")
+    assert cache.evict() == 2
+    assert [f for _, _, fs in os.walk(tmp_path) for f in fs] == ["entry.tmp"]
+
+
+def test_failed_put_leaves_no_temporary_file(tmp_path, monkeypatch):
+    cache = sc.SharedCache(str(tmp_path), 0)
+    with pytest.raises(TypeError):
+        cache.put(cache.key(["tool"], "a"), object())
+
+    # the temporary file may be gone already when the write fails, the error of the write is raised
+    def replace(src, dst):
+        os.unlink(src)
+        raise PermissionError(dst)
+
+    monkeypatch.setattr(sc.os, "replace", replace)
+    with pytest.raises(PermissionError):
+        cache.put(cache.key(["tool"], "a"), 1)
+    assert [f for _, _, fs in os.walk(tmp_path) for f in fs] == []
+
+
+def test_tool_runs_on_chunks_of_files(tmp_path, monkeypatch):
+    files = [f"module_{i}.py" for i in range(20)]
+    for i, f in enumerate(files):
+        (tmp_path / f).write_text(f"x = {i}\n" * (i + 1))
+    whole = mp.read_pipe_dict(["radon", "raw"] + files + ["-j"], cwd=str(tmp_path))
+    calls = []
+    read_pipe_dict = mp.read_pipe_dict
+    monkeypatch.setattr(
+        mp, "read_pipe_dict", lambda args, **kwargs: calls.append(args) or read_pipe_dict(args, **kwargs)
+    )
+    monkeypatch.setattr(mp, "ARGV_MAX_BYTES", 50)
+    assert mp.read_pipe_dict_chunks(["radon", "raw"], files, ["-j"], cwd=str(tmp_path)) == whole
+    assert len(calls) > 1 and all(args[-1] == "-j" for args in calls)
+    assert all(sum(len(f) + 1 for f in args[2:-1]) <= 50 for args in calls)
+    assert [f for args in calls for f in args[2:-1]] == files
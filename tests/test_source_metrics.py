@@ -0,0 +1,39 @@
+import ast
+
+from docstr_coverage import analyze
+
+import source_metrics
+
+SOURCES = {
+    "empty.py": "",
+    "only_docstring.py": '"""module"""\n',
+    "comments.py": "# a comment\n\n# another\n",
+    "functions.py": (
+        'import os\n\n\ndef f():\n    """f"""\n\n\ndef g():\n    def inner():\n        pass\n\n\n'
+        'async def h():\n    ""\n'
+    ),
+    "classes.py": (
+        '"""classes"""\n\n\nclass A:\n    def __init__(self):\n        pass\n\n    @property\n'
+        '    def value(self):\n        """value"""\n\n    def _private(self):\n        pass\n\n'
+        "    def __repr__(self):\n        pass\n\n    class Inner:\n        '''inner'''\n\n"
+        "        def method(self):\n            pass\n"
+    ),
+    "no_newline.py": "def f():\n    return 1",
+    "decorated.py": "import functools\n\n\n@functools.cache\ndef f(x):\n    '''f'''\n    return x\n",
+}
+
+
+def test_docstring_counts_equal_docstr_coverage(tmp_path):
+    for name, source in SOURCES.items():
+        (tmp_path / name).write_text(source)
+    expected = {
+        file.rsplit("/", 1)[-1]: [r.count_aggregate().needed, r.count_aggregate().found]
+        for file, r in analyze([str(tmp_path / name) for name in SOURCES], show_progress=False).files()
+    }
+    counts = {}
+    for name in SOURCES:
+        data = (tmp_path / name).read_bytes()
+        counts[name] = source_metrics.docstring_counts(str(tmp_path / name), data, ast.parse(data))
+    assert counts == expected
+    # nested functions are needed, an empty docstring is not found
+    assert counts["functions.py"] == [5, 1]
@@ -0,0 +1,59 @@
+import json
+import random
+
+import pytest
+
+import stream_json
+
+DATA = {
+    "a.py": [{"text": 'quote " and \\ backslash } ] {', "line_number": 1}, {"values": [1, -2.5e3, None]}],
+    "b/c.py": {"nested": {"deep": [[], {}, [True, False]]}, "unicode": "é\\u0041"},
+    "": "",
+    "number": 12345678901234567890,
+    "float": -0.000125,
+}
+
+
+def chunks(text: str, sizes: list):
+    start = 0
+    for size in sizes:
+        yield text[start : start + size]
+        start += size
+    if start < len(text):
+        yield text[start:]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, 1 << 16])
+def test_items_equal_json_loads_for_any_chunking(size):
+    text = json.dumps(DATA, indent=2)
+    items = dict(stream_json.iter_object_items(chunks(text, [size] * len(text))))
+    assert items == json.loads(text)
+
+
+def test_random_chunking():
+    rng = random.Random(0)
+    text = json.dumps(DATA)
+    for _ in range(200):
+        sizes = [rng.randint(1, 10) for _ in range(len(text))]
+        assert dict(stream_json.iter_object_items(chunks(text, sizes))) == DATA
+
+
+def test_empty_and_truncated_objects():
+    assert dict(stream_json.iter_object_items(["{", " }"])) == {}
+    with pytest.raises(json.JSONDecodeError):
+        dict(stream_json.iter_object_items(['{"a": [1, 2', "]"]))
+
+
+def test_long_member_is_decoded_in_linear_time(monkeypatch):
+    decoded = []
+    decode = stream_json._decoder.raw_decode
+
+    def counting_decode(text, pos):
+        decoded.append(len(text) - pos)
+        return decode(text, pos)
+
+    monkeypatch.setattr(stream_json._decoder, "raw_decode", counting_decode)
+    text = json.dumps({"a.py": [{"line": i, "text": "x" * 50} for i in range(5000)]})
+    assert dict(stream_json.iter_object_items(chunks(text, [1000] * len(text)))) == json.loads(text)
+    # retried once its text doubles, not once per chunk
+    assert sum(decoded) < 4 * len(text)
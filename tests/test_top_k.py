@@ -0,0 +1,31 @@
+import numpy as np
+
+import top_k
+
+
+def test_top_k_returns_the_worst_first():
+    values = np.array([3.0, 9.0, 1.0, 9.0, 5.0])
+    assert top_k.top_k(values, 3).tolist() == [1, 3, 4]
+    assert top_k.top_k(values, 2, reverse=False).tolist() == [2, 0]
+    assert top_k.top_k(values, 10).tolist() == [1, 3, 4, 0, 2]
+
+
+def test_ties_at_the_k_th_value_keep_the_original_order():
+    rng = np.random.default_rng(0)
+    for _ in range(200):
+        values = rng.integers(0, 4, rng.integers(1, 40)).astype(float)
+        values[rng.random(len(values)) < 0.1] = np.nan
+        k = int(rng.integers(0, len(values) + 2))
+        for reverse in [True, False]:
+            keys = np.nan_to_num(-values if reverse else values, nan=np.inf)
+            expected = np.argsort(keys, kind="stable")[: max(k, 0)]
+            assert top_k.top_k(values, k, reverse).tolist() == expected.tolist()
+
+
+def test_long_paths_keep_their_tail():
+    path = "very/long/package/name/with/many/levels/of/subpackages/and/finally/the_module_name.py"
+    table = top_k.render_table("title", ["file", "mi"], [[path, 0.5]], width=40)
+    row = table.splitlines()[-1]
+    assert row.startswith("..." + path[-37:])
+    assert "0.5" in row
+    assert top_k.shorten("short.py", 40) == "short.py"
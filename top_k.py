@@ -0,0 +1,44 @@
+import numpy as np
+
+
+def top_k(values, k: int, reverse=True) -> np.ndarray:
+    # indices of the k worst values, the worst first; ties keep the original order
+    keys = np.asarray(values, dtype=float)
+    if reverse:
+        keys = -keys
+    # missing values are the last
+    keys = np.where(np.isnan(keys), np.inf, keys)
+    if k <= 0:
+        candidates = np.arange(0)
+    elif k < len(keys):
+        # the values before the k-th one, then the ties of the k-th one in the original order
+        kth = np.partition(keys, k - 1)[k - 1]
+        before = np.flatnonzero(keys < kth)
+        candidates = np.concatenate([before, np.flatnonzero(keys == kth)[: k - len(before)]])
+    else:
+        candidates = np.arange(len(keys))
+    return candidates[np.argsort(keys[candidates], kind="stable")]
+
+
+def shorten(cell, width: int) -> str:
+    # long cells keep their tail, where a path has the file name
+    text = str(cell)
+    return text if len(text) <= width else "..." + text[-(width - 3) :]
+
+
+def render_table(title: str, header: list, rows: list, width=60) -> str:
+    rows = [[shorten(c, width) for c in row] for row in rows]
+    widths = [max([len(h)] + [len(row[i]) for row in rows]) for i, h in enumerate(header)]
+    lines = [title, "  ".join(h.ljust(w) for h, w in zip(header, widths))]
+    lines.append("  ".join("-" * w for w in widths))
+    lines.extend("  ".join(c.ljust(w) for c, w in zip(row, widths)) for row in rows)
+    return "\n".join(line.rstrip() for line in lines)
+
+
+def render_top(entities, k: int) -> str:
+    indices = top_k(entities.values, k, entities.reverse)
+    return render_table(
+        f"{entities.title}: worst {len(indices)} of {len(entities)}",
+        entities.header,
+        [entities.row(i) for i in indices.tolist()],
+    )